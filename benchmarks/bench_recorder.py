@@ -0,0 +1,95 @@
+"""Recorder growth of a consumables hub with and without compact state.
+
+Sets up a hub, lets a number of local midnights pass and counts the
+``states`` and ``state_attributes`` rows, and their approximate bytes,
+that Home Assistant's recorder would store per day. Setup writes and the
+hub's few summary sensors are left out so the numbers show the steady
+daily growth per consumable::
+
+    python benchmarks/bench_recorder.py --consumables 1000 --days 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tests"))
+
+import fake_hass  # noqa: E402
+
+DOMAIN = fake_hass.DOMAIN
+CONSUMABLES = 1000
+DAYS = 30
+
+
+async def _async_run(compact: bool, size: int, days: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as config_dir, fake_hass.installed():
+        hass, _integration = fake_hass.create_hass(config_dir)
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"compact_state": compact},
+        )
+        hass.storage[f"{DOMAIN}.{hub.entry_id}"] = {
+            "items": [
+                {
+                    "id": f"item{i}",
+                    "name": f"Filter {i}",
+                    "duration_days": 30 + i % 90,
+                    "start_date": (dt.date(2024, 1, 1) - dt.timedelta(days=i % 120)).isoformat(),
+                }
+                for i in range(size)
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        hass.recorder.exclude.update(
+            entity.entity_id
+            for entity in hass.config_entries.entities[hub.entry_id]
+            if not entity.unique_id.endswith("_days_remaining")
+        )
+
+        before = hass.recorder.as_dict()
+        today = fake_hass.CLOCK.now.date()
+        for day in range(1, days + 1):
+            midnight = dt.datetime.combine(today + dt.timedelta(days=day), dt.time(), fake_hass.UTC)
+            await hass.async_fire_time_changed(midnight)
+        after = hass.recorder.as_dict()
+    growth = {name: after[name] - before[name] for name in after}
+    return {
+        "mode": "compact" if compact else "full",
+        "consumables": size,
+        "days": days,
+        **{f"{name}_per_day": round(value / days, 1) for name, value in growth.items()},
+    }
+
+
+def run(size: int = CONSUMABLES, days: int = DAYS) -> dict[str, Any]:
+    """Run both modes and return the JSON-serialisable comparison."""
+    results = [asyncio.run(_async_run(compact, size, days)) for compact in (False, True)]
+    full, compact = results
+    return {
+        "benchmark": "recorder",
+        "results": results,
+        "bytes_saved_per_day": round(full["bytes_per_day"] - compact["bytes_per_day"], 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--consumables", type=int, default=CONSUMABLES)
+    parser.add_argument("--days", type=int, default=DAYS)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.consumables, args.days), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
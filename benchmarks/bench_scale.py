@@ -0,0 +1,196 @@
+"""Scale benchmarks for the integration on the fake Home Assistant core.
+
+Measures setup, service registration, the midnight refresh, service latency,
+in-place option updates versus reloads and peak memory for a range of
+consumable counts, once with one config entry per consumable and once with
+a single hub. Results are printed, or written with ``--output``, as JSON::
+
+    python benchmarks/bench_scale.py --sizes 100 1000 10000 --output bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tests"))
+
+import fake_hass  # noqa: E402
+
+DOMAIN = fake_hass.DOMAIN
+SIZES = (100, 1000, 10000)
+MODES = ("entries", "hub")
+SAMPLES = 50
+
+
+def _consumable(i: int) -> dict[str, Any]:
+    start = dt.date(2024, 1, 1) - dt.timedelta(days=i % 120)
+    return {"name": f"Filter {i}", "duration_days": 30 + i % 90, "start_date": start.isoformat()}
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median": round(statistics.median(ordered) * 1000, 4),
+        "p95": round(ordered[int(len(ordered) * 0.95) - 1 if len(ordered) > 1 else 0] * 1000, 4),
+        "max": round(ordered[-1] * 1000, 4),
+    }
+
+
+async def _timed(func: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await func()
+    return time.perf_counter() - start
+
+
+async def _async_setup(hass, mode: str, size: int) -> list[Any]:
+    """Create and set up ``size`` consumables; return their config entries."""
+    entries = hass.config_entries
+    if mode == "hub":
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"{DOMAIN}.{hub.entry_id}"] = {
+            "items": [{"id": f"item{i}", **_consumable(i)} for i in range(size)]
+        }
+        await entries.async_add(hub)
+        created = [hub]
+    else:
+        created = []
+        for i in range(size):
+            item = _consumable(i)
+            entry = fake_hass.ConfigEntry(title=item["name"], data=item, options={})
+            await entries.async_add(entry)
+            created.append(entry)
+    await hass.async_block_till_done()
+    return created
+
+
+def _sensor_ids(hass) -> list[str]:
+    return sorted(
+        entity.entity_id
+        for entities in hass.config_entries.entities.values()
+        for entity in entities
+        if entity.unique_id.endswith("_days_remaining")
+    )
+
+
+async def _async_run(mode: str, size: int, samples: int) -> dict[str, Any]:
+    result: dict[str, Any] = {"mode": mode, "consumables": size}
+    with tempfile.TemporaryDirectory() as config_dir, fake_hass.installed():
+        hass, integration = fake_hass.create_hass(config_dir)
+        start = time.perf_counter()
+        entries = await _async_setup(hass, mode, size)
+        result["setup_s"] = round(time.perf_counter() - start, 4)
+        sensors = _sensor_ids(hass)
+        result["entities"] = len(hass.states.async_all())
+        result["timers"] = hass.pending_timers
+
+        register = []
+        for _ in range(samples):
+            hass.data[DOMAIN]["services_registered"] = False
+            start = time.perf_counter()
+            integration._register_services(hass)
+            register.append(time.perf_counter() - start)
+        result["register_services_ms"] = _summary(register)
+
+        writes = hass.states.writes
+        midnight = dt.datetime.combine(fake_hass.CLOCK.now.date() + dt.timedelta(days=1), dt.time(), fake_hass.UTC)
+        start = time.perf_counter()
+        await hass.async_fire_time_changed(midnight)
+        result["midnight_tick_s"] = round(time.perf_counter() - start, 4)
+        result["midnight_tick_writes"] = hass.states.writes - writes
+
+        step = max(len(sensors) // samples, 1)
+        picked = sensors[::step][:samples]
+        for service, data in (
+            ("set_start_date", {"start_date": "2024-01-02"}),
+            ("mark_replaced", {}),
+        ):
+            latencies = [
+                await _timed(
+                    lambda eid=entity_id: hass.services.async_call(DOMAIN, service, {"entity_id": eid, **data})
+                )
+                for entity_id in picked
+            ]
+            result[f"{service}_ms"] = _summary(latencies)
+        result["batch_set_start_date_s"] = round(
+            await _timed(
+                lambda: hass.services.async_call(
+                    DOMAIN, "set_start_date", {"entity_id": sensors, "start_date": "2024-01-03"}
+                )
+            ),
+            4,
+        )
+        # Let the write-behind buffer reach the config entries
+        await hass.async_fire_time_changed(midnight + dt.timedelta(seconds=10))
+
+        if mode == "entries":
+            in_place, reload = [], []
+            for i, entry in enumerate(entries[::step][:samples]):
+
+                async def _update(entry=entry, duration=120 + i):
+                    hass.config_entries.async_update_entry(
+                        entry, options={**entry.options, "duration_days": duration}
+                    )
+                    await hass.async_block_till_done()
+
+                async def _rename(entry=entry):
+                    hass.config_entries.async_update_entry(
+                        entry, data={**entry.data, "name": f"{entry.data['name']} renamed"}
+                    )
+                    await hass.async_block_till_done()
+
+                in_place.append(await _timed(_update))
+                reload.append(await _timed(_rename))
+            result["update_in_place_ms"] = _summary(in_place)
+            result["update_reload_ms"] = _summary(reload)
+
+    # Memory is measured on a separate run since tracing slows everything down
+    with tempfile.TemporaryDirectory() as config_dir, fake_hass.installed():
+        hass, _integration = fake_hass.create_hass(config_dir)
+        tracemalloc.start()
+        await _async_setup(hass, mode, size)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run(sizes=SIZES, modes=MODES, samples: int = SAMPLES) -> dict[str, Any]:
+    """Run every benchmark and return the JSON-serialisable report."""
+    manifest = json.loads((fake_hass.INTEGRATION_DIR / "manifest.json").read_text())
+    results = [asyncio.run(_async_run(mode, size, samples)) for mode in modes for size in sizes]
+    return {
+        "benchmark": "scale",
+        "integration_version": manifest["version"],
+        "python": platform.python_version(),
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    report = json.dumps(run(args.sizes, args.modes, args.samples), indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
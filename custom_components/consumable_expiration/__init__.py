@@ -1,47 +1,197 @@
-
 from __future__ import annotations
 
 import datetime as dt
 import logging
+from functools import partial
+from typing import Any, Callable, Iterable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
+    CONFIG_ENTRY_VERSION,
+    CONF_NAME,
+    CONF_ITEM_TYPE,
+    CONF_ICON,
+    CONF_COMPACT_STATE,
+    CONF_COLLECT_METRICS,
+    CONF_SOON_DAYS,
+    DEFAULT_SOON_DAYS,
     CONF_DURATION_DAYS,
     CONF_START_DATE,
+    CONF_THRESHOLDS,
+    CONF_AREA,
+    CONF_DEVICE_GROUPING,
+    CONF_PARENT_DEVICE,
+    DEVICE_GROUPING_CONSUMABLE,
+    CONF_USAGE_ENTITY,
+    CONF_USAGE_LIMIT,
+    CONF_USAGE_MODE,
+    USAGE_MODES,
+    SIGNAL_ITEMS_ADDED,
+    HISTORY_REMOVED,
+)
+from .bulk import (
+    CONF_DUE_DATE,
+    CONF_ID,
+    FORMATS,
+    IMPORT_CHUNK_SIZE,
+    RowReader,
+    detect_format,
+    resolve_config_path,
+    validate_row,
+    write_rows,
+)
+from .aggregates import Aggregates, async_track_groups
+from .devices import CONSUMABLE_ENTITIES, DeviceInfoCache, async_consolidate_devices
+from .digest import async_build_digest, async_cancel_digest, async_schedule_digest
+from .due_index import IndexedSpecs
+from .forecast import (
+    MAX_HORIZON_MONTHS,
+    PERIOD_MONTH,
+    PERIODS,
+    ScheduleColumns,
+    add_months,
+    forecast_by_type,
 )
-from .util import merge_entry_options
+from .headless import HeadlessStore, async_remove_headless
+from .hub import ConsumableCollection, async_remove_collection
+from .index import EntityIndex, async_track_entity_registry
+from .journal import ReplacementJournal
+from .metrics import Metrics
+from .usage import UsageTracker
+from .runtime import (
+    async_set_spec,
+    async_update_consumable,
+    current_spec,
+    get_devices,
+    get_headless,
+    get_hub,
+    get_index,
+    get_journal,
+    consumable_item_type,
+    consumable_name,
+    get_metrics,
+    get_thresholds,
+    get_usage,
+    get_writer,
+    is_hub_entry,
+    key_from_unique_id,
+)
+from .scheduler import ExpiryScheduler
+from .spec import ConsumableSpec, parse_thresholds, schedule_options
+from .thresholds import ThresholdNotifier
+from .util import default_icon, merge_entry_options
+from .writer import OptionsWriter
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.BUTTON]
+# The hub also owns the integration-wide entities
+HUB_PLATFORMS: list[Platform] = [*PLATFORMS, Platform.CALENDAR]
+
+# Row errors listed in an import response; the rest are only counted
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+# Entry data that entities are built from; changing any of it needs a reload
+STRUCTURAL_KEYS = (CONF_NAME, CONF_ITEM_TYPE, CONF_ICON)
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN].setdefault("entity_map", {})  # entity_id -> entry_id
+    if "index" not in hass.data[DOMAIN]:
+        # entity_id <-> consumable key <-> config entry, following registry renames
+        index = hass.data[DOMAIN]["index"] = EntityIndex()
+        async_track_entity_registry(hass, index)
+    # Hot-path counters; collection is off until a diagnostic sensor is enabled
+    metrics = hass.data[DOMAIN].setdefault("metrics", Metrics())
+    # One timer queue drives every consumable's state transitions
+    scheduler = hass.data[DOMAIN].setdefault("scheduler", ExpiryScheduler(hass, metrics))
+    # consumable key -> ConsumableSpec, with the keys also sorted by due date
+    specs = hass.data[DOMAIN].setdefault("specs", IndexedSpecs())
+    if "aggregates" not in hass.data[DOMAIN]:
+        # Kept up to date as specs change; read by the hub's summary sensors
+        aggregates = hass.data[DOMAIN]["aggregates"] = Aggregates(
+            specs, dt_util.now().date().toordinal(), scheduler
+        )
+        async_track_groups(hass, aggregates, hass.data[DOMAIN]["index"])
+    if not hass.data[DOMAIN].get("websocket_registered"):
+        # Like the services' voluptuous imports, only needed once Home Assistant runs
+        from .websocket import async_register_websocket_commands
+
+        async_register_websocket_commands(hass)
+        hass.data[DOMAIN]["websocket_registered"] = True
+    if "thresholds" not in hass.data[DOMAIN]:
+        # Threshold and expired events, one pending crossing per consumable
+        hass.data[DOMAIN]["thresholds"] = ThresholdNotifier(hass, specs, scheduler)
+    hass.data[DOMAIN].setdefault("structure", {})  # entry_id -> structural data
+    if "writer" not in hass.data[DOMAIN]:
+        writer = hass.data[DOMAIN]["writer"] = OptionsWriter(hass, metrics)
+        # Buffered option updates must reach the config entry store before it closes
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, writer.async_flush)
+    if "journal" not in hass.data[DOMAIN]:
+        # Replacement history; the file is only read when it is queried
+        journal = hass.data[DOMAIN]["journal"] = ReplacementJournal(hass, metrics=metrics)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, journal.async_flush)
+    # Usage counters of consumables worn out by another entity
+    hass.data[DOMAIN].setdefault("usage", UsageTracker(hass, metrics, scheduler))
+    # DeviceInfo per consumable, shared by consumables on the same device
+    hass.data[DOMAIN].setdefault("devices", DeviceInfoCache(hass))
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    # Ensure options are present
-    data = dict(entry.data)
-    options = dict(entry.options)
-    changed = False
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Upgrade a version 1 entry to the ordinal schedule of version 2.
 
-    if CONF_DURATION_DAYS not in options and CONF_DURATION_DAYS in data:
-        options[CONF_DURATION_DAYS] = data[CONF_DURATION_DAYS]
-        changed = True
-    if CONF_START_DATE not in options and CONF_START_DATE in data:
-        options[CONF_START_DATE] = data[CONF_START_DATE]
-        changed = True
+    The schedule is parsed one last time, from options or else entry data,
+    and written back as :func:`schedule_options`. Entries whose duration
+    can't be used keep their options so they stay visible as unavailable.
+    """
+    if entry.version > CONFIG_ENTRY_VERSION:
+        # Written by a newer release
+        return False
+    if entry.version == 1 and not is_hub_entry(entry):
+        spec = ConsumableSpec.from_options(entry.entry_id, entry.options, entry.data)
+        data = {key: value for key, value in entry.data.items() if key not in (CONF_DURATION_DAYS, CONF_START_DATE)}
+        options = dict(entry.options)
+        try:
+            options.update(schedule_options(spec.duration, spec.start_ord))
+        except ValueError:
+            _LOGGER.warning("Consumable %s has no valid duration; migrating it unchanged", entry.entry_id)
+            data = dict(entry.data)
+        else:
+            if spec.thresholds is not None:
+                options[CONF_THRESHOLDS] = list(spec.thresholds)
+        hass.config_entries.async_update_entry(entry, data=data, options=options, version=CONFIG_ENTRY_VERSION)
+        _LOGGER.debug("Migrated consumable entry %s to version %d", entry.entry_id, CONFIG_ENTRY_VERSION)
+        return True
+    hass.config_entries.async_update_entry(entry, version=CONFIG_ENTRY_VERSION)
+    return True
 
-    if changed:
-        hass.config_entries.async_update_entry(entry, options=options)
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    if is_hub_entry(entry):
+        return await _async_setup_hub(hass, entry)
+
+    hass.data[DOMAIN]["specs"][entry.entry_id] = ConsumableSpec.from_entry(
+        entry.entry_id, entry.options, entry.data
+    )
+    hass.data[DOMAIN]["structure"][entry.entry_id] = _structural_data(entry)
+    _async_collect_metrics(hass, entry)
+    async_consolidate_devices(hass, get_devices(hass), entry, {entry.entry_id: entry.data})
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -53,128 +203,770 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_setup_hub(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    hub = ConsumableCollection(hass, entry, get_metrics(hass))
+    await hub.async_load()
+    await get_usage(hass).async_load()
+    hass.data[DOMAIN]["hub"] = hub
+    # Items tracked without entities; only the hub's summaries and services see them
+    headless = HeadlessStore(hass, entry, get_metrics(hass))
+    await headless.async_load()
+    hass.data[DOMAIN]["headless"] = headless
+    # Before the items load so each is only scheduled once
+    get_thresholds(hass).async_set_default(_hub_thresholds(entry))
+    specs = hass.data[DOMAIN]["specs"]
+    for item_id, item in hub.items.items():
+        specs[item_id] = ConsumableSpec.from_options(item_id, item, {})
+    hass.data[DOMAIN]["structure"][entry.entry_id] = _structural_data(entry)
+    _async_collect_metrics(hass, entry)
+    async_consolidate_devices(hass, get_devices(hass), entry, hub.items)
+
+    await hass.config_entries.async_forward_entry_setups(entry, HUB_PLATFORMS)
+    async_schedule_digest(hass, entry)
+
+    entry.async_on_unload(entry.add_update_listener(_update_listener))
+    _register_services(hass)
+    return True
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    # Clean entity map entries for this config entry
-    emap: dict[str, str] = hass.data[DOMAIN].get("entity_map", {})
-    to_del = [eid for eid, e in emap.items() if e == entry.entry_id]
-    for eid in to_del:
-        emap.pop(eid, None)
+    # A reload must start from the latest options
+    get_writer(hass).async_flush_entry(entry.entry_id)
+    unloaded = await hass.config_entries.async_unload_platforms(
+        entry, HUB_PLATFORMS if is_hub_entry(entry) else PLATFORMS
+    )
+    hub = get_hub(hass) if is_hub_entry(entry) else None
+    keys = set(hub.items) if hub else {entry.entry_id}
+    # Entities normally leave the index as they are removed; drop any stragglers
+    get_index(hass).remove_config_entry(entry.entry_id)
+    if unloaded:
+        specs = hass.data[DOMAIN]["specs"]
+        for key in keys:
+            specs.pop(key, None)
+        hass.data[DOMAIN]["structure"].pop(entry.entry_id, None)
+        get_devices(hass).async_clear(entry.entry_id)
+        if hub:
+            hass.data[DOMAIN].pop("hub", None)
+            hass.data[DOMAIN].pop("headless", None)
+            get_thresholds(hass).async_set_default(())
+            async_cancel_digest(hass)
+        if not hass.data[DOMAIN]["structure"]:
+            # Last entry gone; drop the shared subscription, timer and their bound callbacks
+            get_usage(hass).async_shutdown()
+            hass.data[DOMAIN]["scheduler"].async_shutdown()
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    if is_hub_entry(entry):
+        await async_remove_collection(hass, entry.entry_id)
+        await async_remove_headless(hass, entry.entry_id)
+        return
+    journal = get_journal(hass)
+    hub = get_hub(hass)
+    # Entries migrated into the hub keep their history under the same key
+    if journal is not None and (hub is None or entry.entry_id not in hub.items):
+        journal.async_record(entry.entry_id, HISTORY_REMOVED)
+
+
+def _hub_thresholds(entry: ConfigEntry) -> tuple[int, ...]:
+    try:
+        return parse_thresholds(entry.options.get(CONF_THRESHOLDS)) or ()
+    except (TypeError, ValueError):
+        _LOGGER.debug("Ignoring invalid hub thresholds %s", entry.options.get(CONF_THRESHOLDS))
+        return ()
+
+
+@callback
+def _async_collect_metrics(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # Collect for diagnostics while the entry is loaded, with or without the metric sensors
+    if entry.options.get(CONF_COLLECT_METRICS):
+        metrics = get_metrics(hass)
+        metrics.acquire()
+        entry.async_on_unload(metrics.release)
+
+
+def _structural_data(entry: ConfigEntry) -> tuple:
+    # Options that change which entities exist or how they are built also need a
+    # reload; one that moves entities to another device consolidates them on setup
+    return (
+        *(entry.data.get(key) for key in STRUCTURAL_KEYS),
+        bool(entry.options.get(CONF_COMPACT_STATE)),
+        bool(entry.options.get(CONF_COLLECT_METRICS)),
+        entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS),
+        entry.options.get(CONF_DEVICE_GROUPING, DEVICE_GROUPING_CONSUMABLE),
+        entry.options.get(CONF_PARENT_DEVICE),
+        entry.options.get(CONF_AREA),
+    )
+
+
 async def _update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    # Reload entities when options change
-    await hass.config_entries.async_reload(entry.entry_id)
+    structure = hass.data[DOMAIN]["structure"]
+    if entry.entry_id not in structure:
+        # Options flushed while the entry unloads; the next setup reads them
+        return
+    metrics = get_metrics(hass)
+    start = metrics.start()
+    if structure[entry.entry_id] != _structural_data(entry):
+        # Name, type, icon, compact mode or device placement changed; rebuild the entities
+        _LOGGER.debug("Structural change for %s; reloading", entry.entry_id)
+        await hass.config_entries.async_reload(entry.entry_id)
+        metrics.observe("entry_reload", start)
+        return
+    if is_hub_entry(entry):
+        # Hub items keep their schedules in the hub store
+        get_thresholds(hass).async_set_default(_hub_thresholds(entry))
+        async_schedule_digest(hass, entry)
+        return
+    _async_apply_options(hass, entry)
+    metrics.observe("options_applied", start)
+
+
+def _async_apply_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Swap in a new spec for ``entry`` and refresh only its entities."""
+    spec = ConsumableSpec.from_entry(entry.entry_id, entry.options, entry.data)
+    if spec.same_schedule(hass.data[DOMAIN]["specs"].get(entry.entry_id)):
+        # Already applied when the update was buffered
+        return
+    _LOGGER.debug("Applied options in place for %s", entry.entry_id)
+    async_set_spec(hass, entry.entry_id, spec)
+
+
+def _resolve_key(hass: HomeAssistant, entity_id: str) -> str | None:
+    """Return the consumable key behind ``entity_id``, if it is one of ours."""
+    index = get_index(hass)
+    key = index.key_for(entity_id)
+    if key:
+        _LOGGER.debug("Found %s in entity index for %s", key, entity_id)
+        return key
+    get_metrics(hass).incr("registry_fallbacks")
+    # Fallback: the entity registry knows the unique id of unloaded entities
+    _LOGGER.debug("Entity %s not indexed; checking entity registry", entity_id)
+    ent = er.async_get(hass).async_get(entity_id)
+    if ent and ent.platform == DOMAIN:
+        key = key_from_unique_id(ent.unique_id)
+    if not key:
+        _LOGGER.debug("Could not resolve config entry for %s", entity_id)
+        return None
+    _LOGGER.debug("Resolved %s via entity registry for %s", key, entity_id)
+    # Remembered until the registry entry is renamed or removed
+    index.add(entity_id, key, ent.unique_id, ent.config_entry_id)
+    return key
+
+
+async def _async_migrate_to_hub(
+    hass: HomeAssistant, hub: ConsumableCollection
+) -> list[str]:
+    """Move every single-consumable entry into ``hub``.
+
+    Item ids reuse the old entry ids, so entity unique ids and device
+    identifiers stay the same. Registry entries are re-parented to the hub
+    before the old entry is removed, which keeps entity ids, customizations
+    and history.
+    """
+    ent_reg = er.async_get(hass)
+    dev_reg = dr.async_get(hass)
+    hub_entry_id = hub.entry.entry_id
+    migrated: list[str] = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if is_hub_entry(entry):
+            continue
+        key = entry.entry_id
+        # Unloading flushes buffered option updates first
+        await hass.config_entries.async_unload(key)
+        values = {**entry.data, **merge_entry_options(entry)}
+        values.setdefault(CONF_NAME, entry.title)
+        for ent in er.async_entries_for_config_entry(ent_reg, key):
+            ent_reg.async_update_entity(ent.entity_id, config_entry_id=hub_entry_id)
+            # Its own device, or the shared or appliance device it was placed on
+            if ent.device_id:
+                dev_reg.async_update_device(ent.device_id, add_config_entry_id=hub_entry_id)
+        # Added before the entry is removed so its history is kept
+        hub.async_add(values, item_id=key)
+        await hass.config_entries.async_remove(key)
+        hass.data[DOMAIN]["specs"][key] = ConsumableSpec.from_options(key, values, {})
+        migrated.append(key)
+        _LOGGER.debug("Migrated consumable entry %s into hub %s", key, hub_entry_id)
+    if migrated:
+        async_dispatcher_send(hass, SIGNAL_ITEMS_ADDED.format(hub_entry_id), migrated)
+    return migrated
+
+
+@callback
+def _async_track_headless(
+    hass: HomeAssistant,
+    headless: HeadlessStore,
+    rows: Iterable[tuple[int, dict[str, Any] | None, str | None]],
+) -> tuple[int, int, list[tuple[int, str]]]:
+    """Add or update headless items from numbered, validated rows.
+
+    Returns the created and updated counts and ``(number, error)`` of the
+    rows that were rejected.
+    """
+    specs = hass.data[DOMAIN]["specs"]
+    batch: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    errors: list[tuple[int, str]] = []
+    for number, row, error in rows:
+        if row is not None:
+            item_id = row.get(CONF_ID)
+            if item_id is None:
+                error = "headless items need an id"
+            elif item_id in specs:
+                error = f"{item_id} is a consumable with entities"
+            elif CONF_DURATION_DAYS not in row and item_id not in headless and item_id not in seen:
+                error = "new headless items need duration_days"
+            else:
+                seen.add(item_id)
+                batch.append(row)
+                continue
+        errors.append((number, error))
+    created, updated = headless.async_track(batch, dt_util.now().date().toordinal())
+    return created, updated, errors
+
+
+def _changes_schedule(spec: ConsumableSpec, schedule: dict[str, Any]) -> bool:
+    """Whether an imported ``schedule`` differs from ``spec``."""
+    if schedule.get(CONF_DURATION_DAYS, spec.duration) != spec.duration:
+        return True
+    start = schedule.get(CONF_START_DATE)
+    return start is not None and dt.date.fromisoformat(start).toordinal() != spec.start_ord
+
+
+async def _async_import_rows(
+    hass: HomeAssistant, reader: RowReader, headless: HeadlessStore | None = None
+) -> dict[str, Any]:
+    """Create or update consumables from ``reader`` one chunk at a time.
+
+    Rows with the id of a loaded consumable update its duration and start
+    date and count as updated only if that changes them; other rows become
+    new hub items. With ``headless`` every row is
+    tracked there instead. Parsing and validation run in the executor and
+    each chunk adds its new entities in one batch.
+    """
+    hub = get_hub(hass)
+    specs: dict[str, ConsumableSpec] = hass.data[DOMAIN]["specs"]
+    today = dt.date.today().isoformat()
+    created = updated = error_count = 0
+    errors: list[dict[str, Any]] = []
+    try:
+        while chunk := await hass.async_add_executor_job(reader.read_chunk, IMPORT_CHUNK_SIZE):
+            if headless is not None:
+                chunk_created, chunk_updated, chunk_errors = _async_track_headless(hass, headless, chunk)
+                created += chunk_created
+                updated += chunk_updated
+                error_count += len(chunk_errors)
+                errors.extend(
+                    {"line": line, "error": error}
+                    for line, error in chunk_errors[: MAX_REPORTED_IMPORT_ERRORS - len(errors)]
+                )
+                continue
+            new_ids: list[str] = []
+            for line, row, error in chunk:
+                if row is not None:
+                    key = row.pop(CONF_ID, None)
+                    if key is not None and key in specs:
+                        schedule = {
+                            field: row[field]
+                            for field in (CONF_DURATION_DAYS, CONF_START_DATE)
+                            if field in row
+                        }
+                        if _changes_schedule(specs[key], schedule):
+                            async_update_consumable(hass, key, schedule)
+                            updated += 1
+                        continue
+                    if key is not None and hass.config_entries.async_get_entry(key):
+                        error = f"consumable {key} is not loaded"
+                    elif hub is None:
+                        error = "no consumables hub to add new consumables to"
+                    elif CONF_NAME not in row or CONF_DURATION_DAYS not in row:
+                        error = "new consumables need name and duration_days"
+                    else:
+                        row.setdefault(CONF_START_DATE, today)
+                        row.setdefault(CONF_ICON, default_icon(row[CONF_NAME], row.get(CONF_ITEM_TYPE)))
+                        item_id = hub.async_add(row, item_id=key)
+                        specs[item_id] = ConsumableSpec.from_options(item_id, row, {})
+                        new_ids.append(item_id)
+                        created += 1
+                        continue
+                error_count += 1
+                if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                    errors.append({"line": line, "error": error})
+            if new_ids:
+                async_dispatcher_send(hass, SIGNAL_ITEMS_ADDED.format(hub.entry.entry_id), new_ids)
+    finally:
+        await hass.async_add_executor_job(reader.close)
+    _LOGGER.debug(
+        "Imported %s: %d created, %d updated, %d errors",
+        reader.path,
+        created,
+        updated,
+        error_count,
+    )
+    return {
+        "created": created,
+        "updated": updated,
+        "error_count": error_count,
+        "errors": errors,
+    }
+
+
+def _export_rows(hass: HomeAssistant) -> list[dict[str, Any]]:
+    """Return every consumable as a flat row including its due date."""
+    specs: dict[str, ConsumableSpec] = hass.data[DOMAIN]["specs"]
+    sources: list[tuple[str, Any, Any]] = []
+    hub = get_hub(hass)
+    if hub is not None:
+        sources.extend((item_id, item, item) for item_id, item in hub.items.items())
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if not is_hub_entry(entry):
+            sources.append((entry.entry_id, entry.data, entry.options))
+    rows = []
+    for key, info, options in sources:
+        spec = specs.get(key) or ConsumableSpec.from_entry(key, options, info)
+        rows.append(
+            {
+                CONF_ID: key,
+                CONF_NAME: info.get(CONF_NAME),
+                CONF_ITEM_TYPE: info.get(CONF_ITEM_TYPE),
+                CONF_ICON: info.get(CONF_ICON),
+                CONF_DURATION_DAYS: spec.duration,
+                CONF_START_DATE: spec.start_date.isoformat() if spec.start_date else None,
+                CONF_DUE_DATE: spec.due_date.isoformat() if spec.valid else None,
+            }
+        )
+    return rows
 
 
 def _register_services(hass: HomeAssistant) -> None:
-    if getattr(hass.data[DOMAIN], "services_registered", False):
+    if hass.data[DOMAIN].get("services_registered"):
         return
 
     import voluptuous as vol
     import homeassistant.helpers.config_validation as cv
 
-    async def _resolve_entry_from_entity(hass: HomeAssistant, entity_id: str):
-        _LOGGER.debug("Resolving config entry for entity %s", entity_id)
-        emap: dict[str, str] = hass.data[DOMAIN]["entity_map"]
-        entry_id = emap.get(entity_id)
-        if entry_id:
-            _LOGGER.debug("Found entry %s in entity map for %s", entry_id, entity_id)
-        if not entry_id:
-            # Fallback: look up via entity registry to get config entry id
-            _LOGGER.debug("Entity %s not found in map; checking entity registry", entity_id)
-            ent_reg = er.async_get(hass)
-            ent = ent_reg.async_get(entity_id)
-            if ent:
-                entry_id = ent.config_entry_id
-                _LOGGER.debug("Resolved entry %s via entity registry for %s", entry_id, entity_id)
-        if not entry_id:
-            _LOGGER.debug("Could not resolve config entry for %s", entity_id)
-            raise vol.Invalid(f"Could not resolve config entry for {entity_id}")
-        return hass.config_entries.async_get_entry(entry_id)
-
-    set_start_date_schema = vol.Schema(
+    set_start_date_schema = cv.make_entity_service_schema(
+        {vol.Required("start_date"): cv.date}
+    )
+    set_expiry_date_schema = cv.make_entity_service_schema(
+        {vol.Required("expiry_date"): cv.date}
+    )
+    set_duration_schema = cv.make_entity_service_schema(
+        {vol.Required("duration_days"): vol.All(vol.Coerce(int), vol.Range(min=1))}
+    )
+    def _thresholds(value: Any) -> list[int]:
+        try:
+            return list(parse_thresholds(value))
+        except (TypeError, ValueError) as err:
+            raise vol.Invalid(f"Invalid thresholds: {value}") from err
+
+    set_thresholds_schema = cv.make_entity_service_schema(
+        {vol.Optional(CONF_THRESHOLDS): _thresholds}
+    )
+    mark_replaced_schema = cv.make_entity_service_schema({})
+    remove_consumable_schema = cv.make_entity_service_schema({})
+    add_consumable_schema = vol.Schema(
         {
-            vol.Required("entity_id"): cv.entity_id,
-            vol.Required("start_date"): cv.date,
+            vol.Required(CONF_NAME): cv.string,
+            vol.Optional(CONF_ITEM_TYPE): cv.string,
+            vol.Optional(CONF_ICON): cv.icon,
+            vol.Optional(CONF_DURATION_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(CONF_START_DATE): cv.date,
+            vol.Optional(CONF_USAGE_ENTITY): cv.entity_id,
+            vol.Optional(CONF_USAGE_MODE): vol.In(USAGE_MODES),
+            vol.Optional(CONF_USAGE_LIMIT): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+            vol.Optional(CONF_THRESHOLDS): _thresholds,
+            vol.Optional(CONF_PARENT_DEVICE): cv.string,
+            vol.Optional(CONF_AREA): cv.string,
         }
     )
-    set_expiry_date_schema = vol.Schema(
+    migrate_to_hub_schema = vol.Schema({})
+    history_schema = cv.make_entity_service_schema(
+        {vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=1))}
+    )
+    digest_schema = vol.Schema(
+        {vol.Optional("days"): vol.All(vol.Coerce(int), vol.Range(min=0))}
+    )
+    query_schema = vol.Schema(
         {
-            vol.Required("entity_id"): cv.entity_id,
-            vol.Required("expiry_date"): cv.date,
+            vol.Optional("start_date"): cv.date,
+            vol.Optional("end_date"): cv.date,
+            vol.Optional(CONF_ITEM_TYPE): cv.string,
+            vol.Optional("period"): vol.In(PERIODS),
+            vol.Optional("horizon_months"): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_HORIZON_MONTHS)),
         }
     )
-    set_duration_schema = vol.Schema(
+    import_schema = vol.Schema(
         {
-            vol.Required("entity_id"): cv.entity_id,
-            vol.Required("duration_days"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Required("file_path"): cv.string,
+            vol.Optional("format"): vol.In(FORMATS),
+            vol.Optional("headless", default=False): cv.boolean,
         }
     )
-    mark_replaced_schema = vol.Schema({vol.Required("entity_id"): cv.entity_id})
+    track_items_schema = vol.Schema(
+        {vol.Required("items"): vol.All(cv.ensure_list, [dict])}
+    )
+    untrack_items_schema = vol.Schema(
+        {vol.Required("ids"): vol.All(cv.ensure_list, [cv.string])}
+    )
+    export_schema = vol.Schema(
+        {
+            vol.Optional("file_path"): cv.string,
+            vol.Optional("format"): vol.In(FORMATS),
+        }
+    )
+
+    def _config_path(file_path: str):
+        try:
+            return resolve_config_path(hass.config.config_dir, file_path)
+        except ValueError as err:
+            raise vol.Invalid(str(err)) from err
+
+    def _require_hub() -> ConsumableCollection:
+        hub = get_hub(hass)
+        if hub is None:
+            raise vol.Invalid("No consumables hub is configured")
+        return hub
+
+    def _require_headless() -> HeadlessStore:
+        headless = get_headless(hass)
+        if headless is None:
+            raise vol.Invalid("No consumables hub is configured")
+        return headless
+
+    def _resolve_targets(call: ServiceCall) -> tuple[dict[str, str], dict[str, Any]]:
+        """Map each selected consumable key to the entity that selected it.
+
+        Targets may be entities, devices, areas or labels. A consumable
+        selected through several of its entities appears once. Explicitly
+        referenced entities that are not consumables are returned as errors.
+        """
+        selected = async_extract_referenced_entity_ids(hass, call)
+        referenced = selected.referenced
+        # Explicit targets first, then sensors so results are keyed by them
+        ordered = sorted(
+            referenced | selected.indirectly_referenced,
+            key=lambda eid: (eid not in referenced, not eid.startswith("sensor."), eid),
+        )
+        targets: dict[str, str] = {}
+        errors: dict[str, Any] = {}
+        for entity_id in ordered:
+            key = _resolve_key(hass, entity_id)
+            if key is None:
+                if entity_id in referenced:
+                    errors[entity_id] = {"error": "not a consumable"}
+                continue
+            targets.setdefault(key, entity_id)
+        if not targets:
+            names = ", ".join(sorted(referenced)) or "the selected targets"
+            raise vol.Invalid(f"Could not resolve config entry for {names}")
+        return targets, errors
 
-    async def handle_set_start(call: ServiceCall):
-        entity_id = call.data["entity_id"]
+    async def _async_update_targets(
+        call: ServiceCall,
+        build_updates: Callable[[ConsumableSpec], dict[str, Any]],
+        replaced: bool = False,
+    ) -> ServiceResponse:
+        """Apply ``build_updates`` to every consumable selected by ``call``.
+
+        Config entry and hub stores both save on a delay, so a batch of
+        updates reaches disk as one write.
+        """
+        targets, results = _resolve_targets(call)
+        for key, entity_id in targets.items():
+            spec = current_spec(hass, key)
+            if spec is None:
+                results[entity_id] = {"error": "not a consumable"}
+                continue
+            try:
+                updates = build_updates(spec)
+            except vol.Invalid as err:
+                _LOGGER.debug("Skipping %s: %s", entity_id, err)
+                results[entity_id] = {"id": key, "error": str(err)}
+                continue
+            spec = async_update_consumable(hass, key, updates, replaced)
+            results[entity_id] = {
+                "id": key,
+                "start_date": spec.start_date.isoformat() if spec.valid else None,
+                "duration_days": spec.duration,
+                "due_date": spec.due_date.isoformat() if spec.valid else None,
+            }
+        return {"results": results} if call.return_response else None
+
+    async def handle_set_start(call: ServiceCall) -> ServiceResponse:
         new_date: dt.date = call.data["start_date"]
-        _LOGGER.debug("Service set_start_date called for %s with %s", entity_id, new_date)
-        entry = await _resolve_entry_from_entity(hass, entity_id)
-        if not entry:
-            return
-        options = merge_entry_options(entry, **{CONF_START_DATE: new_date.isoformat()})
-        _LOGGER.debug("Updating entry %s options to %s", entry.entry_id, options)
-        hass.config_entries.async_update_entry(entry, options=options)
-
-    async def handle_set_expiry(call: ServiceCall):
-        entity_id = call.data["entity_id"]
-        new_expiry: dt.date = call.data["expiry_date"]
-        _LOGGER.debug("Service set_expiry_date called for %s with %s", entity_id, new_expiry)
-        entry = await _resolve_entry_from_entity(hass, entity_id)
-        if not entry:
-            return
-        duration = entry.options.get(CONF_DURATION_DAYS) or entry.data.get(CONF_DURATION_DAYS)
-        if not duration:
-            _LOGGER.debug("Duration missing for %s", entity_id)
-            raise vol.Invalid("Duration not configured")
-        start_date = new_expiry - dt.timedelta(days=duration)
-        options = merge_entry_options(entry, **{CONF_START_DATE: start_date.isoformat()})
-        _LOGGER.debug(
-            "Updating entry %s options to %s for expiry", entry.entry_id, options
+        _LOGGER.debug("Service set_start_date called with %s", new_date)
+        return await _async_update_targets(
+            call, lambda spec: {CONF_START_DATE: new_date.isoformat()}
         )
-        hass.config_entries.async_update_entry(entry, options=options)
 
-    async def handle_set_duration(call: ServiceCall):
-        entity_id = call.data["entity_id"]
+    async def handle_set_expiry(call: ServiceCall) -> ServiceResponse:
+        new_expiry: dt.date = call.data["expiry_date"]
+        _LOGGER.debug("Service set_expiry_date called with %s", new_expiry)
+
+        def _updates(spec: ConsumableSpec) -> dict[str, Any]:
+            if not spec.duration:
+                raise vol.Invalid("Duration not configured")
+            start_date = new_expiry - dt.timedelta(days=spec.duration)
+            return {CONF_START_DATE: start_date.isoformat()}
+
+        return await _async_update_targets(call, _updates)
+
+    async def handle_set_duration(call: ServiceCall) -> ServiceResponse:
         days: int = call.data["duration_days"]
-        _LOGGER.debug("Service set_duration called for %s with %s", entity_id, days)
-        entry = await _resolve_entry_from_entity(hass, entity_id)
-        if not entry:
-            return
-        options = merge_entry_options(entry, **{CONF_DURATION_DAYS: days})
-        _LOGGER.debug("Updating entry %s options to %s", entry.entry_id, options)
-        hass.config_entries.async_update_entry(entry, options=options)
-
-    async def handle_mark_replaced(call: ServiceCall):
-        entity_id = call.data["entity_id"]
-        _LOGGER.debug("Service mark_replaced called for %s", entity_id)
-        entry = await _resolve_entry_from_entity(hass, entity_id)
-        if not entry:
-            return
+        _LOGGER.debug("Service set_duration called with %s", days)
+        return await _async_update_targets(call, lambda spec: {CONF_DURATION_DAYS: days})
+
+    async def handle_set_thresholds(call: ServiceCall) -> ServiceResponse:
+        # Omitting thresholds goes back to the hub's lead times
+        thresholds = call.data.get(CONF_THRESHOLDS)
+        _LOGGER.debug("Service set_thresholds called with %s", thresholds)
+        return await _async_update_targets(call, lambda spec: {CONF_THRESHOLDS: thresholds})
+
+    async def handle_mark_replaced(call: ServiceCall) -> ServiceResponse:
         today = dt.date.today().isoformat()
-        options = merge_entry_options(entry, **{CONF_START_DATE: today})
-        _LOGGER.debug("Updating entry %s options to %s", entry.entry_id, options)
-        hass.config_entries.async_update_entry(entry, options=options)
+        _LOGGER.debug("Service mark_replaced called")
+        return await _async_update_targets(
+            call, lambda spec: {CONF_START_DATE: today}, replaced=True
+        )
 
-    hass.services.async_register(
-        DOMAIN, "set_start_date", handle_set_start, schema=set_start_date_schema
-    )
-    hass.services.async_register(
-        DOMAIN, "set_duration", handle_set_duration, schema=set_duration_schema
-    )
-    hass.services.async_register(
-        DOMAIN, "set_expiry_date", handle_set_expiry, schema=set_expiry_date_schema
-    )
-    hass.services.async_register(
-        DOMAIN, "mark_replaced", handle_mark_replaced, schema=mark_replaced_schema
-    )
+    async def handle_history(call: ServiceCall) -> ServiceResponse:
+        journal = get_journal(hass)
+        targets, results = _resolve_targets(call)
+        limit: int | None = call.data.get("limit")
+        for key, entity_id in targets.items():
+            results[entity_id] = {"id": key, **await journal.async_history(key, limit)}
+        return {"history": results}
+
+    async def handle_digest(call: ServiceCall) -> ServiceResponse:
+        hub = get_hub(hass)
+        days = call.data.get("days")
+        if days is None:
+            days = hub.entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS) if hub else DEFAULT_SOON_DAYS
+        return async_build_digest(hass, dt_util.now().date().toordinal(), int(days))
+
+    async def handle_query(call: ServiceCall) -> ServiceResponse:
+        today: dt.date = dt_util.now().date()
+        start_date: dt.date = call.data.get("start_date", today)
+        end_date: dt.date = call.data.get("end_date", start_date + dt.timedelta(days=30))
+        if end_date < start_date:
+            raise vol.Invalid("end_date must not be before start_date")
+        item_type = call.data.get(CONF_ITEM_TYPE)
+        specs = hass.data[DOMAIN]["specs"]
+        headless = get_headless(hass)
+        due: list[dict[str, Any]] = []
+        for due_ord, key in specs.due_index.between(start_date.toordinal(), end_date.toordinal() + 1):
+            key_type = consumable_item_type(hass, key)
+            if item_type is not None and key_type != item_type:
+                continue
+            due.append(
+                {
+                    "id": key,
+                    "name": consumable_name(hass, key),
+                    "item_type": key_type,
+                    "due_date": dt.date.fromordinal(due_ord).isoformat(),
+                }
+            )
+        if headless is not None:
+            due.extend(
+                {
+                    "id": key,
+                    "name": None,
+                    "item_type": key_type,
+                    "due_date": dt.date.fromordinal(due_ord).isoformat(),
+                    "headless": True,
+                }
+                for due_ord, key, key_type in headless.due_between(
+                    start_date.toordinal(), end_date.toordinal() + 1, item_type
+                )
+            )
+            # Both lists are sorted by due date and the sort is stable
+            due.sort(key=lambda row: row["due_date"])
+        response: dict[str, Any] = {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "due": due,
+        }
+        months = call.data.get("horizon_months", 12)
+        if months:
+            columns = ScheduleColumns.from_specs(
+                specs, partial(consumable_item_type, hass), item_type
+            )
+            if headless is not None:
+                headless.add_columns(columns, item_type)
+            response["forecast"] = forecast_by_type(
+                columns,
+                today.toordinal(),
+                add_months(today, months).toordinal(),
+                call.data.get("period", PERIOD_MONTH),
+            )
+        return response
+
+    async def handle_add_consumable(call: ServiceCall) -> ServiceResponse:
+        hub = _require_hub()
+        usage_entity = call.data.get(CONF_USAGE_ENTITY)
+        if usage_entity and CONF_USAGE_LIMIT not in call.data:
+            raise vol.Invalid("usage_limit is required with usage_entity")
+        if not usage_entity and CONF_DURATION_DAYS not in call.data:
+            raise vol.Invalid("duration_days is required without usage_entity")
+        name = call.data[CONF_NAME].strip()
+        item_type = call.data.get(CONF_ITEM_TYPE)
+        icon = call.data.get(CONF_ICON) or default_icon(name, item_type)
+        start_date: dt.date = call.data.get(CONF_START_DATE) or dt.date.today()
+        values = {
+            CONF_NAME: name,
+            CONF_ITEM_TYPE: item_type,
+            CONF_ICON: icon,
+            CONF_DURATION_DAYS: call.data.get(CONF_DURATION_DAYS),
+            CONF_START_DATE: start_date.isoformat(),
+        }
+        if usage_entity:
+            values[CONF_USAGE_ENTITY] = usage_entity
+            values[CONF_USAGE_MODE] = call.data.get(CONF_USAGE_MODE)
+            values[CONF_USAGE_LIMIT] = call.data[CONF_USAGE_LIMIT]
+        for field in (CONF_THRESHOLDS, CONF_PARENT_DEVICE, CONF_AREA):
+            if field in call.data:
+                values[field] = call.data[field]
+        item_id = hub.async_add(values)
+        hass.data[DOMAIN]["specs"][item_id] = ConsumableSpec.from_options(item_id, values, {})
+        _LOGGER.debug("Added consumable %s (%s) to hub", item_id, name)
+        async_dispatcher_send(hass, SIGNAL_ITEMS_ADDED.format(hub.entry.entry_id), [item_id])
+        return {"id": item_id} if call.return_response else None
+
+    async def handle_remove_consumable(call: ServiceCall) -> ServiceResponse:
+        targets, results = _resolve_targets(call)
+        hub = get_hub(hass)
+        journal = get_journal(hass)
+        usage = get_usage(hass)
+        ent_reg = er.async_get(hass)
+        dev_reg = dr.async_get(hass)
+        index = get_index(hass)
+        hub_keys = [key for key in targets if hub is not None and key in hub.items]
+        for key in hub_keys:
+            # Removing the registry entries also removes the live entities
+            for platform, suffix in CONSUMABLE_ENTITIES:
+                unique_id = f"{key}{suffix}"
+                entity_id = index.entity_id_for(unique_id) or ent_reg.async_get_entity_id(
+                    platform, DOMAIN, unique_id
+                )
+                if entity_id and ent_reg.async_get(entity_id):
+                    ent_reg.async_remove(entity_id)
+            # Entities normally leave the index as they are removed; drop any stragglers
+            index.remove_key(key)
+            device = dev_reg.async_get_device(identifiers={(DOMAIN, key)})
+            if device:
+                dev_reg.async_remove_device(device.id)
+            hass.data[DOMAIN]["specs"].pop(key, None)
+            if journal is not None:
+                journal.async_record(key, HISTORY_REMOVED)
+            if usage is not None:
+                usage.async_remove(key)
+            results[targets[key]] = {"id": key, "removed": True}
+        if hub_keys:
+            hub.async_remove(hub_keys)
+        for key, entity_id in targets.items():
+            if key in hub_keys:
+                continue
+            entry = hass.config_entries.async_get_entry(key)
+            if entry is None:
+                results[entity_id] = {"error": "not a consumable"}
+                continue
+            await hass.config_entries.async_remove(key)
+            results[entity_id] = {"id": key, "removed": True}
+        return {"results": results} if call.return_response else None
+
+    async def handle_migrate_to_hub(call: ServiceCall) -> ServiceResponse:
+        hub = _require_hub()
+        migrated = await _async_migrate_to_hub(hass, hub)
+        _LOGGER.debug("Migrated %d consumables into the hub", len(migrated))
+        return {"migrated": migrated} if call.return_response else None
+
+    async def handle_import(call: ServiceCall) -> ServiceResponse:
+        path = _config_path(call.data["file_path"])
+        if not await hass.async_add_executor_job(path.is_file):
+            raise vol.Invalid(f"File {call.data['file_path']} does not exist")
+        headless = _require_headless() if call.data.get("headless") else None
+        reader = RowReader(path, detect_format(path, call.data.get("format")))
+        result = await _async_import_rows(hass, reader, headless)
+        return result if call.return_response else None
+
+    async def handle_track_items(call: ServiceCall) -> ServiceResponse:
+        headless = _require_headless()
+        rows: list[tuple[int, dict[str, Any] | None, str | None]] = []
+        for index, raw in enumerate(call.data["items"]):
+            try:
+                rows.append((index, validate_row(raw), None))
+            except ValueError as err:
+                rows.append((index, None, str(err)))
+        created, updated, errors = _async_track_headless(hass, headless, rows)
+        _LOGGER.debug("Tracked headless items: %d created, %d updated", created, updated)
+        if not call.return_response:
+            return None
+        return {
+            "created": created,
+            "updated": updated,
+            "errors": [{"index": index, "error": error} for index, error in errors],
+        }
+
+    async def handle_untrack_items(call: ServiceCall) -> ServiceResponse:
+        removed = _require_headless().async_untrack(call.data["ids"])
+        return {"removed": removed} if call.return_response else None
+
+    async def handle_export(call: ServiceCall) -> ServiceResponse:
+        rows = _export_rows(hass)
+        if "file_path" not in call.data:
+            if not call.return_response:
+                raise vol.Invalid("Provide file_path or call export with a response")
+            return {"consumables": rows}
+        path = _config_path(call.data["file_path"])
+        fmt = detect_format(path, call.data.get("format"))
+        count = await hass.async_add_executor_job(write_rows, path, fmt, rows)
+        _LOGGER.debug("Exported %d consumables to %s", count, path)
+        return {"file_path": str(path), "count": count} if call.return_response else None
+
+    metrics = get_metrics(hass)
+
+    def _timed(name: str, handler: Callable) -> Callable:
+        async def _async_handle(call: ServiceCall) -> ServiceResponse:
+            start = metrics.start()
+            try:
+                return await handler(call)
+            finally:
+                metrics.observe(f"service.{name}", start)
+
+        return _async_handle
+
+    for name, handler, schema in (
+        ("set_start_date", handle_set_start, set_start_date_schema),
+        ("set_duration", handle_set_duration, set_duration_schema),
+        ("set_expiry_date", handle_set_expiry, set_expiry_date_schema),
+        ("set_thresholds", handle_set_thresholds, set_thresholds_schema),
+        ("mark_replaced", handle_mark_replaced, mark_replaced_schema),
+        ("add_consumable", handle_add_consumable, add_consumable_schema),
+        ("remove_consumable", handle_remove_consumable, remove_consumable_schema),
+        ("migrate_to_hub", handle_migrate_to_hub, migrate_to_hub_schema),
+        ("import", handle_import, import_schema),
+        ("export", handle_export, export_schema),
+        ("track_items", handle_track_items, track_items_schema),
+        ("untrack_items", handle_untrack_items, untrack_items_schema),
+    ):
+        hass.services.async_register(
+            DOMAIN,
+            name,
+            _timed(name, handler),
+            schema=schema,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    for name, handler, schema in (
+        ("history", handle_history, history_schema),
+        ("digest", handle_digest, digest_schema),
+        ("query", handle_query, query_schema),
+    ):
+        hass.services.async_register(
+            DOMAIN,
+            name,
+            _timed(name, handler),
+            schema=schema,
+            supports_response=SupportsResponse.ONLY,
+        )
     hass.data[DOMAIN]["services_registered"] = True
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from typing import Callable
+
+from homeassistant.const import Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SENSOR_UNIQUE_ID_SUFFIX
+from .due_index import DueIndex, IndexedSpecs
+from .index import EntityIndex
+from .scheduler import ExpiryScheduler, local_midnight
+from .spec import ConsumableSpec
+
+_LOGGER = logging.getLogger(__name__)
+
+# Group holding every consumable; the others are "area:<id>" and "label:<id>"
+ALL = ""
+
+PENDING, ACTIVE, EXPIRED = range(3)
+
+# Scheduler key of the midnight refresh shared by every aggregate sensor
+MIDNIGHT_KEY = "aggregates_midnight"
+
+
+class PercentSums:
+    """Running sums that give a group's mean percent used on any day.
+
+    Consumables past their due date count as 100 and those not started yet
+    as 0. An active one contributes ``(today - start) / duration``, which
+    is linear in today, so only the sums of ``1 / duration`` and
+    ``start / duration`` over active consumables are kept.
+    """
+
+    __slots__ = ("count", "expired", "inv", "start_inv")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.expired = 0
+        self.inv = 0.0
+        self.start_inv = 0.0
+
+    def add(self, phase: int, start: int, duration: int, sign: int) -> None:
+        self.count += sign
+        if phase == EXPIRED:
+            self.expired += sign
+        elif phase == ACTIVE:
+            self.inv += sign / duration
+            self.start_inv += sign * start / duration
+
+    def mean(self, today: int) -> float | None:
+        if not self.count:
+            return None
+        active = today * self.inv - self.start_inv
+        return round(min(100.0, max(0.0, 100.0 * (self.expired + active) / self.count)), 1)
+
+
+class Aggregates:
+    """Overdue and due-soon counts, next due date and mean percent used.
+
+    Counts and the next due date are range queries on the due date index.
+    Percent used is kept per group in :class:`PercentSums`, and each group
+    is adjusted as its consumables change. When the day moves on, only
+    consumables whose start or due date was passed are revisited. Every
+    update and query therefore costs O(log N) plus the consumables that
+    actually changed.
+
+    While anything listens, one midnight transition on the shared expiry
+    timer advances the day and notifies every listener.
+    """
+
+    def __init__(
+        self, specs: IndexedSpecs, today_ord: int, scheduler: ExpiryScheduler | None = None
+    ) -> None:
+        self._due = specs.due_index
+        self._today = today_ord
+        # key -> (start ordinal, duration, due ordinal) of consumables with a schedule
+        self._items: dict[str, tuple[int, int, int]] = {}
+        self._starts = DueIndex()
+        self._groups: dict[str, tuple[str, ...]] = {}
+        self._sums: dict[str, PercentSums] = {ALL: PercentSums()}
+        self._scheduler = scheduler
+        # Called after every change; keep them cheap
+        self.listeners: list[Callable[[], None]] = []
+        # Called with the key of a consumable whose groups changed
+        self.group_observers: list[Callable[[str], None]] = []
+        for key, spec in specs.items():
+            self.async_set_spec(key, spec)
+        specs.observers.append(self.async_set_spec)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _phase(self, item: tuple[int, int, int]) -> int:
+        start, _duration, due = item
+        if self._today < start:
+            return PENDING
+        return EXPIRED if self._today >= due else ACTIVE
+
+    def _apply(self, key: str, item: tuple[int, int, int], sign: int) -> None:
+        phase = self._phase(item)
+        start, duration, _due = item
+        for group in (ALL, *self._groups.get(key, ())):
+            sums = self._sums.get(group)
+            if sums is None:
+                sums = self._sums[group] = PercentSums()
+            sums.add(phase, start, duration, sign)
+            if not sums.count and group != ALL:
+                del self._sums[group]
+
+    def _notify(self) -> None:
+        for listener in self.listeners:
+            listener()
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call ``listener`` after every change and at local midnight."""
+        self.listeners.append(listener)
+        if len(self.listeners) == 1:
+            self._schedule_midnight()
+
+        @callback
+        def _async_remove() -> None:
+            self.listeners.remove(listener)
+            if not self.listeners and self._scheduler is not None:
+                self._scheduler.async_cancel(MIDNIGHT_KEY)
+
+        return _async_remove
+
+    @callback
+    def _schedule_midnight(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.async_schedule(
+                MIDNIGHT_KEY, local_midnight(self._today + 1), self._handle_midnight
+            )
+
+    @callback
+    def _handle_midnight(self, now: dt.datetime) -> None:
+        self.advance(dt_util.as_local(now).date().toordinal())
+        self._schedule_midnight()
+        self._notify()
+
+    @callback
+    def async_set_spec(self, key: str, spec: ConsumableSpec | None) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._apply(key, old, -1)
+            self._starts.remove(key)
+        if spec is None:
+            self._groups.pop(key, None)
+        elif spec.valid:
+            item = self._items[key] = (spec.start_ord, spec.duration, spec.due_ord)
+            self._apply(key, item, 1)
+            self._starts.update(key, spec.start_ord)
+        self._notify()
+
+    def groups(self, key: str) -> tuple[str, ...]:
+        return self._groups.get(key, ())
+
+    @callback
+    def async_set_groups(self, key: str, groups: tuple[str, ...]) -> None:
+        if self._groups.get(key, ()) == groups:
+            return
+        item = self._items.get(key)
+        if item is not None:
+            self._apply(key, item, -1)
+        self._groups[key] = groups
+        if item is not None:
+            self._apply(key, item, 1)
+        for observer in self.group_observers:
+            observer(key)
+        self._notify()
+
+    def advance(self, today_ord: int) -> None:
+        """Move to ``today_ord``, revisiting only consumables that changed phase."""
+        if today_ord == self._today:
+            return
+        lo, hi = sorted((self._today, today_ord))
+        moved = {key for _start, key in self._starts.between(lo + 1, hi + 1)}
+        moved.update(key for _due, key in self._due.between(lo + 1, hi + 1))
+        items = [(key, self._items[key]) for key in moved if key in self._items]
+        for key, item in items:
+            self._apply(key, item, -1)
+        self._today = today_ord
+        for key, item in items:
+            self._apply(key, item, 1)
+
+    def overdue(self, today_ord: int) -> int:
+        return self._due.count(0, today_ord + 1)
+
+    def due_within(self, today_ord: int, days: int) -> int:
+        """Consumables not yet expired that expire within ``days`` days."""
+        return self._due.count(today_ord + 1, today_ord + days + 1)
+
+    def next_due(self, today_ord: int) -> tuple[int, list[str]] | None:
+        """Return the next due date after today and the consumables due then."""
+        due_ord = self._due.next_due(today_ord + 1)
+        if due_ord is None:
+            return None
+        return due_ord, [key for _due, key in self._due.between(due_ord, due_ord + 1)]
+
+    def percent_used(self, today_ord: int, group: str = ALL) -> float | None:
+        self.advance(today_ord)
+        sums = self._sums.get(group)
+        return sums.mean(today_ord) if sums else None
+
+    def percent_used_by(self, today_ord: int, kind: str) -> dict[str, float | None]:
+        """Mean percent used of every ``area`` or ``label`` group."""
+        self.advance(today_ord)
+        prefix = f"{kind}:"
+        return {
+            group[len(prefix):]: sums.mean(today_ord)
+            for group, sums in sorted(self._sums.items())
+            if group.startswith(prefix)
+        }
+
+
+@callback
+def async_groups_for(hass: HomeAssistant, key: str) -> tuple[str, ...]:
+    """Return the area and label groups of consumable ``key``.
+
+    The sensor's own area wins over its device's area; labels come from
+    the sensor.
+    """
+    ent_reg = er.async_get(hass)
+    entity_id = ent_reg.async_get_entity_id(Platform.SENSOR, DOMAIN, f"{key}{SENSOR_UNIQUE_ID_SUFFIX}")
+    ent = ent_reg.async_get(entity_id) if entity_id else None
+    if ent is None:
+        return ()
+    area_id = ent.area_id
+    if area_id is None and ent.device_id:
+        device = dr.async_get(hass).async_get(ent.device_id)
+        area_id = device.area_id if device else None
+    groups = [f"area:{area_id}"] if area_id else []
+    groups.extend(f"label:{label}" for label in sorted(ent.labels))
+    return tuple(groups)
+
+
+@callback
+def async_track_groups(
+    hass: HomeAssistant, aggregates: Aggregates, index: EntityIndex
+) -> Callable[[], None]:
+    """Regroup consumables whose sensor or device moves to another area or label."""
+
+    @callback
+    def _async_entity_updated(event: Event) -> None:
+        data = event.data
+        if data["action"] != "update" or not {"area_id", "labels", "device_id"} & set(data.get("changes", {})):
+            return
+        key = index.key_for(data["entity_id"])
+        if key is not None:
+            aggregates.async_set_groups(key, async_groups_for(hass, key))
+
+    @callback
+    def _async_device_updated(event: Event) -> None:
+        data = event.data
+        if data["action"] != "update" or "area_id" not in data.get("changes", {}):
+            return
+        # A shared or appliance device can hold many consumables
+        keys = {
+            index.key_for(ent.entity_id)
+            for ent in er.async_entries_for_device(er.async_get(hass), data["device_id"])
+        }
+        keys.discard(None)
+        for key in keys:
+            aggregates.async_set_groups(key, async_groups_for(hass, key))
+
+    unsubs = [
+        hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _async_entity_updated),
+        hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, _async_device_updated),
+    ]
+
+    @callback
+    def _async_unsub() -> None:
+        for unsub in unsubs:
+            unsub()
+
+    return _async_unsub
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Mapping
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_NAME,
+    CONF_SOON_DAYS,
+    DEFAULT_SOON_DAYS,
+    SIGNAL_SPEC_UPDATED,
+    SIGNAL_USAGE_UPDATED,
+    EXPIRED_UNIQUE_ID_SUFFIX,
+    DUE_SOON_UNIQUE_ID_SUFFIX,
+)
+from .runtime import async_add_consumable_entities, get_devices, get_index, get_usage
+from .scheduler import ExpiryScheduler, local_midnight
+from .spec import ConsumableSpec
+from .usage import is_usage_consumable, usage_limit
+
+_LOGGER = logging.getLogger(__name__)
+
+PARALLEL_UPDATES = 0
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    async_add_consumable_entities(
+        hass,
+        entry,
+        async_add_entities,
+        lambda key, info: ExpiredBinarySensor(hass, entry, key, info),
+    )
+    async_add_consumable_entities(
+        hass,
+        entry,
+        async_add_entities,
+        lambda key, info: DueSoonBinarySensor(hass, entry, key, info),
+    )
+
+
+class ConsumableBinarySensor(BinarySensorEntity, ABC):
+    """On/off view of a consumable's schedule that flips at local midnight.
+
+    The state only changes on the days the schedule crosses a boundary, so
+    each entity keeps exactly one pending transition on the shared expiry
+    timer, at the start of the day it next flips, and nothing when it
+    never will again. It never polls.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _unique_id_suffix: str
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, key: str, info: Mapping[str, Any]) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._key = key
+        self._info = info
+        self._attr_unique_id = f"{key}{self._unique_id_suffix}"
+        self._attr_device_info, shared = get_devices(hass).consumable(entry, key, info)
+        if shared:
+            self._attr_translation_key = f"{self._attr_translation_key}_named"
+            self._attr_translation_placeholders = {"consumable": info.get(CONF_NAME) or "Consumable"}
+        self._today_ord: int | None = None
+        # State last handed to Home Assistant
+        self._published: bool | None = None
+
+    async def async_added_to_hass(self) -> None:
+        get_index(self.hass).add(self.entity_id, self._key, self.unique_id, self.entry.entry_id)
+        self._today_ord = dt_util.now().date().toordinal()
+        self._schedule_next_transition()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SPEC_UPDATED.format(self._key),
+                self._handle_spec_update,
+            )
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._scheduler.async_cancel(self._attr_unique_id)
+        get_index(self.hass).remove(self.entity_id)
+
+    @property
+    def _scheduler(self) -> ExpiryScheduler:
+        return self.hass.data[DOMAIN]["scheduler"]
+
+    @property
+    def _spec(self) -> ConsumableSpec:
+        return self.hass.data[DOMAIN]["specs"][self._key]
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._published = self.is_on
+        super().async_write_ha_state()
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        # Most schedule and usage changes leave the state as it was
+        if self._published is not None and self.is_on == self._published:
+            return
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_transition(self, now: dt.datetime) -> None:
+        self._today_ord = dt_util.as_local(now).date().toordinal()
+        self._async_write_if_changed()
+        self._schedule_next_transition()
+
+    @callback
+    def _handle_spec_update(self) -> None:
+        self._today_ord = dt_util.now().date().toordinal()
+        self._async_write_if_changed()
+        self._schedule_next_transition()
+
+    @callback
+    def _schedule_next_transition(self) -> None:
+        spec = self._spec
+        day = self._next_transition(spec, self._today_ord) if spec.valid else None
+        if day is None:
+            self._scheduler.async_cancel(self._attr_unique_id)
+            return
+        self._scheduler.async_schedule(self._attr_unique_id, local_midnight(day), self._handle_transition)
+
+    @property
+    def is_on(self) -> bool | None:
+        spec = self._spec
+        if not spec.valid:
+            return None
+        if self._today_ord is None:
+            self._today_ord = dt_util.now().date().toordinal()
+        return self._is_on(spec, self._today_ord)
+
+    @abstractmethod
+    def _is_on(self, spec: ConsumableSpec, today_ord: int) -> bool:
+        """Return the state of a valid ``spec`` on ``today_ord``."""
+
+    @abstractmethod
+    def _next_transition(self, spec: ConsumableSpec, today_ord: int) -> int | None:
+        """Return the day ordinal of the next flip after ``today_ord``, if any."""
+
+
+class ExpiredBinarySensor(ConsumableBinarySensor):
+    """On from the due date on, or once a usage-based consumable is used up."""
+
+    _attr_translation_key = "expired"
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_icon = "mdi:calendar-remove"
+    _unique_id_suffix = EXPIRED_UNIQUE_ID_SUFFIX
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if is_usage_consumable(self._info):
+            # Usage wears a consumable out between midnights
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    SIGNAL_USAGE_UPDATED.format(self._key),
+                    self._async_write_if_changed,
+                )
+            )
+
+    @property
+    def is_on(self) -> bool | None:
+        if is_usage_consumable(self._info):
+            limit = usage_limit(self._info)
+            if limit and get_usage(self.hass).usage(self._key) >= limit:
+                return True
+            if not self._spec.valid:
+                return False
+        return super().is_on
+
+    def _is_on(self, spec: ConsumableSpec, today_ord: int) -> bool:
+        return today_ord >= spec.due_ord
+
+    def _next_transition(self, spec: ConsumableSpec, today_ord: int) -> int | None:
+        return spec.due_ord if today_ord < spec.due_ord else None
+
+
+class DueSoonBinarySensor(ConsumableBinarySensor):
+    """On during the hub's "due soon" window before the due date.
+
+    The window is the ``soon_days`` option of the entry, as on the hub's
+    due soon count. It turns off again on the due date, when the expired
+    sensor turns on.
+    """
+
+    _attr_translation_key = "due_soon"
+    _attr_icon = "mdi:calendar-clock"
+    _unique_id_suffix = DUE_SOON_UNIQUE_ID_SUFFIX
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, key: str, info: Mapping[str, Any]) -> None:
+        super().__init__(hass, entry, key, info)
+        # A reload follows any change of the window
+        self._days = int(entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS))
+
+    def _is_on(self, spec: ConsumableSpec, today_ord: int) -> bool:
+        return spec.due_ord - self._days <= today_ord < spec.due_ord
+
+    def _next_transition(self, spec: ConsumableSpec, today_ord: int) -> int | None:
+        for day in (spec.due_ord - self._days, spec.due_ord):
+            if today_ord < day:
+                return day
+        return None
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import json
+from pathlib import Path
+from typing import Any, IO, Iterable, Iterator, Mapping
+
+from .const import (
+    CONF_NAME,
+    CONF_ITEM_TYPE,
+    CONF_ICON,
+    CONF_DURATION_DAYS,
+    CONF_START_DATE,
+)
+from .spec import coerce_duration, parse_start_date
+
+# Blocking helpers for the import and export services. Everything here runs
+# in an executor job; nothing touches Home Assistant state.
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+CONF_ID = "id"
+CONF_DUE_DATE = "due_date"
+EXPORT_FIELDS = (
+    CONF_ID,
+    CONF_NAME,
+    CONF_ITEM_TYPE,
+    CONF_ICON,
+    CONF_DURATION_DAYS,
+    CONF_START_DATE,
+    CONF_DUE_DATE,
+)
+
+# Rows parsed per executor job
+IMPORT_CHUNK_SIZE = 1000
+
+
+def detect_format(path: Path, fmt: str | None = None) -> str:
+    if fmt:
+        return fmt
+    return FORMAT_CSV if path.suffix.lower() == ".csv" else FORMAT_JSONL
+
+
+def resolve_config_path(config_dir: str, file_path: str) -> Path:
+    """Return ``file_path`` resolved inside ``config_dir`` or raise ValueError."""
+    base = Path(config_dir).resolve()
+    path = (base / file_path).resolve()
+    if base != path and base not in path.parents:
+        raise ValueError(f"{file_path} is outside the configuration directory")
+    return path
+
+
+def validate_row(raw: Mapping[str, Any]) -> dict[str, Any]:
+    """Normalize one imported row, raising ValueError when it is unusable.
+
+    Only columns present in the row are returned so an update can touch a
+    subset of fields. A due date is turned into a start date when the row
+    has a duration but no start date.
+    """
+    row: dict[str, Any] = {}
+    for field in (CONF_ID, CONF_NAME, CONF_ITEM_TYPE, CONF_ICON):
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ""):
+            row[field] = str(value)
+
+    raw_duration = raw.get(CONF_DURATION_DAYS)
+    if raw_duration not in (None, ""):
+        duration = coerce_duration(raw_duration)
+        if duration is None or duration < 1:
+            raise ValueError(f"invalid duration_days {raw_duration!r}")
+        row[CONF_DURATION_DAYS] = duration
+
+    for field in (CONF_START_DATE, CONF_DUE_DATE):
+        value = raw.get(field)
+        if value in (None, ""):
+            continue
+        date = parse_start_date(value)
+        if date is None:
+            raise ValueError(f"invalid {field} {value!r}")
+        row[field] = date
+
+    due = row.pop(CONF_DUE_DATE, None)
+    if CONF_START_DATE not in row and due is not None:
+        if CONF_DURATION_DAYS not in row:
+            raise ValueError("due_date needs duration_days")
+        row[CONF_START_DATE] = due - dt.timedelta(days=row[CONF_DURATION_DAYS])
+    if CONF_START_DATE in row:
+        row[CONF_START_DATE] = row[CONF_START_DATE].isoformat()
+    if not row:
+        raise ValueError("empty row")
+    return row
+
+
+def _undecodable(text: str) -> bool:
+    """Whether ``text`` holds bytes that were not valid UTF-8."""
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+class ImportRowError(Exception):
+    """A row of the import file that could not be read at all."""
+
+
+class RowReader:
+    """Stream validated rows from a CSV or JSON Lines file.
+
+    ``read_chunk`` blocks and is meant to be called from an executor; it
+    returns ``(line, row, error)`` tuples where exactly one of ``row`` and
+    ``error`` is set. An empty list means the file is exhausted.
+    """
+
+    def __init__(self, path: Path, fmt: str) -> None:
+        self.path = path
+        self.fmt = fmt
+        self._file: IO[str] | None = None
+        self._rows: Iterator[tuple[int, Any]] | None = None
+
+    def _iter_raw(self, handle: IO[str]) -> Iterator[tuple[int, Any]]:
+        # Broken rows are yielded as errors so the rows around them still count
+        if self.fmt == FORMAT_CSV:
+            reader = csv.DictReader(handle)
+            while True:
+                line_num = reader.line_num
+                try:
+                    raw = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as err:
+                    # The reader has consumed the bad line and carries on after it,
+                    # but does not count it in line_num
+                    yield line_num + 1, ImportRowError(f"invalid CSV: {err}")
+                    continue
+                if any(isinstance(value, str) and _undecodable(value) for value in raw.values()):
+                    yield reader.line_num, ImportRowError("invalid UTF-8")
+                    continue
+                yield reader.line_num, raw
+        for line_num, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            if _undecodable(line):
+                yield line_num, ImportRowError("invalid UTF-8")
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except ValueError as err:
+                yield line_num, ImportRowError(f"invalid JSON: {err}")
+
+    def read_chunk(self, size: int = IMPORT_CHUNK_SIZE) -> list[tuple[int, dict | None, str | None]]:
+        if self._rows is None:
+            # Undecodable bytes fail their own row instead of the whole file
+            self._file = open(self.path, encoding="utf-8", errors="surrogateescape", newline="")
+            self._rows = self._iter_raw(self._file)
+        chunk: list[tuple[int, dict | None, str | None]] = []
+        for line_num, raw in self._rows:
+            if isinstance(raw, ImportRowError):
+                chunk.append((line_num, None, str(raw)))
+            elif not isinstance(raw, Mapping):
+                chunk.append((line_num, None, "row is not an object"))
+            else:
+                try:
+                    chunk.append((line_num, validate_row(raw), None))
+                except ValueError as err:
+                    chunk.append((line_num, None, str(err)))
+            if len(chunk) >= size:
+                break
+        return chunk
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def write_rows(path: Path, fmt: str, rows: Iterable[Mapping[str, Any]]) -> int:
+    """Write export ``rows`` to ``path`` and return how many were written."""
+    count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as handle:
+        if fmt == FORMAT_CSV:
+            writer = csv.DictWriter(handle, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                handle.write(json.dumps(row, separators=(",", ":")))
+                handle.write("\n")
+                count += 1
+    tmp_path.replace(path)
+    return count
@@ -2,44 +2,52 @@
 from __future__ import annotations
 
 import datetime as dt
+from typing import Any, Mapping
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 import logging
 
-from .const import DOMAIN, CONF_NAME, CONF_START_DATE
-from .util import merge_entry_options
+from .const import CONF_NAME, CONF_START_DATE, BUTTON_UNIQUE_ID_SUFFIX
+from .runtime import async_add_consumable_entities, async_update_consumable, get_devices, get_index
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
-    async_add_entities([MarkReplacedButton(hass, entry)])
+    async_add_consumable_entities(
+        hass,
+        entry,
+        async_add_entities,
+        lambda key, info: MarkReplacedButton(hass, entry, key, info),
+    )
 
 
 class MarkReplacedButton(ButtonEntity):
     _attr_has_entity_name = True
     _attr_translation_key = "mark_replaced"
     _attr_state = "idle"
+    _attr_should_poll = False
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        key: str | None = None,
+        info: Mapping[str, Any] | None = None,
+    ) -> None:
         self.hass = hass
         self.entry = entry
-        self._attr_unique_id = f"{entry.entry_id}_mark_replaced"
-
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        name = self.entry.data.get(CONF_NAME, "Consumable")
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.entry.entry_id)},
-            name=name,
-            manufacturer="dfiore1230",
-            model="HA Expiring Consumables",
-        )
+        self._key = key or entry.entry_id
+        self._info = entry.data if info is None else info
+        self._attr_unique_id = f"{self._key}{BUTTON_UNIQUE_ID_SUFFIX}"
+        self._attr_device_info, shared = get_devices(hass).consumable(entry, self._key, self._info)
+        if shared:
+            self._attr_translation_key = "mark_replaced_named"
+            self._attr_translation_placeholders = {"consumable": self._info.get(CONF_NAME) or "Consumable"}
 
     @property
     def icon(self) -> str | None:
@@ -48,18 +56,21 @@ class MarkReplacedButton(ButtonEntity):
     async def async_added_to_hass(self) -> None:
         """Ensure the button starts in the idle state on startup."""
         await super().async_added_to_hass()
+        # Home Assistant writes the state once this returns
         self._attr_state = "idle"
-        _LOGGER.debug("MarkReplacedButton added for entry %s", self.entry.entry_id)
-        self.async_write_ha_state()
+        _LOGGER.debug("MarkReplacedButton added for %s", self._key)
+        get_index(self.hass).add(self.entity_id, self._key, self.unique_id, self.entry.entry_id)
+
+    async def async_will_remove_from_hass(self) -> None:
+        get_index(self.hass).remove(self.entity_id)
 
     async def async_press(self) -> None:
         today = dt.date.today().isoformat()
-        options = merge_entry_options(self.entry, **{CONF_START_DATE: today})
         _LOGGER.debug(
-            "MarkReplacedButton pressed for entry %s; updating start_date to %s",
-            self.entry.entry_id,
+            "MarkReplacedButton pressed for %s; updating start_date to %s",
+            self._key,
             today,
         )
-        self.hass.config_entries.async_update_entry(self.entry, options=options)
+        async_update_consumable(self.hass, self._key, {CONF_START_DATE: today}, replaced=True)
         self._attr_state = dt.datetime.now().isoformat()
         self.async_write_ha_state()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .due_index import DueIndex
+from .runtime import consumable_name, get_devices, is_hub_entry
+from .scheduler import ExpiryScheduler, local_midnight
+
+_LOGGER = logging.getLogger(__name__)
+
+PARALLEL_UPDATES = 0
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    if is_hub_entry(entry):
+        async_add_entities([ConsumableCalendar(hass, entry)])
+
+
+class ConsumableCalendar(CalendarEntity):
+    """All-day events on the due date of every loaded consumable.
+
+    Events come from the due date index, so a range query is a pair of
+    binary searches. The state only changes at local midnights, which are
+    scheduled on the shared expiry timer instead of polled.
+    """
+
+    _attr_has_entity_name = True
+    _attr_translation_key = "due_dates"
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_due_dates"
+        self._attr_device_info = get_devices(hass).hub(entry)
+        self._today_ord: int | None = None
+        self._refresh: asyncio.Handle | None = None
+
+    async def async_added_to_hass(self) -> None:
+        self._today_ord = dt_util.now().date().toordinal()
+        listeners = self._index.listeners
+        listeners.append(self._async_index_changed)
+        self.async_on_remove(lambda: listeners.remove(self._async_index_changed))
+        self._schedule_next_transition()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._scheduler.async_cancel(self._attr_unique_id)
+        if self._refresh is not None:
+            self._refresh.cancel()
+            self._refresh = None
+
+    @property
+    def icon(self) -> str | None:
+        return "mdi:calendar-clock"
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """The first consumable due today, or else the next one to come due."""
+        due_ord = self._index.next_due(self._today())
+        if due_ord is None:
+            return None
+        _due, key = self._index.between(due_ord, due_ord + 1)[0]
+        return self._event(due_ord, key)
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: dt.datetime, end_date: dt.datetime
+    ) -> list[CalendarEvent]:
+        start_ord = dt_util.as_local(start_date).date().toordinal()
+        end = dt_util.as_local(end_date)
+        # A day starting exactly at the end of the range is not part of it
+        end_ord = end.date().toordinal() + (end.time() != dt.time())
+        return [self._event(due_ord, key) for due_ord, key in self._index.between(start_ord, end_ord)]
+
+    @property
+    def _index(self) -> DueIndex:
+        return self.hass.data[DOMAIN]["specs"].due_index
+
+    @property
+    def _scheduler(self) -> ExpiryScheduler:
+        return self.hass.data[DOMAIN]["scheduler"]
+
+    def _today(self) -> int:
+        if self._today_ord is None:
+            self._today_ord = dt_util.now().date().toordinal()
+        return self._today_ord
+
+    def _event(self, due_ord: int, key: str) -> CalendarEvent:
+        due = dt.date.fromordinal(due_ord)
+        return CalendarEvent(
+            start=due,
+            end=due + dt.timedelta(days=1),
+            summary=f"Replace {consumable_name(self.hass, key)}",
+            uid=key,
+        )
+
+    @callback
+    def _async_index_changed(self) -> None:
+        # Imports and batch services move many due dates at once; refresh once
+        if self._refresh is None:
+            self._refresh = self.hass.loop.call_soon(self._async_refresh)
+
+    @callback
+    def _async_refresh(self) -> None:
+        self._refresh = None
+        self.async_write_ha_state()
+        self._schedule_next_transition()
+
+    @callback
+    def _handle_transition(self, now: dt.datetime) -> None:
+        self._today_ord = dt_util.as_local(now).date().toordinal()
+        self.async_write_ha_state()
+        self._schedule_next_transition()
+
+    @callback
+    def _schedule_next_transition(self) -> None:
+        today = self._today()
+        due_ord = self._index.next_due(today)
+        if due_ord is None:
+            self._scheduler.async_cancel(self._attr_unique_id)
+            return
+        # Today's event ends at the next midnight; a later one starts at its own
+        next_ord = today + 1 if due_ord == today else due_ord
+        self._scheduler.async_schedule(
+            self._attr_unique_id, local_midnight(next_ord), self._handle_transition
+        )
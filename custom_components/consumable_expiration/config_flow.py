@@ -14,20 +14,72 @@ from homeassistant.helpers import selector
 
 from .const import (
     DOMAIN,
+    CONFIG_ENTRY_VERSION,
     CONF_NAME,
     CONF_ITEM_TYPE,
     CONF_DURATION_DAYS,
     CONF_START_DATE,
     CONF_EXPIRY_DATE_OVERRIDE,
     CONF_ICON,
+    CONF_COMPACT_STATE,
+    CONF_COLLECT_METRICS,
+    CONF_DIGEST_TIME,
+    CONF_SOON_DAYS,
+    CONF_THRESHOLDS,
+    CONF_AREA,
+    CONF_DEVICE_GROUPING,
+    CONF_PARENT_DEVICE,
+    DEVICE_GROUPING_CONSUMABLE,
+    DEVICE_GROUPINGS,
+    DEFAULT_DIGEST_TIME,
+    DEFAULT_SOON_DAYS,
+    CONF_ENTRY_TYPE,
     DEFAULT_ICON_MAP,
+    ENTRY_TYPE_CONSUMABLE,
+    ENTRY_TYPE_HUB,
+    HUB_UNIQUE_ID,
 )
+from .spec import ConsumableSpec, parse_thresholds, schedule_options
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _current_schedule(entry: config_entries.ConfigEntry) -> tuple[dt.date, int]:
+    """Start date and duration of ``entry``, defaulting to today and 90 days."""
+    spec = ConsumableSpec.from_entry(entry.entry_id, entry.options, entry.data)
+    return spec.start_date or dt.date.today(), spec.duration or 90
+
+
+def _ordinal(value: dt.date | None) -> int | None:
+    return value.toordinal() if isinstance(value, dt.date) else None
+
+
+def _grouping_selector() -> selector.SelectSelector:
+    return selector.SelectSelector(
+        selector.SelectSelectorConfig(
+            options=list(DEVICE_GROUPINGS),
+            mode=selector.SelectSelectorMode.DROPDOWN,
+            translation_key=CONF_DEVICE_GROUPING,
+        )
+    )
+
+
+def _placement_options(user_input: dict[str, Any], options: dict[str, Any]) -> dict[str, Any]:
+    """Device grouping, parent device and area from the options form.
+
+    The form leaves out a cleared device or area, so missing means none.
+    """
+    return {
+        CONF_DEVICE_GROUPING: user_input.get(
+            CONF_DEVICE_GROUPING, options.get(CONF_DEVICE_GROUPING, DEVICE_GROUPING_CONSUMABLE)
+        ),
+        CONF_PARENT_DEVICE: user_input.get(CONF_PARENT_DEVICE) or None,
+        CONF_AREA: user_input.get(CONF_AREA) or None,
+    }
+
+
 class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    VERSION = CONFIG_ENTRY_VERSION
 
     def __init__(self) -> None:
         """Store defaults shown to the user so we can detect changes."""
@@ -37,6 +89,9 @@ class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         errors = {}
         if user_input is not None:
+            if user_input.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_HUB:
+                return await self._async_create_hub(user_input[CONF_NAME].strip())
+
             # Normalize values
             name = user_input[CONF_NAME].strip()
             item_type = user_input.get(CONF_ITEM_TYPE)
@@ -74,12 +129,7 @@ class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_ICON: icon,
                     # Keep duration/start_date in options so they can be changed later easily
                 }
-                options = {
-                    CONF_DURATION_DAYS: duration,
-                    CONF_START_DATE: start_date.isoformat()
-                    if hasattr(start_date, "isoformat")
-                    else str(start_date),
-                }
+                options = schedule_options(duration, _ordinal(start_date))
                 return self.async_create_entry(title=name, data=data, options=options)
 
         today = dt.date.today()
@@ -101,10 +151,27 @@ class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             vol.Required(CONF_START_DATE, default=today): selector.DateSelector(),
             vol.Optional(CONF_EXPIRY_DATE_OVERRIDE, default=due_date): selector.DateSelector(),
+            vol.Optional(CONF_ENTRY_TYPE, default=ENTRY_TYPE_CONSUMABLE): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[ENTRY_TYPE_CONSUMABLE, ENTRY_TYPE_HUB],
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                    translation_key=CONF_ENTRY_TYPE,
+                )
+            ),
         })
 
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
 
+    async def _async_create_hub(self, name: str) -> FlowResult:
+        """Create the entry that holds a Store-backed collection of consumables."""
+        await self.async_set_unique_id(HUB_UNIQUE_ID)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=name,
+            data={CONF_NAME: name, CONF_ENTRY_TYPE: ENTRY_TYPE_HUB},
+            options={},
+        )
+
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Allow reconfiguration of an existing entry."""
 
@@ -112,23 +179,14 @@ class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         entry = self.hass.config_entries.async_get_entry(entry_id) if entry_id else None
         if not entry:
             return self.async_abort(reason="entry_not_found")
+        if entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_HUB:
+            return self.async_abort(reason="hub_not_editable")
 
         errors = {}
         data = entry.data
         options = entry.options
 
-        try:
-            current_start = options.get(CONF_START_DATE) or data.get(CONF_START_DATE)
-            if isinstance(current_start, str):
-                current_start = dt.date.fromisoformat(current_start)
-            if not isinstance(current_start, dt.date):
-                current_start = dt.date.today()
-        except Exception:
-            current_start = dt.date.today()
-
-        current_duration = int(
-            options.get(CONF_DURATION_DAYS, data.get(CONF_DURATION_DAYS, 90))
-        )
+        current_start, current_duration = _current_schedule(entry)
         self._start_date_default = current_start
         self._duration_default = current_duration
         due_date = current_start + dt.timedelta(days=current_duration)
@@ -166,10 +224,8 @@ class ConsumableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_ICON: icon,
                 }
                 updated_options = {
-                    CONF_DURATION_DAYS: duration,
-                    CONF_START_DATE: start_date.isoformat()
-                    if hasattr(start_date, "isoformat")
-                    else str(start_date),
+                    **options,
+                    **schedule_options(duration, _ordinal(start_date)),
                 }
                 self.hass.config_entries.async_update_entry(
                     entry,
@@ -216,6 +272,10 @@ class ConsumableOptionsFlowHandler(config_entries.OptionsFlow):
         data = self.config_entry.data
         options = self.config_entry.options
 
+        if data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_HUB:
+            return await self.async_step_hub()
+
+        current_date, current_duration = _current_schedule(self.config_entry)
         if user_input is not None:
             name = user_input.get(CONF_NAME)
             if name is None:
@@ -233,18 +293,16 @@ class ConsumableOptionsFlowHandler(config_entries.OptionsFlow):
                 if CONF_ICON in user_input and user_input[CONF_ICON] is not None
                 else data.get(CONF_ICON)
             )
-            duration_in = (
+            duration = int(
                 user_input[CONF_DURATION_DAYS]
                 if CONF_DURATION_DAYS in user_input and user_input[CONF_DURATION_DAYS] is not None
-                else options.get(CONF_DURATION_DAYS)
+                else current_duration
             )
-            duration = int(duration_in)
-            start_in = (
+            start_date = (
                 user_input[CONF_START_DATE]
                 if CONF_START_DATE in user_input and user_input[CONF_START_DATE] is not None
-                else options.get(CONF_START_DATE)
+                else current_date
             )
-            start_date = start_in
             expiry_override = user_input.get(CONF_EXPIRY_DATE_OVERRIDE)
 
             if isinstance(start_date, str):
@@ -269,23 +327,18 @@ class ConsumableOptionsFlowHandler(config_entries.OptionsFlow):
 
             new_options = options.copy()
             new_options.update({
-                CONF_DURATION_DAYS: duration,
-                CONF_START_DATE: start_date.isoformat()
-                if hasattr(start_date, "isoformat")
-                else str(start_date),
+                **schedule_options(duration, _ordinal(start_date)),
+                CONF_COMPACT_STATE: bool(
+                    user_input.get(CONF_COMPACT_STATE, options.get(CONF_COMPACT_STATE, False))
+                ),
+                **_placement_options(user_input, options),
+                CONF_COLLECT_METRICS: bool(
+                    user_input.get(CONF_COLLECT_METRICS, options.get(CONF_COLLECT_METRICS, False))
+                ),
             })
             return self.async_create_entry(title="", data=new_options)
 
-        # Parse existing date
-        try:
-            current_date = options.get(CONF_START_DATE)
-            if isinstance(current_date, str):
-                year, month, day = map(int, current_date.split("-"))
-                current_date = dt.date(year, month, day)
-        except Exception:
-            current_date = dt.date.today()
-
-        duration = int(options.get(CONF_DURATION_DAYS, 90))
+        duration = current_duration
         due_date = current_date + dt.timedelta(days=duration)
         self._current_start_date = current_date
         self._current_duration = duration
@@ -304,5 +357,69 @@ class ConsumableOptionsFlowHandler(config_entries.OptionsFlow):
             ),
             vol.Optional(CONF_START_DATE, default=current_date): selector.DateSelector(),
             vol.Optional(CONF_EXPIRY_DATE_OVERRIDE, default=due_date): selector.DateSelector(),
+            vol.Optional(
+                CONF_COMPACT_STATE, default=bool(options.get(CONF_COMPACT_STATE, False))
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_DEVICE_GROUPING,
+                default=options.get(CONF_DEVICE_GROUPING, DEVICE_GROUPING_CONSUMABLE),
+            ): _grouping_selector(),
+            vol.Optional(
+                CONF_PARENT_DEVICE, description={"suggested_value": options.get(CONF_PARENT_DEVICE)}
+            ): selector.DeviceSelector(),
+            vol.Optional(
+                CONF_AREA, description={"suggested_value": options.get(CONF_AREA)}
+            ): selector.AreaSelector(),
+            vol.Optional(
+                CONF_COLLECT_METRICS, default=bool(options.get(CONF_COLLECT_METRICS, False))
+            ): selector.BooleanSelector(),
         })
         return self.async_show_form(step_id="init", data_schema=schema)
+
+    async def async_step_hub(self, user_input: dict | None = None) -> FlowResult:
+        """Hub-wide settings; items themselves are managed with services."""
+        options = self.config_entry.options
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                thresholds = parse_thresholds(user_input.get(CONF_THRESHOLDS) or "")
+            except ValueError:
+                errors[CONF_THRESHOLDS] = "invalid_thresholds"
+            else:
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        **options,
+                        CONF_COMPACT_STATE: bool(user_input.get(CONF_COMPACT_STATE, False)),
+                        CONF_SOON_DAYS: int(user_input.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS)),
+                        CONF_THRESHOLDS: list(thresholds),
+                        CONF_DIGEST_TIME: user_input.get(CONF_DIGEST_TIME, DEFAULT_DIGEST_TIME),
+                        CONF_DEVICE_GROUPING: user_input.get(
+                            CONF_DEVICE_GROUPING, DEVICE_GROUPING_CONSUMABLE
+                        ),
+                        CONF_COLLECT_METRICS: bool(user_input.get(CONF_COLLECT_METRICS, False)),
+                    },
+                )
+        thresholds = ", ".join(str(days) for days in options.get(CONF_THRESHOLDS) or ())
+        schema = vol.Schema({
+            vol.Optional(
+                CONF_COMPACT_STATE, default=bool(options.get(CONF_COMPACT_STATE, False))
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_SOON_DAYS, default=options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS)
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(min=1, max=365, step=1, mode=selector.NumberSelectorMode.BOX)
+            ),
+            vol.Optional(CONF_THRESHOLDS, default=thresholds): selector.TextSelector(),
+            vol.Optional(
+                CONF_DIGEST_TIME, default=options.get(CONF_DIGEST_TIME, DEFAULT_DIGEST_TIME)
+            ): selector.TimeSelector(),
+            vol.Optional(
+                CONF_DEVICE_GROUPING,
+                default=options.get(CONF_DEVICE_GROUPING, DEVICE_GROUPING_CONSUMABLE),
+            ): _grouping_selector(),
+            vol.Optional(
+                CONF_COLLECT_METRICS, default=bool(options.get(CONF_COLLECT_METRICS, False))
+            ): selector.BooleanSelector(),
+        })
+        return self.async_show_form(step_id="hub", data_schema=schema, errors=errors)
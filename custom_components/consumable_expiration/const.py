@@ -2,13 +2,62 @@
 from __future__ import annotations
 
 DOMAIN = "consumable_expiration"
+# Config entry schema; version 2 stores schedules as day ordinals
+CONFIG_ENTRY_VERSION = 2
 
 CONF_NAME = "name"
 CONF_ITEM_TYPE = "item_type"
 CONF_DURATION_DAYS = "duration_days"
 CONF_START_DATE = "start_date"
 CONF_EXPIRY_DATE_OVERRIDE = "expiry_date_override"
+# Version 2 entries keep their schedule as day ordinals next to the ISO start date
+CONF_START_ORD = "start_ord"
+CONF_DUE_ORD = "due_ord"
 CONF_ICON = "icon"
+CONF_ENTRY_TYPE = "entry_type"
+CONF_USAGE_ENTITY = "usage_entity"
+CONF_USAGE_MODE = "usage_mode"
+CONF_USAGE_LIMIT = "usage_limit"
+# Keep slow-changing attributes out of the recorder
+CONF_COMPACT_STATE = "compact_state"
+# Collect hot-path metrics for diagnostics while this entry is loaded
+CONF_COLLECT_METRICS = "collect_metrics"
+# Window of the hub's "due soon" count, in days
+CONF_SOON_DAYS = "soon_days"
+DEFAULT_SOON_DAYS = 7
+# Lead times in days before the due date at which a threshold event fires
+CONF_THRESHOLDS = "thresholds"
+
+# Which device a consumable's entities belong to. A parent device (the id
+# of an existing appliance device) wins over the grouping; consumables that
+# fit no shared device keep their own.
+CONF_PARENT_DEVICE = "parent_device"
+CONF_AREA = "area_id"
+CONF_DEVICE_GROUPING = "device_grouping"
+DEVICE_GROUPING_CONSUMABLE = "consumable"  # one device per consumable
+DEVICE_GROUPING_AREA = "area"  # one device per area
+DEVICE_GROUPING_ITEM_TYPE = "item_type"  # one device per item type
+DEVICE_GROUPINGS = (DEVICE_GROUPING_CONSUMABLE, DEVICE_GROUPING_AREA, DEVICE_GROUPING_ITEM_TYPE)
+
+# Local time of the hub's daily digest, as HH:MM:SS
+CONF_DIGEST_TIME = "digest_time"
+DEFAULT_DIGEST_TIME = "08:00:00"
+
+# Events fired when a consumable crosses a threshold or its due date
+EVENT_THRESHOLD = f"{DOMAIN}_threshold"
+EVENT_EXPIRED = f"{DOMAIN}_expired"
+EVENT_DIGEST = f"{DOMAIN}_digest"
+
+# How a usage-based consumable reads its source entity
+USAGE_MODE_RUNTIME = "runtime"  # hours the source is on
+USAGE_MODE_METER = "meter"  # increase of a numeric reading, e.g. liters
+USAGE_MODE_CYCLES = "cycles"  # times the source turned on
+USAGE_MODES = (USAGE_MODE_RUNTIME, USAGE_MODE_METER, USAGE_MODE_CYCLES)
+
+# A consumable entry tracks one item; a hub entry holds a whole collection
+ENTRY_TYPE_CONSUMABLE = "consumable"
+ENTRY_TYPE_HUB = "hub"
+HUB_UNIQUE_ID = "hub"
 
 # Default icon mapping for common items (Material Design Icons names)
 DEFAULT_ICON_MAP = {
@@ -18,3 +67,21 @@ DEFAULT_ICON_MAP = {
     "fan filter": "mdi:fan",
     "uv light": "mdi:weather-sunny-alert"
 }
+
+# Dispatcher signal sent per consumable key when its schedule changes
+SIGNAL_SPEC_UPDATED = f"{DOMAIN}_spec_updated_{{}}"
+# Dispatcher signal sent per consumable key when its accumulated usage changes
+SIGNAL_USAGE_UPDATED = f"{DOMAIN}_usage_updated_{{}}"
+# Dispatcher signal sent with the hub entry id and new item ids
+SIGNAL_ITEMS_ADDED = f"{DOMAIN}_items_added_{{}}"
+
+# Unique id suffixes of the per-consumable entities
+SENSOR_UNIQUE_ID_SUFFIX = "_days_remaining"
+BUTTON_UNIQUE_ID_SUFFIX = "_mark_replaced"
+EXPIRED_UNIQUE_ID_SUFFIX = "_is_expired"
+DUE_SOON_UNIQUE_ID_SUFFIX = "_is_due_soon"
+
+# Replacement journal record kinds
+HISTORY_REPLACED = "replaced"
+HISTORY_DATE_CHANGED = "date_changed"
+HISTORY_REMOVED = "removed"
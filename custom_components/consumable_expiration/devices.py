@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Mapping
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import (
+    DOMAIN,
+    CONF_AREA,
+    CONF_DEVICE_GROUPING,
+    CONF_ITEM_TYPE,
+    CONF_NAME,
+    CONF_PARENT_DEVICE,
+    DEVICE_GROUPING_AREA,
+    DEVICE_GROUPING_ITEM_TYPE,
+    SENSOR_UNIQUE_ID_SUFFIX,
+    BUTTON_UNIQUE_ID_SUFFIX,
+    EXPIRED_UNIQUE_ID_SUFFIX,
+    DUE_SOON_UNIQUE_ID_SUFFIX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MANUFACTURER = "dfiore1230"
+MODEL = "HA Expiring Consumables"
+HUB_MODEL = "HA Expiring Consumables hub"
+GROUP_MODEL = "HA Expiring Consumables group"
+
+# Entities of one consumable, by platform and unique id suffix
+CONSUMABLE_ENTITIES = (
+    (Platform.SENSOR, SENSOR_UNIQUE_ID_SUFFIX),
+    (Platform.BUTTON, BUTTON_UNIQUE_ID_SUFFIX),
+    (Platform.BINARY_SENSOR, EXPIRED_UNIQUE_ID_SUFFIX),
+    (Platform.BINARY_SENSOR, DUE_SOON_UNIQUE_ID_SUFFIX),
+)
+
+
+def _placement(entry: ConfigEntry, key: str, info: Mapping[str, Any]) -> Mapping[str, Any]:
+    # A single consumable keeps its placement in options, hub items in the item
+    return entry.options if key == entry.entry_id else info
+
+
+class DeviceInfoCache:
+    """DeviceInfo of every consumable, built once and shared by its entities.
+
+    Consumables on the same shared device get the same DeviceInfo object,
+    so a hub with thousands of items grouped by area holds one per area.
+    Entries drop their DeviceInfos when they unload, since a reload is
+    what changes a consumable's device.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # entry_id -> consumable key -> (DeviceInfo, shared with other consumables)
+        self._consumables: dict[str, dict[str, tuple[DeviceInfo, bool]]] = {}
+        # entry_id -> identifier of a shared device -> its DeviceInfo
+        self._shared: dict[str, dict[tuple[str, str], DeviceInfo]] = {}
+        self._hubs: dict[str, DeviceInfo] = {}
+
+    def hub(self, entry: ConfigEntry) -> DeviceInfo:
+        info = self._hubs.get(entry.entry_id)
+        if info is None:
+            info = self._hubs[entry.entry_id] = DeviceInfo(
+                identifiers={(DOMAIN, entry.entry_id)},
+                name=entry.title or "Consumables",
+                manufacturer=MANUFACTURER,
+                model=HUB_MODEL,
+            )
+        return info
+
+    @callback
+    def consumable(self, entry: ConfigEntry, key: str, info: Mapping[str, Any]) -> tuple[DeviceInfo, bool]:
+        """Return the DeviceInfo of consumable ``key`` and whether it is shared."""
+        cached = self._consumables.setdefault(entry.entry_id, {})
+        found = cached.get(key)
+        if found is None:
+            found = cached[key] = self._build(entry, key, info)
+        return found
+
+    @callback
+    def async_clear(self, entry_id: str) -> None:
+        self._consumables.pop(entry_id, None)
+        self._shared.pop(entry_id, None)
+        self._hubs.pop(entry_id, None)
+
+    def _build(self, entry: ConfigEntry, key: str, info: Mapping[str, Any]) -> tuple[DeviceInfo, bool]:
+        placement = _placement(entry, key, info)
+        shared = self._shared.setdefault(entry.entry_id, {})
+        device_id = placement.get(CONF_PARENT_DEVICE)
+        if device_id:
+            device = dr.async_get(self.hass).async_get(device_id)
+            if device is not None:
+                identifier = ("device", device_id)
+                if identifier not in shared:
+                    # Linking by the appliance's own identifiers adds no device
+                    shared[identifier] = DeviceInfo(
+                        identifiers=device.identifiers, connections=device.connections
+                    )
+                return shared[identifier], True
+            _LOGGER.debug("Parent device %s of %s no longer exists", device_id, key)
+        group = self._group(entry, key, info, placement)
+        if group is not None:
+            identifier, name, area = group
+            if identifier not in shared:
+                shared[identifier] = DeviceInfo(
+                    identifiers={identifier},
+                    name=name,
+                    manufacturer=MANUFACTURER,
+                    model=GROUP_MODEL,
+                    suggested_area=area,
+                )
+            return shared[identifier], True
+        return (
+            DeviceInfo(
+                identifiers={(DOMAIN, key)},
+                name=info.get(CONF_NAME) or "Consumable",
+                manufacturer=MANUFACTURER,
+                model=MODEL,
+            ),
+            False,
+        )
+
+    def _group(
+        self, entry: ConfigEntry, key: str, info: Mapping[str, Any], placement: Mapping[str, Any]
+    ) -> tuple[tuple[str, str], str, str | None] | None:
+        """Return identifier, name and area name of the shared device ``key`` belongs in."""
+        grouping = entry.options.get(CONF_DEVICE_GROUPING)
+        if grouping == DEVICE_GROUPING_ITEM_TYPE:
+            item_type = (info.get(CONF_ITEM_TYPE) or "").strip()
+            if item_type:
+                name = item_type[0].upper() + item_type[1:]
+                return (DOMAIN, f"item_type_{item_type.casefold()}"), name, None
+        elif grouping == DEVICE_GROUPING_AREA:
+            area_id = placement.get(CONF_AREA) or self._current_area(key)
+            area = ar.async_get(self.hass).async_get_area(area_id) if area_id else None
+            if area is not None:
+                return (DOMAIN, f"area_{area.id}"), area.name, area.name
+        return None
+
+    def _current_area(self, key: str) -> str | None:
+        """Area the consumable's sensor is in, directly or through its device."""
+        ent_reg = er.async_get(self.hass)
+        entity_id = ent_reg.async_get_entity_id(Platform.SENSOR, DOMAIN, f"{key}{SENSOR_UNIQUE_ID_SUFFIX}")
+        ent = ent_reg.async_get(entity_id) if entity_id else None
+        if ent is None:
+            return None
+        if ent.area_id:
+            return ent.area_id
+        device = dr.async_get(self.hass).async_get(ent.device_id) if ent.device_id else None
+        return device.area_id if device else None
+
+
+@callback
+def async_consolidate_devices(
+    hass: HomeAssistant,
+    cache: DeviceInfoCache,
+    entry: ConfigEntry,
+    consumables: Mapping[str, Mapping[str, Any]],
+) -> int:
+    """Move registered entities of ``consumables`` to their device and return how many moved.
+
+    Runs before the platforms set up, so changing the grouping or a parent
+    device re-parents existing entities instead of leaving them on their
+    old device. An entity keeps the area of the device it leaves unless
+    it has its own. Devices of ``entry`` left without its entities are
+    released, which removes them once no other entry uses them.
+    """
+    ent_reg = er.async_get(hass)
+    dev_reg = dr.async_get(hass)
+    moved = 0
+    for key, info in consumables.items():
+        entities = [
+            ent_reg.async_get(entity_id)
+            for platform, suffix in CONSUMABLE_ENTITIES
+            if (entity_id := ent_reg.async_get_entity_id(platform, DOMAIN, f"{key}{suffix}"))
+        ]
+        if not entities:
+            # Added after the last start; the platform creates its device
+            continue
+        device_info, _shared = cache.consumable(entry, key, info)
+        device = dev_reg.async_get_device(identifiers=device_info["identifiers"])
+        if device is not None and all(ent.device_id == device.id for ent in entities):
+            continue
+        device = dev_reg.async_get_or_create(config_entry_id=entry.entry_id, **device_info)
+        for ent in entities:
+            if ent.device_id == device.id:
+                continue
+            old = dev_reg.async_get(ent.device_id) if ent.device_id else None
+            changes: dict[str, Any] = {"device_id": device.id}
+            if old is not None and old.area_id and not ent.area_id and old.area_id != device.area_id:
+                changes["area_id"] = old.area_id
+            ent_reg.async_update_entity(ent.entity_id, **changes)
+            moved += 1
+    in_use = {ent.device_id for ent in er.async_entries_for_config_entry(ent_reg, entry.entry_id)}
+    if entry.entry_id not in consumables:
+        # The hub's own device stays even before its entities are added
+        hub_device = dev_reg.async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+        in_use.add(hub_device.id if hub_device else None)
+    for device in dr.async_entries_for_config_entry(dev_reg, entry.entry_id):
+        if device.id not in in_use:
+            _LOGGER.debug("Releasing device %s no longer used by %s", device.id, entry.entry_id)
+            dev_reg.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+    if moved:
+        _LOGGER.debug("Moved %d entities of %s to their consumable devices", moved, entry.entry_id)
+    return moved
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .runtime import get_headless, get_hub, get_journal, get_metrics, get_usage, get_writer, is_hub_entry
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return runtime state and hot-path metrics for a config entry."""
+    domain_data = hass.data[DOMAIN]
+    hub = get_hub(hass)
+    journal = get_journal(hass)
+    usage = get_usage(hass)
+    headless = get_headless(hass)
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "entry_id": entry.entry_id,
+            "version": entry.version,
+            "hub": is_hub_entry(entry),
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "runtime": {
+            "consumables": len(domain_data["specs"]),
+            "hub_items": len(hub.items) if hub else 0,
+            "headless_items": len(headless) if headless else 0,
+            "headless_bytes": headless.memory_bytes() if headless else 0,
+            "entity_index_size": len(domain_data["index"]),
+            "scheduled_transitions": len(domain_data["scheduler"]),
+            "options_writer": get_writer(hass).stats,
+            "journal_loaded": journal.loaded if journal else False,
+            "usage_counters": len(usage.counters) if usage else 0,
+        },
+        "metrics": get_metrics(hass).as_dict(),
+    }
+    spec = domain_data["specs"].get(entry.entry_id)
+    if spec is not None:
+        diagnostics["consumable"] = {
+            "duration_days": spec.duration,
+            "start_date": spec.start_date.isoformat() if spec.start_date else None,
+            "due_date": spec.due_date.isoformat() if spec.due_date else None,
+        }
+    return diagnostics
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from functools import partial
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_DIGEST_TIME,
+    CONF_SOON_DAYS,
+    DEFAULT_DIGEST_TIME,
+    DEFAULT_SOON_DAYS,
+    DOMAIN,
+    EVENT_DIGEST,
+    SENSOR_UNIQUE_ID_SUFFIX,
+)
+from .runtime import consumable_item_type, consumable_name, get_aggregates, get_metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Scheduler key of the next digest
+DIGEST_KEY = "digest"
+
+OVERDUE = "overdue"
+DUE_TODAY = "due_today"
+DUE_SOON = "due_soon"
+
+
+def parse_digest_time(value: Any) -> dt.time:
+    if isinstance(value, dt.time):
+        return value
+    try:
+        return dt.time.fromisoformat(str(value))
+    except ValueError:
+        _LOGGER.debug("Invalid digest time '%s'; using %s", value, DEFAULT_DIGEST_TIME)
+        return dt.time.fromisoformat(DEFAULT_DIGEST_TIME)
+
+
+@callback
+def async_build_digest(hass: HomeAssistant, today_ord: int, days: int) -> dict[str, Any]:
+    """List overdue, due today and due soon consumables with their groupings.
+
+    The consumables come from one range query on the due date index and
+    their areas from the aggregates, so the cost follows the number of
+    consumables listed, not the number loaded. ``areas``, ``devices`` and
+    ``item_types`` map each group to the ids of its consumables.
+    """
+    start = get_metrics(hass).start()
+    specs = hass.data[DOMAIN]["specs"]
+    aggregates = get_aggregates(hass)
+    ent_reg = er.async_get(hass)
+    dev_reg = dr.async_get(hass)
+    counts = {OVERDUE: 0, DUE_TODAY: 0, DUE_SOON: 0}
+    consumables: list[dict[str, Any]] = []
+    groups: dict[str, dict[str, list[str]]] = {"areas": {}, "devices": {}, "item_types": {}}
+    for due_ord, key in specs.due_index.between(0, today_ord + days + 1):
+        if due_ord < today_ord:
+            status = OVERDUE
+        elif due_ord == today_ord:
+            status = DUE_TODAY
+        else:
+            status = DUE_SOON
+        counts[status] += 1
+        entity_id = ent_reg.async_get_entity_id(Platform.SENSOR, DOMAIN, f"{key}{SENSOR_UNIQUE_ID_SUFFIX}")
+        ent = ent_reg.async_get(entity_id) if entity_id else None
+        device = dev_reg.async_get(ent.device_id) if ent and ent.device_id else None
+        area_id = next(
+            (group[5:] for group in aggregates.groups(key) if group.startswith("area:")), None
+        )
+        item_type = consumable_item_type(hass, key)
+        consumables.append(
+            {
+                "id": key,
+                "name": consumable_name(hass, key),
+                "entity_id": entity_id,
+                "status": status,
+                "due_date": dt.date.fromordinal(due_ord).isoformat(),
+                "days_remaining": due_ord - today_ord,
+                "area_id": area_id,
+                "device_id": device.id if device else None,
+                "device": device.name if device else None,
+                "item_type": item_type,
+            }
+        )
+        for kind, group in (("areas", area_id), ("devices", device.id if device else None), ("item_types", item_type)):
+            if group:
+                groups[kind].setdefault(group, []).append(key)
+    get_metrics(hass).observe("digest", start)
+    return {
+        "date": dt.date.fromordinal(today_ord).isoformat(),
+        "days": days,
+        **counts,
+        "consumables": consumables,
+        **groups,
+    }
+
+
+@callback
+def async_schedule_digest(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Schedule the hub's next digest at its configured local time."""
+    at = parse_digest_time(entry.options.get(CONF_DIGEST_TIME, DEFAULT_DIGEST_TIME))
+    now = dt_util.now()
+    day = dt_util.as_local(now).date()
+    # Replacing the time on local midnight keeps the wall time across DST changes
+    when = dt_util.start_of_local_day(day).replace(hour=at.hour, minute=at.minute, second=at.second)
+    if when <= now:
+        when = dt_util.start_of_local_day(day + dt.timedelta(days=1)).replace(
+            hour=at.hour, minute=at.minute, second=at.second
+        )
+    hass.data[DOMAIN]["scheduler"].async_schedule(DIGEST_KEY, when, partial(_async_send_digest, hass, entry))
+
+
+@callback
+def async_cancel_digest(hass: HomeAssistant) -> None:
+    hass.data[DOMAIN]["scheduler"].async_cancel(DIGEST_KEY)
+
+
+@callback
+def _async_send_digest(hass: HomeAssistant, entry: ConfigEntry, now: dt.datetime) -> None:
+    days = int(entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS))
+    digest = async_build_digest(hass, dt_util.as_local(now).date().toordinal(), days)
+    _LOGGER.debug("Sending digest with %d consumables", len(digest["consumables"]))
+    hass.bus.async_fire(EVENT_DIGEST, digest)
+    async_schedule_digest(hass, entry)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Callable
+
+from .spec import ConsumableSpec
+
+# Day ordinals are counted in a Fenwick tree over [1, SPAN)
+SPAN_BITS = 32
+SPAN = 1 << SPAN_BITS
+
+
+class DayCounts:
+    """How many things fall on each day ordinal, as a sparse Fenwick tree.
+
+    Adding to a day, counting a range of days and finding the day of the
+    n-th thing in day order each walk one path of the tree, so they cost
+    O(log D) for the fixed span D of ordinals. Only days that were ever
+    counted hold nodes.
+    """
+
+    def __init__(self) -> None:
+        self._tree: dict[int, int] = {}
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._tree)
+
+    def add(self, day: int, amount: int = 1) -> None:
+        self._total += amount
+        tree = self._tree
+        while day < SPAN:
+            value = tree.get(day, 0) + amount
+            if value:
+                tree[day] = value
+            else:
+                del tree[day]
+            day += day & -day
+
+    def clear(self) -> None:
+        self._tree.clear()
+        self._total = 0
+
+    def rank(self, day: int) -> int:
+        """Return how many fall before ``day``."""
+        tree = self._tree
+        i = min(max(day - 1, 0), SPAN - 1)
+        total = 0
+        while i:
+            total += tree.get(i, 0)
+            i &= i - 1
+        return total
+
+    def count(self, start_ord: int, end_ord: int) -> int:
+        """Return how many fall in ``start_ord <= day < end_ord``."""
+        return max(self.rank(end_ord) - self.rank(start_ord), 0)
+
+    def select(self, rank: int) -> int:
+        """Return the day of the thing at ``rank`` in day order."""
+        tree = self._tree
+        pos = 0
+        for bit in range(SPAN_BITS - 1, -1, -1):
+            nxt = pos + (1 << bit)
+            if nxt < SPAN and tree.get(nxt, 0) <= rank:
+                pos = nxt
+                rank -= tree.get(nxt, 0)
+        return pos + 1
+
+    def next_day(self, from_ord: int) -> int | None:
+        """Return the first counted day on or after ``from_ord``."""
+        rank = self.rank(from_ord)
+        return self.select(rank) if rank < self._total else None
+
+
+class DueIndex:
+    """Consumable keys ordered by due date ordinal.
+
+    Keys are bucketed per day, and :class:`DayCounts` counts how many are
+    due before any day. Moving a consumable touches two buckets and two
+    paths of the tree, and counting a range or finding the next due date
+    walks one path, so each costs O(log D) for the fixed span D of
+    ordinals, however many consumables there are. Listing a range costs
+    the same per day it returns, plus sorting the keys of each day.
+    """
+
+    def __init__(self) -> None:
+        self._days: dict[int, set[str]] = {}
+        self._due: dict[str, int] = {}
+        self._counts = DayCounts()
+        # Called after every change; keep them cheap
+        self.listeners: list[Callable[[], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def update(self, key: str, due_ord: int | None) -> None:
+        old = self._due.get(key)
+        if old == due_ord:
+            return
+        if old is not None:
+            bucket = self._days[old]
+            bucket.discard(key)
+            if not bucket:
+                del self._days[old]
+            del self._due[key]
+            self._counts.add(old, -1)
+        if due_ord is not None:
+            self._days.setdefault(due_ord, set()).add(key)
+            self._due[key] = due_ord
+            self._counts.add(due_ord)
+        for listener in self.listeners:
+            listener()
+
+    def remove(self, key: str) -> None:
+        self.update(key, None)
+
+    def clear(self) -> None:
+        self._days.clear()
+        self._due.clear()
+        self._counts.clear()
+        for listener in self.listeners:
+            listener()
+
+    def due(self, key: str) -> int | None:
+        return self._due.get(key)
+
+    def between(self, start_ord: int, end_ord: int) -> list[tuple[int, str]]:
+        """Return ``(due_ord, key)`` pairs with ``start_ord <= due_ord < end_ord``."""
+        counts = self._counts
+        pairs: list[tuple[int, str]] = []
+        rank, end = counts.rank(start_ord), counts.rank(end_ord)
+        while rank < end:
+            day = counts.select(rank)
+            keys = sorted(self._days[day])
+            pairs.extend((day, key) for key in keys)
+            rank += len(keys)
+        return pairs
+
+    def after(self, due_ord: int, key: str, end_ord: int) -> list[tuple[int, str]]:
+        """Return the pairs sorted after ``(due_ord, key)`` with ``due_ord < end_ord``."""
+        if due_ord >= end_ord:
+            return []
+        pairs = [(due_ord, other) for other in sorted(self._days.get(due_ord, ())) if other > key]
+        pairs.extend(self.between(due_ord + 1, end_ord))
+        return pairs
+
+    def count(self, start_ord: int, end_ord: int) -> int:
+        """Return how many due dates fall in ``start_ord <= due_ord < end_ord``."""
+        return self._counts.count(start_ord, end_ord)
+
+    def next_due(self, from_ord: int) -> int | None:
+        """Return the first due date ordinal on or after ``from_ord``."""
+        return self._counts.next_day(from_ord)
+
+
+class IndexedSpecs(dict):
+    """Consumable key -> spec mapping that keeps a :class:`DueIndex` in step.
+
+    Used as ``hass.data[DOMAIN]["specs"]`` so every place that swaps in a
+    spec also moves its due date in the index.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.due_index = DueIndex()
+        # Called with the key and its new spec, or None once it is dropped
+        self.observers: list[Callable[[str, ConsumableSpec | None], None]] = []
+
+    def __setitem__(self, key: str, spec: ConsumableSpec) -> None:
+        super().__setitem__(key, spec)
+        self.due_index.update(key, spec.due_ord)
+        for observer in self.observers:
+            observer(key, spec)
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._dropped(key)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self:
+            return super().pop(key, *default)
+        spec = super().pop(key)
+        self._dropped(key)
+        return spec
+
+    def clear(self) -> None:
+        keys = list(self)
+        super().clear()
+        self.due_index.clear()
+        for key in keys:
+            for observer in self.observers:
+                observer(key, None)
+
+    def _dropped(self, key: str) -> None:
+        self.due_index.remove(key)
+        for observer in self.observers:
+            observer(key, None)
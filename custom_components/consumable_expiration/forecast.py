@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from array import array
+from typing import Any, Callable, Mapping
+
+from .spec import ConsumableSpec
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIODS = (PERIOD_WEEK, PERIOD_MONTH)
+MAX_HORIZON_MONTHS = 120
+# Item type label of consumables without one
+UNTYPED = "unknown"
+
+
+class ScheduleColumns:
+    """Due dates, durations and item types as parallel arrays.
+
+    Rows are consumables with a valid schedule; ``types`` holds the item
+    type of each code in ``type_codes``.
+    """
+
+    __slots__ = ("keys", "due", "duration", "type_codes", "types", "_codes")
+
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.due = array("l")
+        self.duration = array("l")
+        self.type_codes = array("H")
+        self.types: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_specs(
+        cls,
+        specs: Mapping[str, ConsumableSpec],
+        item_type: Callable[[str], str | None],
+        only_type: str | None = None,
+    ) -> ScheduleColumns:
+        """Build columns from valid specs, limited to ``only_type`` if given."""
+        columns = cls()
+        for key, spec in specs.items():
+            if not spec.valid:
+                continue
+            key_type = item_type(key)
+            if only_type is None or key_type == only_type:
+                columns.append(key, spec.due_ord, spec.duration, key_type)
+        return columns
+
+    def _code(self, item_type: str | None) -> int:
+        name = item_type or UNTYPED
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.types)
+            self.types.append(name)
+        return code
+
+    def append(self, key: str, due_ord: int, duration: int, item_type: str | None) -> None:
+        self.keys.append(key)
+        self.due.append(due_ord)
+        self.duration.append(duration)
+        self.type_codes.append(self._code(item_type))
+
+    def extend(
+        self,
+        keys: list[str],
+        due: array,
+        duration: array,
+        type_codes: array,
+        types: list[str],
+    ) -> None:
+        """Append rows held in columns of the same layout, whose codes index ``types``."""
+        remap = [self._code(name) for name in types]
+        self.keys.extend(keys)
+        self.due.extend(due)
+        self.duration.extend(duration)
+        if remap == list(range(len(types))):
+            self.type_codes.extend(type_codes)
+        else:
+            self.type_codes.extend(remap[code] for code in type_codes)
+
+
+def add_months(day: dt.date, months: int) -> dt.date:
+    """Return ``day`` moved by whole months, clamped to the end of shorter months."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    next_month = dt.date(year + month // 12, month % 12 + 1, 1)
+    return dt.date(year, month, min(day.day, (next_month - dt.timedelta(days=1)).day))
+
+
+def bucket_starts(start_ord: int, end_ord: int, period: str) -> list[int]:
+    """Return the first day of every week (Monday) or month overlapping the range."""
+    first = dt.date.fromordinal(start_ord)
+    if period == PERIOD_WEEK:
+        monday = start_ord - first.weekday()
+        return list(range(monday, end_ord, 7))
+    starts = []
+    year, month = first.year, first.month
+    while (ordinal := dt.date(year, month, 1).toordinal()) < end_ord:
+        starts.append(ordinal)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return starts
+
+
+def forecast(
+    columns: ScheduleColumns, today_ord: int, end_ord: int, period: str
+) -> tuple[list[int], list[array]]:
+    """Count replacements per item type and period from today until ``end_ord``.
+
+    Each consumable is assumed to be replaced on its due date and every
+    ``duration`` days after; an overdue one is replaced today. A lookup
+    table maps each day of the horizon to its bucket, so the pass costs
+    one step per replacement with no date arithmetic. Returns the bucket
+    start ordinals and one count array per entry of ``columns.types``.
+    """
+    starts = bucket_starts(today_ord, end_ord, period)
+    bucket_of_day = array("H")
+    for index, start in enumerate(starts):
+        stop = starts[index + 1] if index + 1 < len(starts) else end_ord
+        bucket_of_day.extend([index] * (stop - max(start, today_ord)))
+    counts = [array("l", [0]) * len(starts) for _ in columns.types]
+    due, duration, codes = columns.due, columns.duration, columns.type_codes
+    for i in range(len(columns)):
+        row = counts[codes[i]]
+        for day in range(max(due[i], today_ord) - today_ord, end_ord - today_ord, duration[i]):
+            row[bucket_of_day[day]] += 1
+    return starts, counts
+
+
+def forecast_by_type(
+    columns: ScheduleColumns, today_ord: int, end_ord: int, period: str
+) -> dict[str, Any]:
+    """JSON-ready :func:`forecast` with ISO bucket dates and a total row."""
+    starts, counts = forecast(columns, today_ord, end_ord, period)
+    total = [sum(column) for column in zip(*counts)] if counts else [0] * len(starts)
+    by_type = {columns.types[code]: list(column) for code, column in enumerate(counts)}
+    return {
+        "period": period,
+        "buckets": [dt.date.fromordinal(start).isoformat() for start in starts],
+        "item_types": dict(sorted(by_type.items())),
+        "total": total,
+    }
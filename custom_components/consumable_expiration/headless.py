@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import operator
+import sys
+from array import array
+from typing import Any, Callable, Iterable, Mapping
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import CONF_DURATION_DAYS, CONF_ITEM_TYPE, CONF_START_DATE
+from .due_index import DayCounts
+from .forecast import UNTYPED, ScheduleColumns
+from .hub import SAVE_DELAY, STORAGE_VERSION, storage_key
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def headless_storage_key(entry_id: str) -> str:
+    return f"{storage_key(entry_id)}.headless"
+
+
+async def async_remove_headless(hass: HomeAssistant, entry_id: str) -> None:
+    await Store(hass, STORAGE_VERSION, headless_storage_key(entry_id)).async_remove()
+
+
+class HeadlessStore:
+    """Hub items tracked without entities, kept as parallel arrays.
+
+    Row ``i`` is item ``ids[i]`` with its start ordinal, duration and item
+    type code; ``types`` holds the name of each code. Removing an item
+    moves the last row into its place, so the arrays stay dense. Counts
+    of items per due date in a :class:`DayCounts` answer the summary
+    sensors in O(log D), without a scan. Each item costs its id string
+    plus a few dozen bytes.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, metrics: Metrics | None = None
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.metrics = metrics or Metrics()
+        self.ids: list[str] = []
+        self.start = array("l")
+        self.duration = array("l")
+        self.type_codes = array("H")
+        self.types: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._codes: dict[str, int] = {}
+        # Items due per day ordinal
+        self._due = DayCounts()
+        # Called after every change; keep them cheap
+        self.listeners: list[Callable[[], None]] = []
+        self._store: Store = Store(hass, STORAGE_VERSION, headless_storage_key(entry.entry_id))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._rows
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not data:
+            return
+        self.ids = list(data["ids"])
+        self.start = array("l", data["start"])
+        self.duration = array("l", data["duration"])
+        self.type_codes = array("H", data["type_codes"])
+        self.types = list(data["types"])
+        self._rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self._codes = {name: code for code, name in enumerate(self.types)}
+        self._due.clear()
+        for due in map(operator.add, self.start, self.duration):
+            self._due.add(due)
+        _LOGGER.debug("Loaded %d headless items for hub %s", len(self.ids), self.entry.entry_id)
+
+    def _code(self, item_type: str | None) -> int:
+        name = item_type or UNTYPED
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.types)
+            self.types.append(name)
+        return code
+
+    def _forget_due(self, row: int) -> None:
+        self._due.add(self.start[row] + self.duration[row], -1)
+
+    @callback
+    def async_track(self, rows: Iterable[Mapping[str, Any]], today_ord: int) -> tuple[int, int]:
+        """Add or update items from validated rows and return (created, updated).
+
+        Rows hold an ``id`` and any of ``item_type``, ``duration_days`` and
+        ``start_date``. New items need a duration and start today unless
+        given a start date; updates keep the fields a row leaves out. Rows
+        that change nothing are not counted.
+        """
+        created = updated = 0
+        for values in rows:
+            item_id = values["id"]
+            start = values.get(CONF_START_DATE)
+            start_ord = dt.date.fromisoformat(start).toordinal() if start else None
+            row = self._rows.get(item_id)
+            if row is None:
+                self._rows[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                self.start.append(today_ord if start_ord is None else start_ord)
+                self.duration.append(values[CONF_DURATION_DAYS])
+                self.type_codes.append(self._code(values.get(CONF_ITEM_TYPE)))
+                row = len(self.ids) - 1
+                created += 1
+            else:
+                if start_ord is None:
+                    start_ord = self.start[row]
+                duration = values.get(CONF_DURATION_DAYS, self.duration[row])
+                code = self.type_codes[row]
+                if CONF_ITEM_TYPE in values:
+                    code = self._code(values[CONF_ITEM_TYPE])
+                if (start_ord, duration, code) == (self.start[row], self.duration[row], self.type_codes[row]):
+                    continue
+                self._forget_due(row)
+                self.start[row] = start_ord
+                self.duration[row] = duration
+                self.type_codes[row] = code
+                updated += 1
+            self._due.add(self.start[row] + self.duration[row])
+        if created or updated:
+            self._async_changed()
+        return created, updated
+
+    @callback
+    def async_untrack(self, item_ids: Iterable[str]) -> int:
+        """Remove items and return how many were tracked."""
+        removed = 0
+        for item_id in item_ids:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                continue
+            self._forget_due(row)
+            last = len(self.ids) - 1
+            if row != last:
+                moved = self.ids[row] = self.ids[last]
+                self._rows[moved] = row
+                self.start[row] = self.start[last]
+                self.duration[row] = self.duration[last]
+                self.type_codes[row] = self.type_codes[last]
+            self.ids.pop()
+            self.start.pop()
+            self.duration.pop()
+            self.type_codes.pop()
+            removed += 1
+        if removed:
+            self._async_changed()
+        return removed
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        self.listeners.append(listener)
+
+        @callback
+        def _async_remove() -> None:
+            self.listeners.remove(listener)
+
+        return _async_remove
+
+    @callback
+    def _async_changed(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        for listener in self.listeners:
+            listener()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        start = self.metrics.start()
+        data = {
+            "ids": self.ids,
+            "start": self.start.tolist(),
+            "duration": self.duration.tolist(),
+            "type_codes": self.type_codes.tolist(),
+            "types": self.types,
+        }
+        self.metrics.observe("flush.headless", start)
+        return data
+
+    def overdue(self, today_ord: int) -> int:
+        return self._due.count(0, today_ord + 1)
+
+    def due_within(self, today_ord: int, days: int) -> int:
+        """Items not yet expired that expire within ``days`` days."""
+        return self._due.count(today_ord + 1, today_ord + days + 1)
+
+    def next_due(self, today_ord: int) -> int | None:
+        return self._due.next_day(today_ord + 1)
+
+    def due_between(
+        self, start_ord: int, end_ord: int, item_type: str | None = None
+    ) -> list[tuple[int, str, str]]:
+        """Return ``(due_ord, id, item_type)`` of items due in ``[start, end)``, sorted."""
+        code = None if item_type is None else self._codes.get(item_type, -1)
+        found = [
+            (start + duration, self.ids[row], self.types[type_code])
+            for row, (start, duration, type_code) in enumerate(
+                zip(self.start, self.duration, self.type_codes)
+            )
+            if start_ord <= start + duration < end_ord and (code is None or type_code == code)
+        ]
+        found.sort()
+        return found
+
+    def add_columns(self, columns: ScheduleColumns, item_type: str | None = None) -> None:
+        """Append every item, or those of ``item_type``, to forecast ``columns``."""
+        due = array("l", map(operator.add, self.start, self.duration))
+        if item_type is None:
+            columns.extend(self.ids, due, self.duration, self.type_codes, self.types)
+            return
+        code = self._codes.get(item_type)
+        rows = [row for row, type_code in enumerate(self.type_codes) if type_code == code]
+        columns.extend(
+            [self.ids[row] for row in rows],
+            array("l", (due[row] for row in rows)),
+            array("l", (self.duration[row] for row in rows)),
+            array("H", [code] * len(rows)),
+            self.types,
+        )
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the items, id strings included."""
+        return (
+            sys.getsizeof(self.ids)
+            + sum(map(sys.getsizeof, self.ids))
+            + sys.getsizeof(self._rows)
+            + sys.getsizeof(self.start)
+            + sys.getsizeof(self.duration)
+            + sys.getsizeof(self.type_codes)
+            + sys.getsizeof(self._due)
+        )
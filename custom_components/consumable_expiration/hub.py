@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from typing import Any, Iterable, Mapping
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    CONF_NAME,
+    CONF_ITEM_TYPE,
+    CONF_ICON,
+    CONF_DURATION_DAYS,
+    CONF_START_DATE,
+    CONF_USAGE_ENTITY,
+    CONF_USAGE_MODE,
+    CONF_USAGE_LIMIT,
+    CONF_THRESHOLDS,
+    CONF_PARENT_DEVICE,
+    CONF_AREA,
+)
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Seconds to wait for more changes before writing the collection to disk
+SAVE_DELAY = 10
+
+ITEM_FIELDS = (CONF_NAME, CONF_ITEM_TYPE, CONF_ICON, CONF_DURATION_DAYS, CONF_START_DATE)
+# Only stored for usage-based consumables
+USAGE_FIELDS = (CONF_USAGE_ENTITY, CONF_USAGE_MODE, CONF_USAGE_LIMIT)
+# Only stored when an item overrides the hub's thresholds or device placement
+OPTIONAL_FIELDS = (*USAGE_FIELDS, CONF_THRESHOLDS, CONF_PARENT_DEVICE, CONF_AREA)
+
+
+def _item(values: Mapping[str, Any]) -> dict[str, Any]:
+    item = {field: values.get(field) for field in ITEM_FIELDS}
+    item.update((field, values[field]) for field in OPTIONAL_FIELDS if values.get(field) is not None)
+    return item
+
+
+def storage_key(entry_id: str) -> str:
+    return f"{DOMAIN}.{entry_id}"
+
+
+async def async_remove_collection(hass: HomeAssistant, entry_id: str) -> None:
+    await Store(hass, STORAGE_VERSION, storage_key(entry_id)).async_remove()
+
+
+class ConsumableCollection:
+    """Consumables owned by a hub entry, kept in their own Store.
+
+    Items are plain dicts keyed by item id using the same field names as a
+    single consumable's entry data and options. Every change schedules a
+    delayed save, so bursts of updates reach disk as a single write.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, metrics: Metrics | None = None
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.metrics = metrics or Metrics()
+        self.items: dict[str, dict[str, Any]] = {}
+        self._store: Store = Store(hass, STORAGE_VERSION, storage_key(entry.entry_id))
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not data:
+            return
+        self.items = {item["id"]: _item(item) for item in data.get("items", [])}
+        _LOGGER.debug("Loaded %d consumables for hub %s", len(self.items), self.entry.entry_id)
+
+    @callback
+    def async_add(self, values: Mapping[str, Any], item_id: str | None = None) -> str:
+        item_id = item_id or uuid.uuid4().hex
+        self.items[item_id] = _item(values)
+        self._async_schedule_save()
+        return item_id
+
+    @callback
+    def async_update(self, item_id: str, changes: Mapping[str, Any]) -> dict[str, Any]:
+        item = self.items[item_id]
+        for key, value in changes.items():
+            if key in ITEM_FIELDS:
+                item[key] = value
+            elif key in OPTIONAL_FIELDS:
+                if value is None:
+                    item.pop(key, None)
+                else:
+                    item[key] = value
+        self._async_schedule_save()
+        return item
+
+    @callback
+    def async_remove(self, item_ids: Iterable[str]) -> None:
+        for item_id in item_ids:
+            self.items.pop(item_id, None)
+        self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        # Called by the store right before it writes
+        start = self.metrics.start()
+        data = {"items": [{"id": item_id, **item} for item_id, item in self.items.items()]}
+        self.metrics.observe("flush.hub", start)
+        return data
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable, NamedTuple
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class IndexEntry(NamedTuple):
+    key: str
+    unique_id: str | None
+    config_entry_id: str | None
+
+
+class EntityIndex:
+    """Two-way index of the integration's entities.
+
+    Maps entity ids to consumable keys, unique ids and config entries, and
+    back. Every lookup and update is a dict operation, and dropping an
+    entry or a consumable only touches that entry's own entities.
+    """
+
+    def __init__(self) -> None:
+        self._entities: dict[str, IndexEntry] = {}
+        self._by_unique_id: dict[str, str] = {}
+        self._by_key: dict[str, set[str]] = {}
+        self._by_entry: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, entity_id: object) -> bool:
+        return entity_id in self._entities
+
+    def add(
+        self,
+        entity_id: str,
+        key: str,
+        unique_id: str | None = None,
+        config_entry_id: str | None = None,
+    ) -> None:
+        if entity_id in self._entities:
+            self.remove(entity_id)
+        self._entities[entity_id] = IndexEntry(key, unique_id, config_entry_id)
+        if unique_id is not None:
+            self._by_unique_id[unique_id] = entity_id
+        self._by_key.setdefault(key, set()).add(entity_id)
+        if config_entry_id is not None:
+            self._by_entry.setdefault(config_entry_id, set()).add(entity_id)
+
+    def remove(self, entity_id: str) -> IndexEntry | None:
+        entry = self._entities.pop(entity_id, None)
+        if entry is None:
+            return None
+        if entry.unique_id is not None and self._by_unique_id.get(entry.unique_id) == entity_id:
+            del self._by_unique_id[entry.unique_id]
+        _discard(self._by_key, entry.key, entity_id)
+        if entry.config_entry_id is not None:
+            _discard(self._by_entry, entry.config_entry_id, entity_id)
+        return entry
+
+    def rename(self, old_entity_id: str, new_entity_id: str) -> None:
+        entry = self.remove(old_entity_id)
+        if entry is not None:
+            self.add(new_entity_id, *entry)
+
+    def set_config_entry(self, entity_id: str, config_entry_id: str | None) -> None:
+        entry = self._entities.get(entity_id)
+        if entry is not None and entry.config_entry_id != config_entry_id:
+            self.add(entity_id, entry.key, entry.unique_id, config_entry_id)
+
+    def key_for(self, entity_id: str) -> str | None:
+        entry = self._entities.get(entity_id)
+        return entry.key if entry else None
+
+    def entity_id_for(self, unique_id: str) -> str | None:
+        return self._by_unique_id.get(unique_id)
+
+    def remove_config_entry(self, config_entry_id: str) -> list[str]:
+        """Forget every entity of ``config_entry_id`` and return their ids."""
+        entity_ids = list(self._by_entry.get(config_entry_id, ()))
+        for entity_id in entity_ids:
+            self.remove(entity_id)
+        return entity_ids
+
+    def remove_key(self, key: str) -> list[str]:
+        """Forget every entity of consumable ``key`` and return their ids."""
+        entity_ids = list(self._by_key.get(key, ()))
+        for entity_id in entity_ids:
+            self.remove(entity_id)
+        return entity_ids
+
+
+def _discard(mapping: dict[str, set[str]], name: str, entity_id: str) -> None:
+    members = mapping.get(name)
+    if members is not None:
+        members.discard(entity_id)
+        if not members:
+            del mapping[name]
+
+
+@callback
+def async_track_entity_registry(hass: HomeAssistant, index: EntityIndex) -> Callable[[], None]:
+    """Keep ``index`` in sync with renames, removals and re-parenting in the registry."""
+
+    @callback
+    def _async_registry_updated(event: Event) -> None:
+        data = event.data
+        entity_id = data["entity_id"]
+        if data["action"] == "remove":
+            if index.remove(entity_id):
+                _LOGGER.debug("Dropped removed entity %s from the index", entity_id)
+            return
+        if data["action"] != "update":
+            return
+        old_entity_id = data.get("old_entity_id")
+        if old_entity_id is not None and old_entity_id in index:
+            _LOGGER.debug("Entity %s renamed to %s", old_entity_id, entity_id)
+            index.rename(old_entity_id, entity_id)
+        if "config_entry_id" in data.get("changes", {}) and entity_id in index:
+            ent = er.async_get(hass).async_get(entity_id)
+            if ent is not None:
+                index.set_config_entry(entity_id, ent.config_entry_id)
+
+    return hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _async_registry_updated)
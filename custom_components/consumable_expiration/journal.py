@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Any, Callable, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, HISTORY_REMOVED, HISTORY_REPLACED
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Records kept per consumable; older ones are folded into summary stats
+HISTORY_LIMIT = 25
+# Seconds to wait for more records before appending them to disk
+FLUSH_DELAY = 5
+# Lines appended since the last rewrite before the journal is compacted
+COMPACT_INTERVAL = 500
+
+# Summary lines carry the stats of records dropped from the ring buffer
+EVENT_SUMMARY = "summary"
+
+
+class LifespanStats:
+    """Running count, mean and variance of lifespans (Welford)."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0) -> None:
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: LifespanStats) -> LifespanStats:
+        count = self.count + other.count
+        if not count:
+            return LifespanStats()
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.count / count
+        m2 = self.m2 + other.m2 + delta * delta * self.count * other.count / count
+        return LifespanStats(count, mean, m2)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_days": round(self.mean, 1) if self.count else None,
+            "stddev_days": round(math.sqrt(self.m2 / self.count), 1) if self.count > 1 else None,
+        }
+
+
+def lifespan(record: dict[str, Any]) -> int | None:
+    """Return the days a replaced consumable was in use, if known."""
+    if record.get("ev") != HISTORY_REPLACED or not record.get("old"):
+        return None
+    return record["new"] - record["old"]
+
+
+def _dump(record: dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+_decoder = json.JSONDecoder()
+# Every line starts with the key, then the event
+_KEY_PREFIX = '{"k":'
+_REMOVED_EVENT = f'"ev":"{HISTORY_REMOVED}"'
+
+
+def _line_key(text: str) -> tuple[str | None, bool]:
+    """Return the key of a journal line and whether it removes the consumable.
+
+    Only the key and event are decoded; the rest of the line is left for
+    the history query that needs it.
+    """
+    try:
+        if text.startswith(_KEY_PREFIX):
+            key, end = _decoder.raw_decode(text, len(_KEY_PREFIX))
+            return key, text.startswith(_REMOVED_EVENT, end + 1)
+        # Not written by this module; decode it all
+        record = json.loads(text)
+        return record["k"], record.get("ev") == HISTORY_REMOVED
+    except (ValueError, KeyError, TypeError):
+        return None, False
+
+
+def _index_lines(lines: Iterable[bytes], start: int, offsets: dict[str, list[int]]) -> int:
+    """Add the byte offset of each line to its key in ``offsets``; return the line count."""
+    pos = start
+    count = 0
+    for line in lines:
+        count += 1
+        key, removed = _line_key(line.decode("utf-8", "replace"))
+        if key is None:
+            _LOGGER.debug("Skipping malformed journal line %r", line)
+        elif removed:
+            # Nothing before a removal is part of the history any more
+            offsets.pop(key, None)
+        else:
+            offsets.setdefault(key, []).append(pos)
+        pos += len(line)
+    return count
+
+
+def _scan(path: str) -> tuple[dict[str, list[int]], int]:
+    """Return the offsets of every key's lines and the number of lines."""
+    offsets: dict[str, list[int]] = {}
+    try:
+        with open(path, "rb") as handle:
+            return offsets, _index_lines(handle, 0, offsets)
+    except FileNotFoundError:
+        return offsets, 0
+
+
+def _read_at(path: str, offsets: list[int]) -> list[str]:
+    if not offsets:
+        return []
+    with open(path, "rb") as handle:
+        lines = []
+        for offset in offsets:
+            handle.seek(offset)
+            lines.append(handle.readline().decode("utf-8"))
+        return lines
+
+
+def _append_lines(path: str, lines: list[bytes]) -> int:
+    """Append ``lines`` and return the offset the first one was written at."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as handle:
+        start = handle.seek(0, os.SEEK_END)
+        handle.writelines(lines)
+    return start
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return handle.readlines()
+    except FileNotFoundError:
+        return []
+
+
+def _write_lines(path: str, lines: list[bytes]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+class _History:
+    """Newest records of one consumable plus stats of the older ones."""
+
+    __slots__ = ("records", "dropped")
+
+    def __init__(self) -> None:
+        self.records: deque[dict[str, Any]] = deque()
+        self.dropped = LifespanStats()
+
+    def apply(self, record: dict[str, Any], limit: int) -> None:
+        event = record["ev"]
+        if event == HISTORY_REMOVED:
+            self.records.clear()
+            self.dropped = LifespanStats()
+            return
+        if event == EVENT_SUMMARY:
+            self.dropped = self.dropped.merge(LifespanStats(record["c"], record["m"], record["q"]))
+            return
+        self.records.append(record)
+        while len(self.records) > limit:
+            days = lifespan(self.records.popleft())
+            if days is not None:
+                self.dropped.add(days)
+
+    def stats(self) -> LifespanStats:
+        retained = LifespanStats()
+        for days in _lifespans(self.records):
+            retained.add(days)
+        return self.dropped.merge(retained)
+
+
+class ReplacementJournal:
+    """Append-only log of start date changes, kept outside config entries.
+
+    Records are buffered and appended to a JSON Lines file in ``.storage``.
+    The first history query scans the file once for the byte offsets of
+    each consumable's lines, decoding only their keys. Queries then read
+    and parse just the lines of the consumable asked for. Each consumable
+    keeps its newest ``limit`` records; older ones survive as lifespan
+    stats written into summary lines when the journal is compacted, which
+    also bounds the offsets kept per consumable.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, limit: int = HISTORY_LIMIT, metrics: Metrics | None = None
+    ) -> None:
+        self.hass = hass
+        self.limit = limit
+        self.metrics = metrics or Metrics()
+        self.path = hass.config.path(".storage", f"{DOMAIN}.journal")
+        self._pending: list[dict[str, Any]] = []
+        self._unsub_flush: Callable[[], None] | None = None
+        self._lock = asyncio.Lock()
+        # key -> byte offsets of its lines on disk, once the file was scanned
+        self._offsets: dict[str, list[int]] | None = None
+        self._lines_since_compact = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._offsets is not None
+
+    @callback
+    def async_record(self, key: str, event: str, old: int | None = None, new: int | None = None) -> None:
+        """Buffer a journal record for ``key``; ``old`` and ``new`` are date ordinals."""
+        record: dict[str, Any] = {"k": key, "ev": event, "t": int(dt_util.utcnow().timestamp())}
+        if event != HISTORY_REMOVED:
+            record["old"] = old
+            record["new"] = new
+        self._pending.append(record)
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, FLUSH_DELAY, self._async_flush_later)
+
+    @callback
+    def _async_flush_later(self, _now: Any) -> None:
+        self._unsub_flush = None
+        self.hass.async_create_task(self.async_flush())
+
+    async def async_flush(self, *_: Any) -> None:
+        if self._unsub_flush:
+            self._unsub_flush()
+            self._unsub_flush = None
+        async with self._lock:
+            records, self._pending = self._pending, []
+            if not records:
+                return
+            start = self.metrics.start()
+            lines = [_dump(record).encode("utf-8") for record in records]
+            offset = await self.hass.async_add_executor_job(_append_lines, self.path, lines)
+            if self._offsets is not None:
+                _index_lines(lines, offset, self._offsets)
+            self.metrics.observe("flush.journal", start)
+            self._lines_since_compact += len(lines)
+        if self._lines_since_compact >= COMPACT_INTERVAL:
+            await self.async_compact()
+
+    async def async_load(self) -> None:
+        """Scan the journal file once for line offsets; later calls return immediately."""
+        if self._offsets is not None:
+            return
+        async with self._lock:
+            if self._offsets is not None:
+                return
+            offsets, lines = await self.hass.async_add_executor_job(_scan, self.path)
+            self._offsets = offsets
+            # Each consumable keeps at most a summary line and ``limit`` records
+            retained = sum(min(len(key_offsets), self.limit + 1) for key_offsets in offsets.values())
+            self._lines_since_compact = max(lines - retained, 0)
+            _LOGGER.debug("Indexed %d journal lines for %d consumables", lines, len(offsets))
+        if self._lines_since_compact >= COMPACT_INTERVAL:
+            await self.async_compact()
+
+    async def async_compact(self) -> None:
+        """Rewrite the file as one summary line per consumable plus retained records."""
+        await self.async_load()
+        async with self._lock:
+            # Buffered records are not on disk yet; they are appended after the rewrite
+            histories: dict[str, _History] = {}
+            for line in await self.hass.async_add_executor_job(_read_lines, self.path):
+                try:
+                    record = json.loads(line)
+                    histories.setdefault(record["k"], _History()).apply(record, self.limit)
+                except (ValueError, KeyError, TypeError):
+                    _LOGGER.debug("Skipping malformed journal line %r", line)
+            lines: list[bytes] = []
+            for key, history in histories.items():
+                stats = history.dropped
+                if stats.count:
+                    summary = {"k": key, "ev": EVENT_SUMMARY, "c": stats.count, "m": stats.mean, "q": stats.m2}
+                    lines.append(_dump(summary).encode("utf-8"))
+            for history in histories.values():
+                lines.extend(_dump(record).encode("utf-8") for record in history.records)
+            await self.hass.async_add_executor_job(_write_lines, self.path, lines)
+            self._offsets = {}
+            _index_lines(lines, 0, self._offsets)
+            self._lines_since_compact = 0
+            _LOGGER.debug("Compacted journal to %d lines", len(lines))
+
+    async def async_history(self, key: str, limit: int | None = None) -> dict[str, Any]:
+        """Return the newest records for ``key``, newest first, and its lifespan stats."""
+        await self.async_load()
+        async with self._lock:
+            lines = await self.hass.async_add_executor_job(
+                _read_at, self.path, list(self._offsets.get(key, ()))
+            )
+            pending = [record for record in self._pending if record["k"] == key]
+        history = _History()
+        for line in lines:
+            try:
+                history.apply(json.loads(line), self.limit)
+            except (ValueError, KeyError, TypeError):
+                _LOGGER.debug("Skipping malformed journal line %r", line)
+        for record in pending:
+            history.apply(record, self.limit)
+        records = history.records
+        count = len(records) if limit is None else min(limit, len(records))
+        newest = [records[-1 - i] for i in range(count)]
+        return {
+            "records": [_record_view(record) for record in newest],
+            "stats": history.stats().as_dict(),
+        }
+
+
+def _lifespans(records: Iterable[dict[str, Any]]) -> Iterable[int]:
+    for record in records:
+        days = lifespan(record)
+        if days is not None:
+            yield days
+
+
+def _record_view(record: dict[str, Any]) -> dict[str, Any]:
+    old = record.get("old")
+    new = record.get("new")
+    return {
+        "event": record["ev"],
+        "at": dt_util.utc_from_timestamp(record["t"]).isoformat(),
+        "previous_start_date": dt.date.fromordinal(old).isoformat() if old else None,
+        "start_date": dt.date.fromordinal(new).isoformat() if new else None,
+        "lifespan_days": lifespan(record),
+    }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any
+
+# Upper bounds of the latency buckets in milliseconds; the last one is open
+BUCKETS_MS = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 4) if self.count else None,
+            "max_ms": round(self.max, 4),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class Metrics:
+    """Counters and latency histograms for the integration's hot paths.
+
+    Collection is off unless something holds it on through ``acquire``.
+    While off, ``start`` returns None and every other call returns after a
+    single attribute check, so the instrumentation can stay in place. Only
+    ``count`` records regardless, for counters cheap enough to always keep.
+
+    Typical use::
+
+        start = metrics.start()
+        ...
+        metrics.observe("flush.options", start)
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._holders = 0
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def acquire(self) -> None:
+        self._holders += 1
+        self.enabled = True
+
+    def release(self) -> None:
+        self._holders = max(self._holders - 1, 0)
+        self.enabled = self._holders > 0
+
+    def start(self) -> float | None:
+        return time.perf_counter() if self.enabled else None
+
+    def observe(self, name: str, start: float | None) -> None:
+        if start is None:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add((time.perf_counter() - start) * 1000)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment ``name`` whether or not collection is on."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def total(self, prefix: str) -> int:
+        """Return how many observations were made under ``prefix``."""
+        return sum(
+            histogram.count
+            for name, histogram in self.histograms.items()
+            if name == prefix or name.startswith(f"{prefix}.")
+        )
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.histograms.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "histograms": {name: h.as_dict() for name, h in sorted(self.histograms.items())},
+        }
@@ -0,0 +1,268 @@
+"""Offline report of every consumable, read straight from ``.storage``.
+
+Runs without Home Assistant, for audits and cron jobs on the host::
+
+    python3 custom_components/consumable_expiration/report.py --config /config
+    python3 custom_components/consumable_expiration/report.py --config /config --format csv
+
+Days remaining, due dates and percent used come from the same
+:class:`ConsumableSpec` the sensors use, for today in Home Assistant's
+time zone unless ``--date`` is given. Nothing here imports
+``homeassistant``.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Iterator, Sequence, TextIO
+
+if __package__:
+    from .const import (
+        CONF_ENTRY_TYPE,
+        CONF_ITEM_TYPE,
+        CONF_NAME,
+        DOMAIN,
+        ENTRY_TYPE_HUB,
+    )
+    from .spec import ConsumableSpec
+else:
+    # Run as a script: load the plain modules without the package's
+    # __init__, which needs Home Assistant
+    import importlib
+    import types
+
+    # The script's own directory would shadow the standard calendar module
+    if sys.path and Path(sys.path[0] or ".").resolve() == Path(__file__).resolve().parent:
+        del sys.path[0]
+    if "consumable_expiration" not in sys.modules:
+        _package = types.ModuleType("consumable_expiration")
+        _package.__path__ = [str(Path(__file__).resolve().parent)]
+        sys.modules["consumable_expiration"] = _package
+    _const = importlib.import_module("consumable_expiration.const")
+    CONF_ENTRY_TYPE = _const.CONF_ENTRY_TYPE
+    CONF_ITEM_TYPE = _const.CONF_ITEM_TYPE
+    CONF_NAME = _const.CONF_NAME
+    DOMAIN = _const.DOMAIN
+    ENTRY_TYPE_HUB = _const.ENTRY_TYPE_HUB
+    ConsumableSpec = importlib.import_module("consumable_expiration.spec").ConsumableSpec
+
+FORMATS = ("table", "csv", "json")
+COLUMNS = (
+    "id",
+    "name",
+    "item_type",
+    "source",
+    "start_date",
+    "duration_days",
+    "due_date",
+    "days_remaining",
+    "percent_used",
+    "expired",
+)
+
+# Characters read from core.config_entries at a time
+CHUNK_SIZE = 1 << 16
+# Strings, possibly cut off at the end of the buffer, and brackets
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*(?P<end>"|\\?\Z)|[{}\[\]]')
+
+
+class _Reader:
+    """Text of a file read on demand, dropping what was consumed."""
+
+    def __init__(self, handle: TextIO) -> None:
+        self.handle = handle
+        self.text = ""
+        self.pos = 0
+
+    def more(self) -> bool:
+        chunk = self.handle.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip(self, chars: str) -> str:
+        """Skip ``chars`` and return the next character, or "" at the end."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in chars:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ""
+
+    def find(self, needle: str) -> bool:
+        """Move past the first ``needle``; return False if there is none."""
+        while True:
+            found = self.text.find(needle, self.pos)
+            if found >= 0:
+                self.pos = found + len(needle)
+                return True
+            # Keep enough to match a needle split across chunks
+            self.pos = max(self.pos, len(self.text) - len(needle) + 1)
+            if not self.more():
+                return False
+
+    def value(self) -> str:
+        """Return the raw text of the object or array at the current position."""
+        depth = 0
+        scan = self.pos
+        while True:
+            match = _TOKENS.search(self.text, scan)
+            if match is None or match.group("end") not in (None, '"'):
+                # The buffer ends inside the value or one of its strings
+                scan = match.start() if match else len(self.text)
+                offset = self.pos
+                if not self.more():
+                    raise ValueError("core.config_entries ends inside an entry")
+                scan -= offset
+                continue
+            scan = match.end()
+            token = match.group()
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+                if not depth:
+                    raw = self.text[self.pos:scan]
+                    self.pos = scan
+                    return raw
+
+
+def iter_domain_entries(handle: TextIO, domain: str = DOMAIN) -> Iterator[dict[str, Any]]:
+    """Yield the config entries of ``domain`` from ``core.config_entries``.
+
+    The file is read in chunks and the ``entries`` array is split into
+    entries by their brackets. Only entries that mention ``domain`` are
+    decoded; the others are dropped undecoded, so memory stays at about
+    one chunk plus one entry whatever the size of the file.
+    """
+    marker = f'"{domain}"'
+    reader = _Reader(handle)
+    if not reader.find('"entries"') or reader.skip(" \t\r\n:") != "[":
+        return
+    reader.pos += 1
+    while reader.skip(" \t\r\n,") not in ("]", ""):
+        raw = reader.value()
+        if marker not in raw:
+            continue
+        entry = json.loads(raw)
+        if isinstance(entry, dict) and entry.get("domain") == domain:
+            yield entry
+
+
+def _load_store(storage: Path, key: str) -> dict[str, Any] | None:
+    path = storage / key
+    if not path.is_file():
+        return None
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle).get("data")
+
+
+def _today(storage: Path) -> dt.date:
+    """Return today in Home Assistant's time zone, or the host's."""
+    core = _load_store(storage, "core.config") or {}
+    try:
+        from zoneinfo import ZoneInfo
+
+        return dt.datetime.now(ZoneInfo(core["time_zone"])).date()
+    except Exception:  # noqa: BLE001 - no zone data or no time zone configured
+        return dt.date.today()
+
+
+def _row(key: str, source: str, info: dict[str, Any], spec: ConsumableSpec, today_ord: int) -> dict[str, Any]:
+    snap = spec.snapshot(today_ord)
+    return {
+        "id": key,
+        "name": info.get(CONF_NAME),
+        "item_type": info.get(CONF_ITEM_TYPE),
+        "source": source,
+        "start_date": spec.start_date.isoformat() if spec.start_date else None,
+        "duration_days": spec.duration,
+        "due_date": spec.due_date.isoformat() if spec.due_date else None,
+        "days_remaining": snap.remaining if snap else None,
+        "percent_used": snap.percent_used if snap else None,
+        "expired": snap.expired if snap else None,
+    }
+
+
+def collect_rows(config_dir: Path, today: dt.date | None = None, headless: bool = False) -> list[dict[str, Any]]:
+    """Return one row per consumable, sorted by due date; undated ones last."""
+    storage = config_dir / ".storage"
+    with open(storage / "core.config_entries", encoding="utf-8") as handle:
+        entries = list(iter_domain_entries(handle))
+    today = today or _today(storage)
+    today_ord = today.toordinal()
+    rows: list[dict[str, Any]] = []
+    for entry in entries:
+        data = entry.get("data") or {}
+        options = entry.get("options") or {}
+        entry_id = entry["entry_id"]
+        if data.get(CONF_ENTRY_TYPE) != ENTRY_TYPE_HUB:
+            spec = ConsumableSpec.from_entry(entry_id, options, data)
+            rows.append(_row(entry_id, "entry", data, spec, today_ord))
+            continue
+        collection = _load_store(storage, f"{DOMAIN}.{entry_id}") or {}
+        for item in collection.get("items", []):
+            rows.append(_row(item["id"], "hub", item, ConsumableSpec.from_options(item["id"], item, {}), today_ord))
+        stock = _load_store(storage, f"{DOMAIN}.{entry_id}.headless") if headless else None
+        if stock:
+            types = stock["types"]
+            for item_id, start, duration, code in zip(
+                stock["ids"], stock["start"], stock["duration"], stock["type_codes"]
+            ):
+                spec = ConsumableSpec(item_id, duration, start)
+                rows.append(_row(item_id, "headless", {CONF_ITEM_TYPE: types[code]}, spec, today_ord))
+    rows.sort(key=lambda row: (row["due_date"] is None, row["due_date"] or "", row["id"]))
+    return rows
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return str(value)
+
+
+def write_report(rows: Sequence[dict[str, Any]], fmt: str, out: TextIO) -> None:
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+        return
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    cells = [[_cell(row[column]) for column in COLUMNS] for row in rows]
+    widths = [max([len(column), *(len(line[i]) for line in cells)]) for i, column in enumerate(COLUMNS)]
+    for line in (list(COLUMNS), ["-" * width for width in widths], *cells):
+        out.write("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip())
+        out.write("\n")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Report consumables from Home Assistant's stored data.")
+    parser.add_argument("--config", default="/config", help="Home Assistant configuration directory")
+    parser.add_argument("--format", choices=FORMATS, default="table")
+    parser.add_argument("--date", type=dt.date.fromisoformat, help="Report as of this day (YYYY-MM-DD)")
+    parser.add_argument("--headless", action="store_true", help="Include the hub's headless items")
+    args = parser.parse_args(argv)
+    try:
+        rows = collect_rows(Path(args.config), args.date, args.headless)
+    except (OSError, ValueError) as err:
+        print(f"error: {err}", file=sys.stderr)
+        return 1
+    write_report(rows, args.format, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Iterable, Mapping, TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import (
+    DOMAIN,
+    CONF_NAME,
+    CONF_ITEM_TYPE,
+    CONF_ENTRY_TYPE,
+    CONF_DURATION_DAYS,
+    CONF_START_DATE,
+    CONF_START_ORD,
+    CONF_DUE_ORD,
+    ENTRY_TYPE_HUB,
+    SIGNAL_ITEMS_ADDED,
+    SIGNAL_SPEC_UPDATED,
+    SENSOR_UNIQUE_ID_SUFFIX,
+    BUTTON_UNIQUE_ID_SUFFIX,
+    EXPIRED_UNIQUE_ID_SUFFIX,
+    DUE_SOON_UNIQUE_ID_SUFFIX,
+    HISTORY_DATE_CHANGED,
+    HISTORY_REPLACED,
+)
+from .metrics import Metrics
+from .spec import ConsumableSpec, parse_start_date, schedule_options
+
+if TYPE_CHECKING:
+    from .aggregates import Aggregates
+    from .devices import DeviceInfoCache
+    from .headless import HeadlessStore
+    from .hub import ConsumableCollection
+    from .index import EntityIndex
+    from .journal import ReplacementJournal
+    from .thresholds import ThresholdNotifier
+    from .usage import UsageTracker
+    from .writer import OptionsWriter
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consumables are keyed by their config entry id, or by item id inside a hub.
+
+
+def key_from_unique_id(unique_id: str) -> str | None:
+    for suffix in (
+        SENSOR_UNIQUE_ID_SUFFIX,
+        BUTTON_UNIQUE_ID_SUFFIX,
+        EXPIRED_UNIQUE_ID_SUFFIX,
+        DUE_SOON_UNIQUE_ID_SUFFIX,
+    ):
+        if unique_id.endswith(suffix):
+            return unique_id[: -len(suffix)]
+    return None
+
+
+def is_hub_entry(entry: ConfigEntry) -> bool:
+    return entry.data.get(CONF_ENTRY_TYPE) == ENTRY_TYPE_HUB
+
+
+def get_hub(hass: HomeAssistant) -> ConsumableCollection | None:
+    return hass.data[DOMAIN].get("hub")
+
+
+def get_headless(hass: HomeAssistant) -> HeadlessStore | None:
+    return hass.data[DOMAIN].get("headless")
+
+
+def get_aggregates(hass: HomeAssistant) -> Aggregates:
+    return hass.data[DOMAIN]["aggregates"]
+
+
+def get_devices(hass: HomeAssistant) -> DeviceInfoCache:
+    return hass.data[DOMAIN]["devices"]
+
+
+def get_thresholds(hass: HomeAssistant) -> ThresholdNotifier:
+    return hass.data[DOMAIN]["thresholds"]
+
+
+def get_index(hass: HomeAssistant) -> EntityIndex:
+    return hass.data[DOMAIN]["index"]
+
+
+def get_writer(hass: HomeAssistant) -> OptionsWriter:
+    return hass.data[DOMAIN]["writer"]
+
+
+def get_metrics(hass: HomeAssistant) -> Metrics:
+    return hass.data[DOMAIN]["metrics"]
+
+
+def get_journal(hass: HomeAssistant) -> ReplacementJournal | None:
+    return hass.data[DOMAIN].get("journal")
+
+
+def get_usage(hass: HomeAssistant) -> UsageTracker | None:
+    return hass.data[DOMAIN].get("usage")
+
+
+@callback
+def async_add_consumable_entities(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    factory: Callable[[str, Mapping[str, Any]], Entity],
+) -> None:
+    """Add one entity per consumable owned by ``entry``.
+
+    ``factory`` is called with the consumable key and the mapping holding
+    its name, item type and icon. Hub entries also add entities for items
+    created after setup.
+    """
+    if not is_hub_entry(entry):
+        async_add_entities([factory(entry.entry_id, entry.data)])
+        return
+
+    hub = get_hub(hass)
+
+    @callback
+    def _async_add_items(item_ids: Iterable[str]) -> None:
+        async_add_entities(
+            [factory(item_id, hub.items[item_id]) for item_id in item_ids if item_id in hub.items]
+        )
+
+    _async_add_items(list(hub.items))
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ITEMS_ADDED.format(entry.entry_id), _async_add_items
+        )
+    )
+
+
+@callback
+def async_set_spec(hass: HomeAssistant, key: str, spec: ConsumableSpec) -> None:
+    """Publish a new spec for ``key`` and refresh the entities that show it."""
+    hass.data[DOMAIN]["specs"][key] = spec
+    async_dispatcher_send(hass, SIGNAL_SPEC_UPDATED.format(key))
+
+
+def consumable_name(hass: HomeAssistant, key: str) -> str:
+    hub = get_hub(hass)
+    if hub is not None and key in hub.items:
+        return hub.items[key].get(CONF_NAME) or key
+    entry = hass.config_entries.async_get_entry(key)
+    if entry is None:
+        return key
+    return entry.data.get(CONF_NAME) or entry.title or key
+
+
+def consumable_item_type(hass: HomeAssistant, key: str) -> str | None:
+    hub = get_hub(hass)
+    if hub is not None and key in hub.items:
+        return hub.items[key].get(CONF_ITEM_TYPE)
+    entry = hass.config_entries.async_get_entry(key)
+    return entry.data.get(CONF_ITEM_TYPE) if entry else None
+
+
+def current_spec(hass: HomeAssistant, key: str) -> ConsumableSpec | None:
+    spec = hass.data[DOMAIN].get("specs", {}).get(key)
+    if spec is not None:
+        return spec
+    # Entry exists but is not loaded; read its stored options directly
+    entry = hass.config_entries.async_get_entry(key)
+    if entry is None:
+        return None
+    return ConsumableSpec.from_entry(key, entry.options, entry.data)
+
+
+def entry_updates(spec: ConsumableSpec | None, updates: Mapping[str, Any]) -> dict[str, Any]:
+    """Expand start date and duration ``updates`` into an entry's ordinal fields."""
+    if CONF_START_DATE not in updates and CONF_DURATION_DAYS not in updates:
+        return dict(updates)
+    start = parse_start_date(updates.get(CONF_START_DATE))
+    start_ord = start.toordinal() if start else (spec.start_ord if spec else None)
+    duration = updates.get(CONF_DURATION_DAYS, spec.duration if spec else None)
+    try:
+        return {**updates, **schedule_options(duration, start_ord)}
+    except ValueError:
+        # Clear the ordinals so they do not outlive the schedule they were computed from
+        return {**updates, CONF_START_ORD: None, CONF_DUE_ORD: None}
+
+
+@callback
+def async_update_consumable(
+    hass: HomeAssistant, key: str, updates: Mapping[str, Any], replaced: bool = False
+) -> ConsumableSpec:
+    """Persist option ``updates`` for consumable ``key`` and return its new spec.
+
+    Start date changes are recorded in the replacement journal. ``replaced``
+    records a replacement, even when the start date stays the same, and also
+    restarts the consumable's usage counter.
+    """
+    old = current_spec(hass, key)
+    hub = get_hub(hass)
+    if hub is not None and key in hub.items:
+        item = hub.async_update(key, updates)
+        spec = ConsumableSpec.from_options(key, item, {})
+        async_set_spec(hass, key, spec)
+    else:
+        entry = hass.config_entries.async_get_entry(key)
+        # The write-behind buffer persists the options shortly after
+        options = get_writer(hass).async_set(entry, entry_updates(old, updates))
+        _LOGGER.debug("Updating entry %s options to %s", key, options)
+        spec = ConsumableSpec.from_entry(key, options, entry.data)
+        if key in hass.data[DOMAIN]["specs"]:
+            async_set_spec(hass, key, spec)
+    usage = get_usage(hass)
+    if replaced and usage is not None:
+        usage.async_reset(key)
+    journal = get_journal(hass)
+    old_start = old.start_ord if old else None
+    # A second replacement on the same day is still a replacement
+    if journal is not None and (replaced or spec.start_ord != old_start):
+        journal.async_record(
+            key,
+            HISTORY_REPLACED if replaced else HISTORY_DATE_CHANGED,
+            old_start,
+            spec.start_ord,
+        )
+    return spec
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import datetime as dt
+import heapq
+import itertools
+import logging
+from typing import Callable, Hashable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+TransitionAction = Callable[[dt.datetime], None]
+
+
+def local_midnight(ordinal: int) -> dt.datetime:
+    """Return the aware datetime at which the local day ``ordinal`` starts."""
+    return dt_util.start_of_local_day(dt.date.fromordinal(ordinal))
+
+
+class ExpiryScheduler:
+    """Single timer shared by every consumable in the domain.
+
+    Each key owns at most one pending transition. Transitions live in a
+    min-heap ordered by timestamp and only the earliest one is armed with
+    Home Assistant's event helper, so the integration holds one timer no
+    matter how many consumables are loaded. Rescheduling or cancelling a
+    key leaves a stale heap item behind which is skipped when popped.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: Metrics | None = None) -> None:
+        self.hass = hass
+        self.metrics = metrics or Metrics()
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._pending: dict[Hashable, tuple[float, int, TransitionAction]] = {}
+        self._counter = itertools.count()
+        self._unsub_timer: Callable[[], None] | None = None
+        self._armed_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @callback
+    def async_schedule(
+        self, key: Hashable, when: dt.datetime, action: TransitionAction
+    ) -> None:
+        """Run ``action`` for ``key`` at ``when``, replacing any earlier request."""
+        ts = when.timestamp()
+        seq = next(self._counter)
+        self._pending[key] = (ts, seq, action)
+        heapq.heappush(self._heap, (ts, seq, key))
+        self._async_compact()
+        self._async_arm()
+
+    @callback
+    def async_cancel(self, key: Hashable) -> None:
+        if self._pending.pop(key, None) is None:
+            return
+        self._async_compact()
+        self._async_arm()
+
+    @callback
+    def async_shutdown(self) -> None:
+        self._pending.clear()
+        self._heap.clear()
+        self._async_disarm()
+
+    @callback
+    def _async_compact(self) -> None:
+        # Drop stale heap items once they clearly outnumber live ones
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [
+                (ts, seq, key)
+                for key, (ts, seq, _action) in self._pending.items()
+            ]
+            heapq.heapify(self._heap)
+
+    @callback
+    def _async_disarm(self) -> None:
+        if self._unsub_timer:
+            self._unsub_timer()
+        self._unsub_timer = None
+        self._armed_at = None
+
+    @callback
+    def _async_arm(self) -> None:
+        heap = self._heap
+        while heap:
+            ts, seq, key = heap[0]
+            pending = self._pending.get(key)
+            if pending is not None and pending[1] == seq:
+                break
+            heapq.heappop(heap)
+        if not heap:
+            self._async_disarm()
+            return
+        ts = heap[0][0]
+        if ts == self._armed_at:
+            return
+        self._async_disarm()
+        self._armed_at = ts
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_fire, dt_util.utc_from_timestamp(ts)
+        )
+
+    @callback
+    def _async_fire(self, now: dt.datetime) -> None:
+        self._unsub_timer = None
+        self._armed_at = None
+        start = self.metrics.start()
+        now_ts = now.timestamp()
+        due: list[TransitionAction] = []
+        heap = self._heap
+        while heap and heap[0][0] <= now_ts:
+            ts, seq, key = heapq.heappop(heap)
+            pending = self._pending.get(key)
+            if pending is None or pending[1] != seq:
+                continue
+            del self._pending[key]
+            due.append(pending[2])
+        _LOGGER.debug("Scheduler tick at %s ran %d transitions", now, len(due))
+        for action in due:
+            try:
+                action(now)
+            except Exception:  # pragma: no cover - defensive
+                _LOGGER.exception("Error running consumable transition")
+        self._async_arm()
+        self.metrics.incr("scheduler_transitions", len(due))
+        self.metrics.observe("scheduler_tick", start)
@@ -1,35 +1,105 @@
 
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
-from typing import Any
+from typing import Any, Callable, Mapping
 import logging
 
 from homeassistant.components.sensor import SensorEntity
-from homeassistant.components.sensor.const import SensorStateClass
+from homeassistant.components.sensor.const import SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_change
 from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     CONF_NAME,
-    CONF_DURATION_DAYS,
-    CONF_START_DATE,
     CONF_ICON,
+    CONF_COMPACT_STATE,
+    CONF_SOON_DAYS,
+    DEFAULT_SOON_DAYS,
+    CONF_USAGE_ENTITY,
+    CONF_USAGE_MODE,
+    SIGNAL_SPEC_UPDATED,
+    SIGNAL_USAGE_UPDATED,
+    SENSOR_UNIQUE_ID_SUFFIX,
+    USAGE_MODE_RUNTIME,
 )
+from .aggregates import ALL, Aggregates, async_groups_for
+from .headless import HeadlessStore
+from .metrics import Metrics
+from .runtime import (
+    async_add_consumable_entities,
+    consumable_name,
+    get_aggregates,
+    get_devices,
+    get_headless,
+    get_index,
+    get_metrics,
+    get_usage,
+    is_hub_entry,
+)
+from .scheduler import ExpiryScheduler, local_midnight
+from .spec import ConsumableSpec, Snapshot
+from .usage import is_usage_consumable, usage_limit, usage_unit
 
 _LOGGER = logging.getLogger(__name__)
 
 PARALLEL_UPDATES = 0
+# Only the hub's diagnostic sensors poll
+SCAN_INTERVAL = dt.timedelta(seconds=60)
+
+# Diagnostic sensor -> (value, metric name prefix whose histograms become attributes)
+METRIC_SENSORS: dict[str, tuple[Callable[[HomeAssistant, Metrics], int], str | None]] = {
+    "state_writes": (lambda hass, metrics: metrics.total("state_write"), "state_write"),
+    "scheduler_ticks": (lambda hass, metrics: metrics.total("scheduler_tick"), "scheduler_tick"),
+    "service_calls": (lambda hass, metrics: metrics.total("service"), "service"),
+    "entry_reloads": (lambda hass, metrics: metrics.total("entry_reload"), "entry_reload"),
+    "persistence_flushes": (lambda hass, metrics: metrics.total("flush"), "flush"),
+    "entity_index_size": (lambda hass, metrics: len(get_index(hass)), None),
+    "registry_fallbacks": (lambda hass, metrics: metrics.counters.get("registry_fallbacks", 0), None),
+    "writes_suppressed": (lambda hass, metrics: metrics.counters.get("writes_suppressed", 0), None),
+}
+# Metrics that go up and down; the rest only count up until a restart
+GAUGE_METRICS = frozenset({"entity_index_size"})
+
+
+# Attributes the recorder skips in compact mode; they stay on the live state
+COMPACT_UNRECORDED_ATTRIBUTES = frozenset(
+    {"start_date", "duration_days", "due_date", "days_elapsed", "percent_used", "expired"}
+)
+USAGE_UNRECORDED_ATTRIBUTES = COMPACT_UNRECORDED_ATTRIBUTES | {
+    "usage_entity",
+    "usage_mode",
+    "usage",
+    "usage_limit",
+}
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
-    entity = ConsumableExpirationSensor(hass, entry)
-    async_add_entities([entity])
+    compact = bool(entry.options.get(CONF_COMPACT_STATE))
+    async_add_consumable_entities(
+        hass,
+        entry,
+        async_add_entities,
+        lambda key, info: SENSOR_CLASSES[is_usage_consumable(info), compact](hass, entry, key, info),
+    )
+    if is_hub_entry(entry):
+        async_add_entities(
+            [
+                OverdueSensor(hass, entry),
+                DueSoonSensor(hass, entry),
+                NextDueSensor(hass, entry),
+                PercentUsedSensor(hass, entry),
+                HeadlessOverdueSensor(hass, entry),
+                HeadlessDueSoonSensor(hass, entry),
+                *(ConsumableMetricSensor(hass, entry, metric) for metric in METRIC_SENSORS),
+            ]
+        )
 
 
 class ConsumableExpirationSensor(SensorEntity):
@@ -37,99 +107,413 @@ class ConsumableExpirationSensor(SensorEntity):
     _attr_translation_key = "days_remaining"
     _attr_native_unit_of_measurement = "days"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_should_poll = False
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        key: str | None = None,
+        info: Mapping[str, Any] | None = None,
+    ) -> None:
         self.hass = hass
         self.entry = entry
-        self._attr_unique_id = f"{entry.entry_id}_days_remaining"
-        # Map entity id to entry for services
-        key = self.entity_id if self.entity_id else self._attr_unique_id
-        hass.data[DOMAIN]["entity_map"][key] = entry.entry_id
-        self._unsub_midnight = None
+        # Consumable key: the entry id, or the item id inside a hub
+        self._key = key or entry.entry_id
+        self._info = entry.data if info is None else info
+        self._attr_unique_id = f"{self._key}{SENSOR_UNIQUE_ID_SUFFIX}"
+        self._attr_device_info, shared = get_devices(hass).consumable(entry, self._key, self._info)
+        if shared:
+            # Other consumables share the device, so the name says which one this is
+            self._attr_translation_key = f"{self._attr_translation_key}_named"
+            self._attr_translation_placeholders = {"consumable": self._info.get(CONF_NAME) or "Consumable"}
+        # Local day the published state was computed for
+        self._today_ord: int | None = None
+        # (state, attributes, unit) last handed to Home Assistant
+        self._published: tuple | None = None
 
     async def async_added_to_hass(self) -> None:
-        # After entity_id is assigned
-        self.hass.data[DOMAIN]["entity_map"][self.entity_id] = self.entry.entry_id
-        # Update at startup and daily shortly after midnight
-        @callback
-        def _midnight_refresh(now):
-            self.async_write_ha_state()
-
-        self._unsub_midnight = async_track_time_change(
-            self.hass, _midnight_refresh, hour=0, minute=0, second=30
+        # After entity_id is assigned; services resolve targets through the index
+        get_index(self.hass).add(self.entity_id, self._key, self.unique_id, self.entry.entry_id)
+        get_aggregates(self.hass).async_set_groups(self._key, async_groups_for(self.hass, self._key))
+        self._today_ord = dt_util.now().date().toordinal()
+        self._schedule_next_transition()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SPEC_UPDATED.format(self._key),
+                self._handle_spec_update,
+            )
         )
 
     async def async_will_remove_from_hass(self) -> None:
-        if self._unsub_midnight:
-            self._unsub_midnight()
-            self._unsub_midnight = None
-
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        name = self.entry.data.get(CONF_NAME, "Consumable")
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.entry.entry_id)},
-            name=name,
-            manufacturer="dfiore1230",
-            model="HA Expiring Consumables",
+        self._scheduler.async_cancel(self._attr_unique_id)
+        get_index(self.hass).remove(self.entity_id)
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        metrics = get_metrics(self.hass)
+        start = metrics.start()
+        self._published = self._published_values()
+        super().async_write_ha_state()
+        metrics.observe("state_write", start)
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write the state unless it matches the last published one."""
+        if self._published is not None and self._published_values() == self._published:
+            get_metrics(self.hass).count("writes_suppressed")
+            return
+        self.async_write_ha_state()
+
+    def _published_values(self) -> tuple:
+        return (self.native_value, self.extra_state_attributes, self.native_unit_of_measurement)
+
+    @property
+    def _scheduler(self) -> ExpiryScheduler:
+        return self.hass.data[DOMAIN]["scheduler"]
+
+    @callback
+    def _handle_transition(self, now: dt.datetime) -> None:
+        self._today_ord = dt_util.as_local(now).date().toordinal()
+        self._async_write_if_changed()
+        self._schedule_next_transition()
+
+    @callback
+    def _handle_spec_update(self) -> None:
+        # Options changed in place; the day is unchanged but the schedule may not be
+        self._async_write_if_changed()
+        self._schedule_next_transition()
+
+    @callback
+    def _schedule_next_transition(self) -> None:
+        if not self._spec.valid:
+            # Nothing will change until the options do
+            self._scheduler.async_cancel(self._attr_unique_id)
+            return
+        # The state moves every local day until expiry; after that the write is skipped
+        next_day = self._today_ord + 1
+        self._scheduler.async_schedule(
+            self._attr_unique_id, local_midnight(next_day), self._handle_transition
         )
 
     @property
     def icon(self) -> str | None:
-        icon = self.entry.data.get(CONF_ICON)
+        icon = self._info.get(CONF_ICON)
         return icon or "mdi:calendar-clock"
 
     @property
     def native_value(self) -> int | None:
-        duration, start_date = self._get_params()
-        if not duration or not start_date:
+        snap = self._snapshot()
+        return snap.remaining if snap else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        snap = self._snapshot()
+        return snap.attributes(self._spec) if snap else {}
+
+    @property
+    def _spec(self) -> ConsumableSpec:
+        return self.hass.data[DOMAIN]["specs"][self._key]
+
+    def _snapshot(self) -> Snapshot | None:
+        if self._today_ord is None:
+            self._today_ord = dt_util.now().date().toordinal()
+        return self._spec.snapshot(self._today_ord)
+
+
+class ConsumableUsageSensor(ConsumableExpirationSensor):
+    """Remaining life of a consumable worn out by another entity's usage.
+
+    The state is the usage left before ``usage_limit`` is reached. A
+    configured duration still applies, so the consumable expires on
+    whichever limit comes first.
+    """
+
+    _attr_translation_key = "usage_remaining"
+    _attr_native_unit_of_measurement = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._update_unit()
+        self.async_on_remove(get_usage(self.hass).async_register(self._key, self._info))
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_USAGE_UPDATED.format(self._key),
+                self._handle_usage_update,
+            )
+        )
+
+    @callback
+    def _update_unit(self) -> None:
+        source = self.hass.states.get(self._info[CONF_USAGE_ENTITY])
+        self._attr_native_unit_of_measurement = usage_unit(self._info, source)
+
+    @callback
+    def _handle_usage_update(self) -> None:
+        if self._attr_native_unit_of_measurement is None:
+            # Meter sources may report their unit only after startup
+            self._update_unit()
+        self._async_write_if_changed()
+
+    @property
+    def native_value(self) -> float | None:
+        limit = usage_limit(self._info)
+        if limit is None:
             return None
-        now = dt_util.now().date()
-        elapsed = (now - start_date).days
-        remaining = max(duration - elapsed, 0)
-        return remaining
+        return round(max(limit - get_usage(self.hass).usage(self._key), 0), 2)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
-        duration, start_date = self._get_params()
-        if not duration or not start_date:
-            return {}
-        due_date = start_date + dt.timedelta(days=duration)
-        now = dt_util.now().date()
-        elapsed = (now - start_date).days
-        percent_used = min(100.0, max(0.0, (elapsed / duration) * 100.0)) if duration else None
+        snap = self._snapshot()
+        attrs = dict(snap.attributes(self._spec)) if snap else {}
+        used = get_usage(self.hass).usage(self._key)
+        limit = usage_limit(self._info)
+        percent = round(min(100.0, used / limit * 100.0), 1) if limit else None
+        attrs.update(
+            {
+                "usage_entity": self._info[CONF_USAGE_ENTITY],
+                "usage_mode": self._info.get(CONF_USAGE_MODE) or USAGE_MODE_RUNTIME,
+                "usage": round(used, 2),
+                "usage_limit": limit,
+                "percent_used": max(percent or 0.0, attrs.get("percent_used", 0.0)),
+                "expired": bool(limit and used >= limit) or attrs.get("expired", False),
+            }
+        )
+        return attrs
+
+
+class CompactExpirationSensor(ConsumableExpirationSensor):
+    """Expiration sensor whose daily recorder rows carry only the state."""
+
+    _unrecorded_attributes = COMPACT_UNRECORDED_ATTRIBUTES
+
+
+class CompactUsageSensor(ConsumableUsageSensor):
+    """Usage sensor whose recorder rows carry only the state."""
+
+    _unrecorded_attributes = USAGE_UNRECORDED_ATTRIBUTES
+
+
+# (usage based, compact) -> sensor class
+SENSOR_CLASSES: dict[tuple[bool, bool], type[ConsumableExpirationSensor]] = {
+    (False, False): ConsumableExpirationSensor,
+    (False, True): CompactExpirationSensor,
+    (True, False): ConsumableUsageSensor,
+    (True, True): CompactUsageSensor,
+}
+
+
+class AggregateSensor(SensorEntity):
+    """Hub-wide summary read from the shared :class:`Aggregates`.
+
+    Changes to any consumable, and local midnight, are coalesced into
+    one write per loop iteration.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_{self._attr_translation_key}"
+        self._attr_device_info = get_devices(hass).hub(entry)
+        self._refresh: asyncio.Handle | None = None
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(self._aggregates.async_add_listener(self._async_aggregates_changed))
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._refresh is not None:
+            self._refresh.cancel()
+            self._refresh = None
+
+    @property
+    def _aggregates(self) -> Aggregates:
+        return get_aggregates(self.hass)
+
+    @staticmethod
+    def _today() -> int:
+        return dt_util.now().date().toordinal()
+
+    @callback
+    def _async_aggregates_changed(self) -> None:
+        if self._refresh is None:
+            self._refresh = self.hass.loop.call_soon(self._async_refresh)
+
+    @callback
+    def _async_refresh(self) -> None:
+        self._refresh = None
+        self.async_write_ha_state()
+
+
+class OverdueSensor(AggregateSensor):
+    _attr_translation_key = "overdue"
+    _attr_icon = "mdi:calendar-alert"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int:
+        return self._aggregates.overdue(self._today())
+
+
+class DueSoonSensor(AggregateSensor):
+    _attr_translation_key = "due_soon"
+    _attr_icon = "mdi:calendar-clock"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def _days(self) -> int:
+        return int(self.entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS))
+
+    @property
+    def native_value(self) -> int:
+        return self._aggregates.due_within(self._today(), self._days)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"days": self._days}
+
+
+class NextDueSensor(AggregateSensor):
+    _attr_translation_key = "next_due"
+    _attr_device_class = SensorDeviceClass.DATE
+
+    @property
+    def native_value(self) -> dt.date | None:
+        nxt = self._aggregates.next_due(self._today())
+        return dt.date.fromordinal(nxt[0]) if nxt else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        nxt = self._aggregates.next_due(self._today())
+        names = [consumable_name(self.hass, key) for key in nxt[1]] if nxt else []
+        return {"consumables": names}
+
+
+class PercentUsedSensor(AggregateSensor):
+    """Mean percent used of all consumables, with per area and label means."""
+
+    _attr_translation_key = "percent_used"
+    _attr_icon = "mdi:percent-circle"
+    _attr_native_unit_of_measurement = "%"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # Recomputed whenever any consumable changes; keep the breakdown out of the recorder
+    _unrecorded_attributes = frozenset({"areas", "labels"})
+
+    @property
+    def native_value(self) -> float | None:
+        return self._aggregates.percent_used(self._today(), ALL)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        today = self._today()
         return {
-            "start_date": start_date.isoformat(),
-            "duration_days": duration,
-            "due_date": due_date.isoformat(),
-            "days_elapsed": max(elapsed, 0),
-            "percent_used": round(percent_used, 1) if percent_used is not None else None,
-            "expired": (now >= due_date),
+            "areas": self._aggregates.percent_used_by(today, "area"),
+            "labels": self._aggregates.percent_used_by(today, "label"),
         }
 
-    def _get_params(self) -> tuple[int | None, dt.date | None]:
-        duration = self.entry.options.get(CONF_DURATION_DAYS) or self.entry.data.get(CONF_DURATION_DAYS)
-        start = self.entry.options.get(CONF_START_DATE) or self.entry.data.get(CONF_START_DATE)
-        if isinstance(start, str):
-            try:
-                y, m, d = map(int, start.split("-"))
-                start_date = dt.date(y, m, d)
-            except Exception:
-                _LOGGER.debug("Failed to parse start_date '%s' for %s", start, self.entry.entry_id)
-                start_date = None
-        elif isinstance(start, dt.date):
-            start_date = start
-        else:
-            start_date = None
-        try:
-            duration = int(duration) if duration is not None else None
-        except Exception:
-            _LOGGER.debug("Invalid duration '%s' for %s", duration, self.entry.entry_id)
-            duration = None
-        _LOGGER.debug(
-            "Parsed params for %s: duration=%s, start_date=%s",
-            self.entry.entry_id,
-            duration,
-            start_date,
+
+class HeadlessSensor(AggregateSensor):
+    """Summary of the hub's headless items.
+
+    Listens to the aggregates too, for their midnight refresh.
+    """
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self._headless is not None:
+            self.async_on_remove(self._headless.async_add_listener(self._async_aggregates_changed))
+
+    @property
+    def _headless(self) -> HeadlessStore | None:
+        return get_headless(self.hass)
+
+
+class HeadlessOverdueSensor(HeadlessSensor):
+    _attr_translation_key = "headless_overdue"
+    _attr_icon = "mdi:package-variant-closed-remove"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int | None:
+        headless = self._headless
+        return headless.overdue(self._today()) if headless is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        headless = self._headless
+        if headless is None:
+            return None
+        next_due = headless.next_due(self._today())
+        return {
+            "tracked": len(headless),
+            "next_due": dt.date.fromordinal(next_due).isoformat() if next_due else None,
+        }
+
+
+class HeadlessDueSoonSensor(HeadlessSensor):
+    _attr_translation_key = "headless_due_soon"
+    _attr_icon = "mdi:package-variant-closed"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def _days(self) -> int:
+        return int(self.entry.options.get(CONF_SOON_DAYS, DEFAULT_SOON_DAYS))
+
+    @property
+    def native_value(self) -> int | None:
+        headless = self._headless
+        return headless.due_within(self._today(), self._days) if headless is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"days": self._days}
+
+
+class ConsumableMetricSensor(SensorEntity):
+    """Diagnostic view of one group of the integration's hot-path metrics.
+
+    These sensors are disabled by default. Metrics are only collected while
+    at least one of them is enabled, or an entry has the collect metrics
+    option set.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, metric: str) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._metric = metric
+        self._value, self._prefix = METRIC_SENSORS[metric]
+        self._attr_translation_key = metric
+        self._attr_state_class = (
+            SensorStateClass.MEASUREMENT if metric in GAUGE_METRICS else SensorStateClass.TOTAL_INCREASING
         )
-        return duration, start_date
+        self._attr_unique_id = f"{entry.entry_id}_{metric}"
+        self._attr_device_info = get_devices(hass).hub(entry)
+
+    async def async_added_to_hass(self) -> None:
+        get_metrics(self.hass).acquire()
+
+    async def async_will_remove_from_hass(self) -> None:
+        get_metrics(self.hass).release()
+
+    @property
+    def native_value(self) -> int:
+        return self._value(self.hass, get_metrics(self.hass))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self._prefix is None:
+            return None
+        histograms = get_metrics(self.hass).histograms
+        return {
+            name: histogram.as_dict()
+            for name, histogram in sorted(histograms.items())
+            if name == self._prefix or name.startswith(f"{self._prefix}.")
+        }
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from typing import Any, Mapping
+
+from .const import (
+    CONF_DUE_ORD,
+    CONF_DURATION_DAYS,
+    CONF_START_DATE,
+    CONF_START_ORD,
+    CONF_THRESHOLDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_start_date(value: Any) -> dt.date | None:
+    """Return ``value`` as a date, accepting ISO strings and date objects."""
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    if isinstance(value, str):
+        try:
+            return dt.date.fromisoformat(value)
+        except ValueError:
+            pass
+        # Older entries may hold non zero-padded dates such as 2024-1-5
+        try:
+            year, month, day = map(int, value.split("-"))
+            return dt.date(year, month, day)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_thresholds(value: Any) -> tuple[int, ...] | None:
+    """Return lead times in days, largest first, from a list or "14, 7, 1".
+
+    ``None`` means the consumable uses the hub's thresholds. Raises
+    ``ValueError`` for anything but whole days of at least one.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    elif isinstance(value, int):
+        value = [value]
+    days = {int(day) for day in value}
+    if any(day < 1 for day in days):
+        raise ValueError("Thresholds must be at least one day")
+    return tuple(sorted(days, reverse=True))
+
+
+def coerce_duration(value: Any) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def schedule_options(duration: Any, start_ord: int | None) -> dict[str, Any]:
+    """Return the schedule fields of a version 2 consumable entry.
+
+    The duration must be a whole number of days of at least one; anything
+    else raises ``ValueError``. The ISO start date is kept for people
+    reading the entry, the ordinals for the integration.
+    """
+    days = coerce_duration(duration)
+    if days is None or days < 1:
+        raise ValueError(f"Invalid duration {duration!r}")
+    return {
+        CONF_DURATION_DAYS: days,
+        CONF_START_DATE: dt.date.fromordinal(start_ord).isoformat() if start_ord is not None else None,
+        CONF_START_ORD: start_ord,
+        CONF_DUE_ORD: start_ord + days if start_ord is not None else None,
+    }
+
+
+class Snapshot:
+    """Values derived from a spec for one local day."""
+
+    __slots__ = ("today_ord", "remaining", "elapsed", "percent_used", "expired", "_attributes")
+
+    def __init__(self, spec: ConsumableSpec, today_ord: int) -> None:
+        duration = spec.duration
+        elapsed = today_ord - spec.start_ord
+        self.today_ord = today_ord
+        self.elapsed = elapsed
+        self.remaining = max(duration - elapsed, 0)
+        self.percent_used = round(min(100.0, max(0.0, (elapsed / duration) * 100.0)), 1)
+        self.expired = today_ord >= spec.due_ord
+        self._attributes: dict[str, Any] | None = None
+
+    def attributes(self, spec: ConsumableSpec) -> dict[str, Any]:
+        if self._attributes is None:
+            self._attributes = {
+                "start_date": spec.start_date.isoformat(),
+                "duration_days": spec.duration,
+                "due_date": spec.due_date.isoformat(),
+                # Held at the duration once expired, so the state stops moving
+                "days_elapsed": min(max(self.elapsed, 0), spec.duration),
+                "percent_used": self.percent_used,
+                "expired": self.expired,
+            }
+        return self._attributes
+
+
+class ConsumableSpec:
+    """Parsed schedule of a consumable, built once per options change.
+
+    Dates are kept as proleptic Gregorian ordinals so the per-day math is
+    integer arithmetic. A spec without a usable duration or start date is
+    kept around but reports ``valid`` as False. ``thresholds`` is None when
+    the consumable uses the hub's lead times.
+    """
+
+    __slots__ = ("key", "duration", "start_ord", "due_ord", "thresholds", "_snapshot")
+
+    def __init__(
+        self,
+        key: str,
+        duration: int | None,
+        start_ord: int | None,
+        thresholds: tuple[int, ...] | None = None,
+        due_ord: int | None = None,
+    ) -> None:
+        self.key = key
+        self.duration = duration
+        self.start_ord = start_ord
+        self.thresholds = thresholds
+        if due_ord is None and duration and start_ord is not None:
+            due_ord = start_ord + duration
+        self.due_ord = due_ord
+        self._snapshot: Snapshot | None = None
+
+    @classmethod
+    def from_options(
+        cls, key: str, options: Mapping[str, Any], data: Mapping[str, Any]
+    ) -> ConsumableSpec:
+        raw_duration = options.get(CONF_DURATION_DAYS) or data.get(CONF_DURATION_DAYS)
+        raw_start = options.get(CONF_START_DATE) or data.get(CONF_START_DATE)
+        duration = coerce_duration(raw_duration)
+        if duration is None and raw_duration is not None:
+            _LOGGER.debug("Invalid duration '%s' for %s", raw_duration, key)
+        start_date = parse_start_date(raw_start)
+        if start_date is None and raw_start is not None:
+            _LOGGER.debug("Failed to parse start_date '%s' for %s", raw_start, key)
+        raw_thresholds = options.get(CONF_THRESHOLDS, data.get(CONF_THRESHOLDS))
+        try:
+            thresholds = parse_thresholds(raw_thresholds)
+        except (TypeError, ValueError):
+            _LOGGER.debug("Invalid thresholds '%s' for %s", raw_thresholds, key)
+            thresholds = None
+        return cls(key, duration, start_date.toordinal() if start_date else None, thresholds)
+
+    @classmethod
+    def from_entry(cls, key: str, options: Mapping[str, Any], data: Mapping[str, Any]) -> ConsumableSpec:
+        """Build the spec of a consumable config entry from its stored ordinals.
+
+        Entries without ordinals, because they were not migrated to version 2
+        yet or their last schedule update was invalid, fall back to
+        :meth:`from_options`.
+        """
+        if options.get(CONF_START_ORD) is None:
+            return cls.from_options(key, options, data)
+        thresholds = options.get(CONF_THRESHOLDS)
+        return cls(
+            key,
+            options.get(CONF_DURATION_DAYS),
+            options[CONF_START_ORD],
+            tuple(thresholds) if thresholds is not None else None,
+            options.get(CONF_DUE_ORD),
+        )
+
+    def same_schedule(self, other: ConsumableSpec | None) -> bool:
+        return (
+            other is not None
+            and self.duration == other.duration
+            and self.start_ord == other.start_ord
+            and self.thresholds == other.thresholds
+        )
+
+    @property
+    def valid(self) -> bool:
+        return self.due_ord is not None
+
+    @property
+    def start_date(self) -> dt.date | None:
+        return dt.date.fromordinal(self.start_ord) if self.start_ord is not None else None
+
+    @property
+    def due_date(self) -> dt.date | None:
+        return dt.date.fromordinal(self.due_ord) if self.due_ord is not None else None
+
+    def snapshot(self, today_ord: int) -> Snapshot | None:
+        """Return the values for ``today_ord``, reusing the cached day if possible."""
+        if self.due_ord is None:
+            return None
+        snap = self._snapshot
+        if snap is None or snap.today_ord != today_ord:
+            snap = self._snapshot = Snapshot(self, today_ord)
+        return snap
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from functools import partial
+
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, EVENT_EXPIRED, EVENT_THRESHOLD, SENSOR_UNIQUE_ID_SUFFIX
+from .due_index import IndexedSpecs
+from .runtime import consumable_name
+from .scheduler import ExpiryScheduler, local_midnight
+from .spec import ConsumableSpec
+
+_LOGGER = logging.getLogger(__name__)
+
+# Scheduler keys are (THRESHOLD_KEY, consumable key), apart from the sensors' own
+THRESHOLD_KEY = "threshold"
+
+
+class ThresholdNotifier:
+    """Fires threshold and expired events at the local midnight they happen.
+
+    Every consumable keeps one pending crossing on the shared expiry timer:
+    its next lead-time threshold, or its due date. When that crossing fires,
+    the event is sent and only that consumable's next crossing is
+    scheduled. A day with k crossings therefore costs O(k log N) rather
+    than a pass over every consumable.
+
+    Crossings are scheduled strictly after the current day, so restarts
+    and schedule changes never repeat an event for a day already begun.
+    """
+
+    def __init__(self, hass: HomeAssistant, specs: IndexedSpecs, scheduler: ExpiryScheduler) -> None:
+        self.hass = hass
+        self._specs = specs
+        self._scheduler = scheduler
+        # Lead times of consumables without their own, set from the hub options
+        self.default: tuple[int, ...] = ()
+        for key, spec in specs.items():
+            self.async_set_spec(key, spec)
+        specs.observers.append(self.async_set_spec)
+
+    def thresholds(self, spec: ConsumableSpec) -> tuple[int, ...]:
+        return self.default if spec.thresholds is None else spec.thresholds
+
+    @callback
+    def async_set_default(self, thresholds: tuple[int, ...]) -> None:
+        if thresholds == self.default:
+            return
+        self.default = thresholds
+        today = dt_util.now().date().toordinal()
+        for key, spec in self._specs.items():
+            if spec.thresholds is None:
+                self._async_schedule(key, spec, today)
+
+    @callback
+    def async_set_spec(self, key: str, spec: ConsumableSpec | None) -> None:
+        if spec is None:
+            self._scheduler.async_cancel((THRESHOLD_KEY, key))
+            return
+        self._async_schedule(key, spec, dt_util.now().date().toordinal())
+
+    def next_crossing(self, spec: ConsumableSpec, today_ord: int) -> tuple[int, int] | None:
+        """Return the day ordinal and days remaining of the first crossing after today.
+
+        Zero days remaining is the due date itself.
+        """
+        if not spec.valid:
+            return None
+        upcoming = [days for days in (*self.thresholds(spec), 0) if spec.due_ord - days > today_ord]
+        if not upcoming:
+            return None
+        days = max(upcoming)
+        return spec.due_ord - days, days
+
+    @callback
+    def _async_schedule(self, key: str, spec: ConsumableSpec, today_ord: int) -> None:
+        crossing = self.next_crossing(spec, today_ord)
+        if crossing is None:
+            self._scheduler.async_cancel((THRESHOLD_KEY, key))
+            return
+        day_ord, days = crossing
+        self._scheduler.async_schedule(
+            (THRESHOLD_KEY, key), local_midnight(day_ord), partial(self._async_crossed, key, days)
+        )
+
+    @callback
+    def _async_crossed(self, key: str, days: int, now: dt.datetime) -> None:
+        spec = self._specs.get(key)
+        if spec is None or not spec.valid:
+            return
+        entity_id = er.async_get(self.hass).async_get_entity_id(
+            Platform.SENSOR, DOMAIN, f"{key}{SENSOR_UNIQUE_ID_SUFFIX}"
+        )
+        data = {
+            "id": key,
+            "entity_id": entity_id,
+            "name": consumable_name(self.hass, key),
+            "due_date": spec.due_date.isoformat(),
+        }
+        if days:
+            _LOGGER.debug("%s is %d days from its due date", key, days)
+            self.hass.bus.async_fire(EVENT_THRESHOLD, {**data, "days_remaining": days})
+        else:
+            _LOGGER.debug("%s expired", key)
+            self.hass.bus.async_fire(EVENT_EXPIRED, data)
+        self._async_schedule(key, spec, dt_util.as_local(now).date().toordinal())
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import logging
+import math
+from functools import partial
+from typing import Any, Callable, Mapping, TYPE_CHECKING
+
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_USAGE_ENTITY,
+    CONF_USAGE_LIMIT,
+    CONF_USAGE_MODE,
+    SIGNAL_USAGE_UPDATED,
+    USAGE_MODE_CYCLES,
+    USAGE_MODE_METER,
+    USAGE_MODE_RUNTIME,
+)
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    from .scheduler import ExpiryScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.usage"
+# Seconds to wait for more usage before writing the counters to disk
+SAVE_DELAY = 30
+# Seconds between refreshes of a runtime consumable while its source is on
+RUNTIME_REFRESH_INTERVAL = 300
+# Scheduler keys are (USAGE_KEY, consumable key)
+USAGE_KEY = "usage"
+
+ON_STATES = ("on", "open", "running", "heat", "cool", "heat_cool", "dry", "fan_only")
+IGNORED_STATES = ("unavailable", "unknown")
+
+
+class UsageCounter:
+    """Accumulated usage of one consumable since it was last replaced.
+
+    ``since`` is the timestamp the source turned on (runtime mode) and
+    ``last`` the last numeric reading of the source (meter mode).
+    """
+
+    __slots__ = ("used", "since", "last")
+
+    def __init__(self, used: float = 0.0, since: float | None = None, last: float | None = None) -> None:
+        self.used = used
+        self.since = since
+        self.last = last
+
+    def total(self, mode: str, now: float) -> float:
+        """Return usage including a runtime period that is still open."""
+        if mode == USAGE_MODE_RUNTIME and self.since is not None:
+            return self.used + max(now - self.since, 0) / 3600
+        return self.used
+
+    def apply(self, mode: str, old: State | None, new: State | None) -> bool:
+        """Fold one state change into the counter; return True if it changed."""
+        if new is None or new.state in IGNORED_STATES:
+            return False
+        if mode == USAGE_MODE_RUNTIME:
+            changed_at = new.last_changed.timestamp()
+            if new.state in ON_STATES:
+                if self.since is None:
+                    self.since = changed_at
+                    return True
+                return False
+            if self.since is None:
+                return False
+            self.used += max(changed_at - self.since, 0) / 3600
+            self.since = None
+            return True
+        if mode == USAGE_MODE_CYCLES:
+            if new.state in ON_STATES and (old is None or old.state not in ON_STATES):
+                self.used += 1
+                return True
+            return False
+        try:
+            value = float(new.state)
+        except ValueError:
+            return False
+        last, self.last = self.last, value
+        if last is None:
+            return False
+        # A meter that went backwards was reset; count from zero
+        delta = value - last if value >= last else value
+        self.used += delta
+        return delta > 0
+
+    def as_list(self) -> list[Any]:
+        return [self.used, self.since, self.last]
+
+
+class UsageTracker:
+    """Accumulates usage for every usage-based consumable.
+
+    A single ``async_track_state_change_event`` subscription covers all
+    source entities; each event updates the counters of the consumables fed
+    by that source in constant time. Counters are saved on a delay so they
+    survive restarts without replaying the recorder.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, metrics: Metrics | None = None, scheduler: ExpiryScheduler | None = None
+    ) -> None:
+        self.hass = hass
+        self.metrics = metrics or Metrics()
+        self._scheduler = scheduler
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self.counters: dict[str, UsageCounter] = {}
+        self._modes: dict[str, str] = {}
+        self._limits: dict[str, float | None] = {}
+        self._by_source: dict[str, set[str]] = {}
+        self._unsub_track: Callable[[], None] | None = None
+        self._resubscribe_pending = False
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        data = await self._store.async_load() or {}
+        for key, (used, since, last) in data.get("counters", {}).items():
+            self.counters[key] = UsageCounter(used, since, last)
+
+    @callback
+    def async_register(self, key: str, info: Mapping[str, Any]) -> Callable[[], None]:
+        """Track usage of ``key`` from its source entity until the returned callback runs."""
+        source = info[CONF_USAGE_ENTITY]
+        mode = self._modes[key] = info.get(CONF_USAGE_MODE) or USAGE_MODE_RUNTIME
+        self._limits[key] = usage_limit(info)
+        counter = self.counters.setdefault(key, UsageCounter())
+        state = self.hass.states.get(source)
+        if state is not None:
+            self._async_catch_up(counter, mode, state)
+        self._by_source.setdefault(source, set()).add(key)
+        self._async_schedule_resubscribe()
+        self._async_schedule_runtime(key)
+
+        @callback
+        def _unregister() -> None:
+            keys = self._by_source.get(source)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_source[source]
+                    self._async_schedule_resubscribe()
+            self._modes.pop(key, None)
+            self._limits.pop(key, None)
+            self._async_schedule_runtime(key)
+
+        return _unregister
+
+    @callback
+    def _async_catch_up(self, counter: UsageCounter, mode: str, state: State) -> None:
+        # Reconcile what happened to the source while nothing was listening
+        if mode == USAGE_MODE_RUNTIME and counter.since is not None:
+            changed_at = state.last_changed.timestamp()
+            if state.state not in ON_STATES:
+                counter.used += max(changed_at - counter.since, 0) / 3600
+                counter.since = None
+            elif changed_at > counter.since:
+                # Turned off and on again while stopped; count from the last start
+                counter.since = changed_at
+        elif mode == USAGE_MODE_RUNTIME and state.state in ON_STATES:
+            counter.since = state.last_changed.timestamp()
+        elif mode == USAGE_MODE_METER:
+            counter.apply(mode, None, state)
+        self._async_schedule_save()
+
+    @callback
+    def async_remove(self, key: str) -> None:
+        if self.counters.pop(key, None) is not None:
+            self._async_schedule_runtime(key)
+            self._async_schedule_save()
+
+    @callback
+    def async_reset(self, key: str) -> None:
+        """Start counting again, e.g. after the consumable was replaced."""
+        counter = self.counters.get(key)
+        if counter is None:
+            return
+        counter.used = 0.0
+        if counter.since is not None:
+            counter.since = dt_util.utcnow().timestamp()
+        self._async_schedule_save()
+        self._async_schedule_runtime(key)
+        async_dispatcher_send(self.hass, SIGNAL_USAGE_UPDATED.format(key))
+
+    def usage(self, key: str) -> float:
+        counter = self.counters.get(key)
+        if counter is None:
+            return 0.0
+        return counter.total(self._modes.get(key, USAGE_MODE_RUNTIME), dt_util.utcnow().timestamp())
+
+    @callback
+    def _async_schedule_resubscribe(self) -> None:
+        # Entities register one by one at startup; subscribe once for the batch
+        if self._resubscribe_pending:
+            return
+        self._resubscribe_pending = True
+        self.hass.loop.call_soon(self._async_resubscribe)
+
+    @callback
+    def _async_resubscribe(self) -> None:
+        self._resubscribe_pending = False
+        if self._unsub_track:
+            self._unsub_track()
+            self._unsub_track = None
+        if self._by_source:
+            self._unsub_track = async_track_state_change_event(
+                self.hass, list(self._by_source), self._async_state_changed
+            )
+        _LOGGER.debug("Tracking usage from %d source entities", len(self._by_source))
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        data = event.data
+        old, new = data.get("old_state"), data.get("new_state")
+        changed = False
+        for key in self._by_source.get(data["entity_id"], ()):
+            if self.counters[key].apply(self._modes[key], old, new):
+                changed = True
+                self._async_schedule_runtime(key)
+                async_dispatcher_send(self.hass, SIGNAL_USAGE_UPDATED.format(key))
+        if changed:
+            self._async_schedule_save()
+
+    @callback
+    def _async_schedule_runtime(self, key: str) -> None:
+        """Keep one pending refresh for ``key`` while its runtime source is on.
+
+        Runtime usage grows without any state change of the source, so the
+        refresh lands on the moment the limit is reached, or after
+        ``RUNTIME_REFRESH_INTERVAL`` if that is sooner.
+        """
+        if self._scheduler is None:
+            return
+        counter = self.counters.get(key)
+        if counter is None or counter.since is None or self._modes.get(key) != USAGE_MODE_RUNTIME:
+            self._scheduler.async_cancel((USAGE_KEY, key))
+            return
+        now = dt_util.utcnow().timestamp()
+        when = now + RUNTIME_REFRESH_INTERVAL
+        limit = self._limits.get(key)
+        if limit is not None:
+            # Rounded up so the usage read at that moment has reached the limit
+            reached = math.ceil(counter.since + (limit - counter.used) * 3600)
+            if now < reached < when:
+                when = reached
+        self._scheduler.async_schedule(
+            (USAGE_KEY, key), dt_util.utc_from_timestamp(when), partial(self._async_runtime_tick, key)
+        )
+
+    @callback
+    def _async_runtime_tick(self, key: str, _now: Any) -> None:
+        async_dispatcher_send(self.hass, SIGNAL_USAGE_UPDATED.format(key))
+        self._async_schedule_runtime(key)
+
+    @callback
+    def async_shutdown(self) -> None:
+        if self._unsub_track:
+            self._unsub_track()
+            self._unsub_track = None
+        if self._scheduler is not None:
+            for key in self._modes:
+                self._scheduler.async_cancel((USAGE_KEY, key))
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        start = self.metrics.start()
+        data = {"counters": {key: counter.as_list() for key, counter in self.counters.items()}}
+        self.metrics.observe("flush.usage", start)
+        return data
+
+
+def usage_limit(info: Mapping[str, Any]) -> float | None:
+    try:
+        limit = float(info[CONF_USAGE_LIMIT])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return limit if limit > 0 else None
+
+
+def usage_unit(info: Mapping[str, Any], source: State | None) -> str | None:
+    mode = info.get(CONF_USAGE_MODE) or USAGE_MODE_RUNTIME
+    if mode == USAGE_MODE_RUNTIME:
+        return "h"
+    if mode == USAGE_MODE_CYCLES:
+        return "cycles"
+    return source.attributes.get("unit_of_measurement") if source else None
+
+
+def is_usage_consumable(info: Mapping[str, Any]) -> bool:
+    return bool(info.get(CONF_USAGE_ENTITY))
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, TYPE_CHECKING, Dict
 
-from .const import CONF_DURATION_DAYS, CONF_START_DATE
+from .const import CONF_DURATION_DAYS, CONF_START_DATE, DEFAULT_ICON_MAP
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
@@ -24,3 +24,10 @@ def merge_entry_options(entry: "ConfigEntry", **updates: Any) -> Dict[str, Any]:
 
     options.update(updates)
     return options
+
+
+def default_icon(name: str, item_type: str | None) -> str | None:
+    """Return the default icon for ``item_type``, falling back to ``name``."""
+    if item_type and item_type in DEFAULT_ICON_MAP:
+        return DEFAULT_ICON_MAP[item_type]
+    return DEFAULT_ICON_MAP.get(name.lower())
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+from typing import Any, Iterator
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .due_index import IndexedSpecs
+from .runtime import consumable_item_type, consumable_name, get_aggregates
+from .spec import ConsumableSpec
+
+_LOGGER = logging.getLogger(__name__)
+
+# Row layout of list results and subscription events; dates are ordinals
+COLUMNS = ("id", "name", "item_type", "start", "duration", "due", "remaining")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Exclusive end of a window without due_to, past every representable date
+END_OF_TIME = dt.date.max.toordinal() + 1
+
+FILTERS = {
+    vol.Optional("item_type"): cv.string,
+    vol.Optional("area"): cv.string,
+    # Inclusive due date window
+    vol.Optional("due_from"): cv.date,
+    vol.Optional("due_to"): cv.date,
+}
+
+
+class _Filter:
+    """Filters shared by ``list`` and ``subscribe``."""
+
+    def __init__(self, hass: HomeAssistant, msg: dict[str, Any]) -> None:
+        self._hass = hass
+        self.item_type: str | None = msg.get("item_type")
+        self.area = f"area:{msg['area']}" if msg.get("area") else None
+        self.windowed = "due_from" in msg or "due_to" in msg
+        self.start_ord = msg["due_from"].toordinal() if "due_from" in msg else 0
+        self.end_ord = msg["due_to"].toordinal() + 1 if "due_to" in msg else END_OF_TIME
+
+    def matches(self, key: str, spec: ConsumableSpec) -> bool:
+        if self.windowed and not (spec.valid and self.start_ord <= spec.due_ord < self.end_ord):
+            return False
+        if self.item_type is not None and consumable_item_type(self._hass, key) != self.item_type:
+            return False
+        return self.area is None or self.area in get_aggregates(self._hass).groups(key)
+
+
+def _row(hass: HomeAssistant, key: str, spec: ConsumableSpec, today_ord: int) -> list[Any]:
+    snap = spec.snapshot(today_ord)
+    return [
+        key,
+        consumable_name(hass, key),
+        consumable_item_type(hass, key),
+        spec.start_ord,
+        spec.duration,
+        spec.due_ord,
+        snap.remaining if snap else None,
+    ]
+
+
+def _ordered(
+    specs: IndexedSpecs, flt: _Filter, cursor: tuple[int | None, str] | None
+) -> Iterator[tuple[int | None, str]]:
+    """Yield ``(due_ord, key)`` by due date, then consumables without one by key.
+
+    Dated consumables are read from the due date index starting right
+    after ``cursor``; undated ones only come up once those run out.
+    """
+    index = specs.due_index
+    if cursor is None or (cursor[0] is not None and cursor[0] < flt.start_ord):
+        yield from index.between(flt.start_ord, flt.end_ord)
+    elif cursor[0] is not None:
+        yield from index.after(cursor[0], cursor[1], flt.end_ord)
+    if flt.windowed:
+        return
+    last = cursor[1] if cursor is not None and cursor[0] is None else ""
+    yield from ((None, key) for key in sorted(k for k, spec in specs.items() if not spec.valid and k > last))
+
+
+def _encode_cursor(due_ord: int | None, key: str) -> str:
+    return f"{'' if due_ord is None else due_ord}:{key}"
+
+
+def _decode_cursor(cursor: str) -> tuple[int | None, str]:
+    due, sep, key = cursor.partition(":")
+    if not sep or not key:
+        raise ValueError(cursor)
+    return (int(due) if due else None), key
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/list",
+        **FILTERS,
+        vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_LIMIT)),
+        vol.Optional("cursor"): cv.string,
+    }
+)
+@callback
+def ws_list(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Return one page of compact rows, ordered by due date.
+
+    ``next_cursor`` is passed back as ``cursor`` for the following page
+    and is None on the last one.
+    """
+    try:
+        cursor = _decode_cursor(msg["cursor"]) if msg.get("cursor") else None
+    except ValueError:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, "Invalid cursor")
+        return
+    specs: IndexedSpecs = hass.data[DOMAIN]["specs"]
+    flt = _Filter(hass, msg)
+    limit = msg.get("limit", DEFAULT_LIMIT)
+    today = dt_util.now().date().toordinal()
+    rows: list[list[Any]] = []
+    next_cursor = None
+    for due_ord, key in _ordered(specs, flt, cursor):
+        spec = specs[key]
+        if not flt.matches(key, spec):
+            continue
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = _encode_cursor(last[5], last[0])
+            break
+        rows.append(_row(hass, key, spec, today))
+    connection.send_result(msg["id"], {"columns": COLUMNS, "rows": rows, "next_cursor": next_cursor})
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/subscribe", **FILTERS})
+@callback
+def ws_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Push rows of consumables that change and ids of those that drop out.
+
+    The first event holds every matching row. After that, changes within
+    one loop iteration are coalesced into a single ``changed``/``removed``
+    event. ``remaining`` is as of when a row was sent.
+    """
+    specs: IndexedSpecs = hass.data[DOMAIN]["specs"]
+    aggregates = get_aggregates(hass)
+    flt = _Filter(hass, msg)
+    sent: set[str] = set()
+    dirty: set[str] = set()
+    flush: asyncio.Handle | None = None
+
+    @callback
+    def _async_flush() -> None:
+        nonlocal flush
+        flush = None
+        today = dt_util.now().date().toordinal()
+        changed: list[list[Any]] = []
+        removed: list[str] = []
+        for key in sorted(dirty):
+            spec = specs.get(key)
+            if spec is not None and flt.matches(key, spec):
+                changed.append(_row(hass, key, spec, today))
+                sent.add(key)
+            elif key in sent:
+                sent.discard(key)
+                removed.append(key)
+        dirty.clear()
+        if changed or removed:
+            connection.send_message(
+                websocket_api.event_message(msg["id"], {"changed": changed, "removed": removed})
+            )
+
+    @callback
+    def _async_changed(key: str, spec: ConsumableSpec | None = None) -> None:
+        nonlocal flush
+        dirty.add(key)
+        if flush is None:
+            flush = hass.loop.call_soon(_async_flush)
+
+    @callback
+    def _async_unsubscribe() -> None:
+        specs.observers.remove(_async_changed)
+        aggregates.group_observers.remove(_async_changed)
+        if flush is not None:
+            flush.cancel()
+
+    specs.observers.append(_async_changed)
+    aggregates.group_observers.append(_async_changed)
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"], {"columns": COLUMNS})
+    dirty.update(specs)
+    _async_flush()
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_list)
+    websocket_api.async_register_command(hass, ws_subscribe)
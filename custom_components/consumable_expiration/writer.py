@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Mapping
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .metrics import Metrics
+from .util import merge_entry_options
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for more updates before writing them to the config entry
+FLUSH_DELAY = 1.0
+
+
+class OptionsWriter:
+    """Write-behind buffer for consumable config entry options.
+
+    Updates for the same entry are merged while they wait, so a burst of
+    service calls or button presses ends in one ``async_update_entry`` per
+    entry. Callers apply the merged options to the in-memory spec right
+    away; only the persistent write is deferred.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: Metrics | None = None) -> None:
+        self.hass = hass
+        self.metrics = metrics or Metrics()
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._first_pending_at: float | None = None
+        self._unsub_flush: Callable[[], None] | None = None
+        self.flushes = 0
+        self.entries_written = 0
+        self.updates_buffered = 0
+        self.last_flush_latency: float | None = None
+        self.max_flush_latency = 0.0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "flushes": self.flushes,
+            "entries_written": self.entries_written,
+            "updates_buffered": self.updates_buffered,
+            "pending_entries": len(self._pending),
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+        }
+
+    @callback
+    def async_set(self, entry: ConfigEntry, updates: Mapping[str, Any]) -> dict[str, Any]:
+        """Buffer ``updates`` for ``entry`` and return its effective options."""
+        pending = self._pending.setdefault(entry.entry_id, {})
+        pending.update(updates)
+        self.updates_buffered += 1
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, FLUSH_DELAY, self._async_flush)
+        return merge_entry_options(entry, **pending)
+
+    @callback
+    def async_flush_entry(self, entry_id: str) -> None:
+        """Write any buffered options of ``entry_id`` now, e.g. before unload."""
+        updates = self._pending.pop(entry_id, None)
+        if updates is not None:
+            self._async_write(entry_id, updates)
+        if not self._pending:
+            self._async_cancel_flush()
+
+    @callback
+    def async_flush(self, *_: Any) -> None:
+        self._async_cancel_flush()
+        self._async_flush()
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        if self._unsub_flush:
+            self._unsub_flush()
+        self._unsub_flush = None
+        if not self._pending:
+            self._first_pending_at = None
+
+    @callback
+    def _async_flush(self, _now: Any = None) -> None:
+        self._unsub_flush = None
+        pending, self._pending = self._pending, {}
+        if self._first_pending_at is not None:
+            latency = time.monotonic() - self._first_pending_at
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+        self._first_pending_at = None
+        if not pending:
+            return
+        start = self.metrics.start()
+        for entry_id, updates in pending.items():
+            self._async_write(entry_id, updates)
+        self.metrics.observe("flush.options", start)
+        self.flushes += 1
+        _LOGGER.debug(
+            "Flushed options for %d entries after %.3fs", len(pending), self.last_flush_latency or 0
+        )
+
+    @callback
+    def _async_write(self, entry_id: str, updates: dict[str, Any]) -> None:
+        entry = self.hass.config_entries.async_get_entry(entry_id)
+        if entry is None:
+            return
+        options = merge_entry_options(entry, **updates)
+        if options == dict(entry.options):
+            return
+        self.hass.config_entries.async_update_entry(entry, options=options)
+        self.entries_written += 1
@@ -0,0 +1,1371 @@
+"""In-memory stand-in for the parts of Home Assistant the integration uses.
+
+Unlike the per-test stubs, this fake keeps real behaviour: config entries
+set up and unload their platforms, entities get entity ids and write
+states, the dispatcher delivers signals, timers fire when the clock is
+advanced and stores keep their data in memory. It is shared by tests that
+need a running integration and by ``benchmarks/bench_scale.py``.
+
+Use ``installed()`` to swap the fake modules into ``sys.modules`` and
+``load_integration()`` to import the real integration against them.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime as dt
+import enum
+import heapq
+import importlib.util
+import itertools
+import json
+import re
+import sys
+import tempfile
+import types
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+INTEGRATION_DIR = (
+    Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration"
+)
+DOMAIN = "consumable_expiration"
+# Top-level packages replaced while the fake is installed
+FAKE_PACKAGES = ("homeassistant", "voluptuous", DOMAIN)
+UTC = dt.timezone.utc
+
+
+# --------------------------------------------------------------------------
+# voluptuous
+
+
+class Invalid(Exception):
+    pass
+
+
+class _Marker:
+    def __init__(self, key: str, default: Any = None) -> None:
+        self.key = key
+        self.default = default
+
+
+class Required(_Marker):
+    pass
+
+
+class Optional(_Marker):
+    pass
+
+
+class Schema:
+    def __init__(self, schema: Any, extra: Any = None) -> None:
+        self.schema = schema
+
+    def __call__(self, data: Any) -> Any:
+        if not isinstance(self.schema, dict):
+            return _validate(self.schema, data)
+        result = dict(data)
+        for marker, validator in self.schema.items():
+            key = marker.key if isinstance(marker, _Marker) else marker
+            if key in data:
+                result[key] = _validate(validator, data[key])
+            elif isinstance(marker, Required):
+                raise Invalid(f"required key not provided: {key}")
+        return result
+
+
+def _validate(validator: Any, value: Any) -> Any:
+    if isinstance(validator, dict):
+        return Schema(validator)(value)
+    return validator(value) if callable(validator) else value
+
+
+def All(*validators: Any) -> Callable[[Any], Any]:
+    def validate(value: Any) -> Any:
+        for validator in validators:
+            value = _validate(validator, value)
+        return value
+
+    return validate
+
+
+def Coerce(kind: type) -> Callable[[Any], Any]:
+    def validate(value: Any) -> Any:
+        try:
+            return kind(value)
+        except (TypeError, ValueError) as err:
+            raise Invalid(str(err)) from err
+
+    return validate
+
+
+def Range(min: Any = None, max: Any = None) -> Callable[[Any], Any]:  # noqa: A002
+    def validate(value: Any) -> Any:
+        if (min is not None and value < min) or (max is not None and value > max):
+            raise Invalid(f"value {value} out of range")
+        return value
+
+    return validate
+
+
+def In(container: Any) -> Callable[[Any], Any]:
+    def validate(value: Any) -> Any:
+        if value not in container:
+            raise Invalid(f"value {value} not allowed")
+        return value
+
+    return validate
+
+
+# --------------------------------------------------------------------------
+# homeassistant.util.dt with a clock tests can move
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = dt.datetime(2024, 1, 1, 12, tzinfo=UTC)
+
+
+CLOCK = Clock()
+
+
+def _utcnow() -> dt.datetime:
+    return CLOCK.now
+
+
+def _start_of_local_day(day: dt.date | dt.datetime | None = None) -> dt.datetime:
+    day = day or CLOCK.now.date()
+    if isinstance(day, dt.datetime):
+        day = day.date()
+    return dt.datetime.combine(day, dt.time(), UTC)
+
+
+def _parse_date(value: Any) -> dt.date:
+    if isinstance(value, dt.date):
+        return value
+    try:
+        return dt.date.fromisoformat(str(value))
+    except ValueError as err:
+        raise Invalid(f"invalid date {value!r}") from err
+
+
+# --------------------------------------------------------------------------
+# homeassistant.core
+
+
+def callback(func: Callable) -> Callable:
+    return func
+
+
+class SupportsResponse(enum.Enum):
+    NONE = "none"
+    OPTIONAL = "optional"
+    ONLY = "only"
+
+
+class State:
+    def __init__(self, entity_id: str, state: Any, attributes: dict | None = None) -> None:
+        self.entity_id = entity_id
+        self.state = "unknown" if state is None else str(state)
+        self.attributes = dict(attributes or {})
+        self.last_changed = CLOCK.now
+
+
+class Event:
+    def __init__(self, event_type: str, data: dict) -> None:
+        self.event_type = event_type
+        self.data = data
+
+
+class ServiceCall:
+    def __init__(self, domain: str, service: str, data: dict, return_response: bool = False) -> None:
+        self.domain = domain
+        self.service = service
+        self.data = data
+        self.return_response = return_response
+
+
+class Recorder:
+    """Counts the rows and bytes Home Assistant's recorder would store.
+
+    Each state change is one ``states`` row. Attributes minus the entity's
+    unrecorded ones are serialised and, like the real recorder, stored once
+    per distinct value in ``state_attributes``. Byte counts are the payload
+    plus a rough fixed cost per row for ids and timestamps.
+    """
+
+    STATE_ROW_BYTES = 48
+    ATTRIBUTES_ROW_BYTES = 24
+
+    def __init__(self) -> None:
+        self.state_rows = 0
+        self.attribute_rows = 0
+        self.bytes = 0
+        # Entity ids left out, like the recorder's ``exclude`` configuration
+        self.exclude: set[str] = set()
+        self._shared: set[str] = set()
+
+    def async_record(self, state: State, unrecorded: frozenset) -> None:
+        if state.entity_id in self.exclude:
+            return
+        shared = json.dumps(
+            {k: v for k, v in state.attributes.items() if k not in unrecorded},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        self.state_rows += 1
+        self.bytes += self.STATE_ROW_BYTES + len(str(state.state))
+        if shared not in self._shared:
+            self._shared.add(shared)
+            self.attribute_rows += 1
+            self.bytes += self.ATTRIBUTES_ROW_BYTES + len(shared)
+
+    def as_dict(self) -> dict[str, int]:
+        return {"state_rows": self.state_rows, "attribute_rows": self.attribute_rows, "bytes": self.bytes}
+
+
+class StateMachine:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._states: dict[str, State] = {}
+        self.writes = 0
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def async_all(self) -> list[State]:
+        return list(self._states.values())
+
+    def async_set(
+        self,
+        entity_id: str,
+        state: Any,
+        attributes: dict | None = None,
+        unrecorded: frozenset = frozenset(),
+    ) -> None:
+        old = self._states.get(entity_id)
+        new = State(entity_id, state, attributes)
+        if old is not None and old.state == new.state:
+            new.last_changed = old.last_changed
+        self._states[entity_id] = new
+        self.writes += 1
+        if old is None or old.state != new.state or old.attributes != new.attributes:
+            self._hass.recorder.async_record(new, unrecorded)
+        for action in list(self._hass._state_listeners.get(entity_id, ())):
+            action(Event("state_changed", {"entity_id": entity_id, "old_state": old, "new_state": new}))
+
+    def async_remove(self, entity_id: str) -> None:
+        self._states.pop(entity_id, None)
+
+
+class Bus:
+    def __init__(self) -> None:
+        self.listeners: dict[str, list[Callable]] = {}
+
+    def async_listen(self, event_type: str, action: Callable) -> Callable[[], None]:
+        self.listeners.setdefault(event_type, []).append(action)
+        return lambda: self.listeners[event_type].remove(action)
+
+    def async_listen_once(self, event_type: str, action: Callable) -> Callable[[], None]:
+        return self.async_listen(event_type, action)
+
+    def async_fire(self, event_type: str, data: dict | None = None) -> list[Any]:
+        return [action(Event(event_type, data or {})) for action in self.listeners.get(event_type, ())]
+
+
+class ServiceRegistry:
+    def __init__(self) -> None:
+        self.services: dict[tuple[str, str], tuple[Callable, Any, SupportsResponse]] = {}
+
+    def has_service(self, domain: str, service: str) -> bool:
+        return (domain, service) in self.services
+
+    def async_register(self, domain, service, handler, schema=None, supports_response=SupportsResponse.NONE):
+        self.services[(domain, service)] = (handler, schema, supports_response)
+
+    async def async_call(self, domain, service, data=None, blocking=True, return_response=False):
+        handler, schema, _supports = self.services[(domain, service)]
+        data = schema(dict(data or {})) if schema else dict(data or {})
+        return await handler(ServiceCall(domain, service, data, return_response))
+
+
+class Handle:
+    def __init__(self, func: Callable, args: tuple) -> None:
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class FakeLoop:
+    """Collects ``call_soon`` callbacks until ``async_block_till_done``."""
+
+    def __init__(self) -> None:
+        self.ready: list[Handle] = []
+
+    def call_soon(self, func: Callable, *args: Any) -> Handle:
+        handle = Handle(func, args)
+        self.ready.append(handle)
+        return handle
+
+    def time(self) -> float:
+        return CLOCK.now.timestamp()
+
+
+class HomeAssistant:
+    def __init__(self, config_dir: str = "/config") -> None:
+        self.data: dict[str, Any] = {}
+        self.bus = Bus()
+        self.services = ServiceRegistry()
+        self.recorder = Recorder()
+        self.states = StateMachine(self)
+        self.loop = FakeLoop()
+        self.config = types.SimpleNamespace(
+            config_dir=config_dir, path=lambda *parts: str(Path(config_dir, *parts))
+        )
+        self.config_entries = ConfigEntries(self)
+        self.storage: dict[str, Any] = {}
+        self._state_listeners: dict[str, list[Callable]] = {}
+        self._timers: list[list[Any]] = []
+        self._timer_seq = itertools.count()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def async_add_executor_job(self, func: Callable, *args: Any) -> Any:
+        return func(*args)
+
+    def async_create_task(self, coro: Any) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _add_timer(self, when: dt.datetime, action: Callable) -> Callable[[], None]:
+        timer = [when.timestamp(), next(self._timer_seq), action, False]
+        heapq.heappush(self._timers, timer)
+
+        def cancel() -> None:
+            timer[3] = True
+
+        return cancel
+
+    @property
+    def pending_timers(self) -> int:
+        return sum(1 for timer in self._timers if not timer[3])
+
+    async def async_fire_time_changed(self, now: dt.datetime) -> int:
+        """Move the clock to ``now`` and run every timer that became due."""
+        CLOCK.now = now
+        fired = 0
+        while self._timers and self._timers[0][0] <= now.timestamp():
+            _ts, _seq, action, cancelled = heapq.heappop(self._timers)
+            if cancelled:
+                continue
+            fired += 1
+            result = action(now)
+            if asyncio.iscoroutine(result):
+                self.async_create_task(result)
+        await self.async_block_till_done()
+        return fired
+
+    async def async_block_till_done(self) -> None:
+        while True:
+            ready, self.loop.ready = self.loop.ready, []
+            for handle in ready:
+                if handle.cancelled:
+                    continue
+                func, args = handle.func, handle.args
+                func(*args)
+            pending = [task for task in self._tasks if not task.done()]
+            if pending:
+                await asyncio.gather(*pending)
+            elif not self.loop.ready:
+                return
+
+    async def async_flush_stores(self) -> None:
+        for store in list(self.data.get("_stores", ())):
+            store.flush()
+
+
+# --------------------------------------------------------------------------
+# homeassistant.config_entries
+
+
+class ConfigEntry:
+    def __init__(
+        self,
+        *,
+        domain: str = DOMAIN,
+        title: str = "",
+        data: dict | None = None,
+        options: dict | None = None,
+        entry_id: str | None = None,
+        unique_id: str | None = None,
+        version: int = 1,
+    ) -> None:
+        self.domain = domain
+        self.title = title
+        self.data = dict(data or {})
+        self.options = dict(options or {})
+        self.entry_id = entry_id or f"entry{next(_entry_ids)}"
+        self.unique_id = unique_id
+        self.version = version
+        self.update_listeners: list[Callable] = []
+        self._on_unload: list[Callable[[], None]] = []
+        self.loaded = False
+
+    def add_update_listener(self, listener: Callable) -> Callable[[], None]:
+        self.update_listeners.append(listener)
+        return lambda: self.update_listeners.remove(listener)
+
+    def async_on_unload(self, func: Callable[[], None]) -> None:
+        self._on_unload.append(func)
+
+
+_entry_ids = itertools.count(1)
+
+
+class ConfigEntries:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._entries: dict[str, ConfigEntry] = {}
+        self._integration: types.ModuleType | None = None
+        self._setup_done = False
+        # entry_id -> entities added by its platforms
+        self.entities: dict[str, list[Any]] = {}
+
+    def async_entries(self, domain: str | None = None) -> list[ConfigEntry]:
+        return [e for e in self._entries.values() if domain is None or e.domain == domain]
+
+    def async_get_entry(self, entry_id: str) -> ConfigEntry | None:
+        return self._entries.get(entry_id)
+
+    def async_update_entry(self, entry, *, data=None, options=None, title=None, version=None) -> bool:
+        changed = False
+        for attr, value in (("data", data), ("options", options), ("title", title), ("version", version)):
+            if value is not None and getattr(entry, attr) != value:
+                setattr(entry, attr, dict(value) if isinstance(value, dict) else value)
+                changed = True
+        if changed:
+            for listener in list(entry.update_listeners):
+                self.hass.async_create_task(listener(self.hass, entry))
+        return changed
+
+    async def async_add(self, entry: ConfigEntry) -> bool:
+        self._entries[entry.entry_id] = entry
+        return await self.async_setup(entry.entry_id)
+
+    def add_without_setup(self, entry: ConfigEntry) -> None:
+        self._entries[entry.entry_id] = entry
+
+    async def async_setup(self, entry_id: str) -> bool:
+        entry = self._entries[entry_id]
+        integration = self._integration
+        if not self._setup_done:
+            self._setup_done = True
+            await integration.async_setup(self.hass, {})
+        # Like Home Assistant, upgrade entries older than the config flow first
+        flow_version = importlib.import_module(f"{DOMAIN}.const").CONFIG_ENTRY_VERSION
+        if entry.version < flow_version and not await integration.async_migrate_entry(self.hass, entry):
+            return False
+        entry.loaded = await integration.async_setup_entry(self.hass, entry)
+        return entry.loaded
+
+    async def async_forward_entry_setups(self, entry: ConfigEntry, platforms: list) -> None:
+        for platform in platforms:
+            name = _platform_name(platform)
+            module = importlib.import_module(f"{DOMAIN}.{name}")
+            added: list[Any] = []
+            setup_done: list[bool] = []
+
+            def add_entities(entities, update=False, name=name, added=added, setup_done=setup_done):
+                if not setup_done:
+                    added.extend(entities)
+                    return
+                # Entities added after setup, such as new hub items
+                self.hass.async_create_task(self._async_add_entities(entry, name, list(entities)))
+
+            await module.async_setup_entry(self.hass, entry, add_entities)
+            setup_done.append(True)
+            await self._async_add_entities(entry, name, added)
+
+    async def _async_add_entities(self, entry: ConfigEntry, platform: str, entities: list) -> None:
+        ent_reg = _entity_registries.setdefault(id(self.hass), EntityRegistry(self.hass))
+        dev_reg = _device_registries.setdefault(id(self.hass), DeviceRegistry(self.hass))
+        for entity in entities:
+            entity.hass = self.hass
+            existing = ent_reg.async_get_entity_id(platform, DOMAIN, entity.unique_id)
+            entity.entity_id = existing or ent_reg.generate_entity_id(platform, entity)
+            entity.platform = types.SimpleNamespace(domain=platform, platform_name=DOMAIN)
+            if ent_reg.register(entity, platform, entry.entry_id).disabled_by:
+                continue
+            device_info = entity.device_info
+            if device_info:
+                registry_entry = ent_reg.async_get(entity.entity_id)
+                registry_entry.device_id = dev_reg.register(device_info, entry.entry_id).id
+            self.entities.setdefault(entry.entry_id, []).append(entity)
+            await entity.async_added_to_hass()
+            entity.async_write_ha_state()
+
+    async def async_unload_platforms(self, entry: ConfigEntry, platforms: list) -> bool:
+        for entity in self.entities.pop(entry.entry_id, []):
+            await entity.async_internal_remove()
+        return True
+
+    async def async_unload(self, entry_id: str) -> bool:
+        entry = self._entries[entry_id]
+        if not entry.loaded:
+            return True
+        result = await self._integration.async_unload_entry(self.hass, entry)
+        for func in entry._on_unload:
+            func()
+        entry._on_unload.clear()
+        entry.update_listeners.clear()
+        entry.loaded = False
+        return result
+
+    async def async_reload(self, entry_id: str) -> bool:
+        await self.async_unload(entry_id)
+        return await self.async_setup(entry_id)
+
+    async def async_remove(self, entry_id: str) -> dict:
+        await self.async_unload(entry_id)
+        entry = self._entries.pop(entry_id)
+        remove = getattr(self._integration, "async_remove_entry", None)
+        if remove:
+            await remove(self.hass, entry)
+        return {"require_restart": False}
+
+
+def _platform_name(platform: Any) -> str:
+    return platform.value if isinstance(platform, enum.Enum) else str(platform)
+
+
+class Platform(str, enum.Enum):
+    BINARY_SENSOR = "binary_sensor"
+    BUTTON = "button"
+    CALENDAR = "calendar"
+    SENSOR = "sensor"
+
+
+# --------------------------------------------------------------------------
+# Entities and registries
+
+
+class Entity:
+    hass: Any = None
+    entity_id: str | None = None
+    platform: Any = None
+    _attr_unique_id: str | None = None
+    _attr_has_entity_name = False
+    _attr_translation_key: str | None = None
+    _attr_translation_placeholders: dict | None = None
+    _attr_name: str | None = None
+    _attr_icon: str | None = None
+    _attr_should_poll = True
+    _attr_extra_state_attributes: dict | None = None
+    _attr_device_info: Any = None
+    _attr_entity_registry_enabled_default = True
+    _unrecorded_attributes: frozenset = frozenset()
+
+    @property
+    def unique_id(self) -> str | None:
+        return self._attr_unique_id
+
+    @property
+    def name(self) -> str | None:
+        return self._attr_name
+
+    @property
+    def icon(self) -> str | None:
+        return self._attr_icon
+
+    @property
+    def device_info(self) -> Any:
+        return self._attr_device_info
+
+    @property
+    def state(self) -> Any:
+        return getattr(self, "_attr_state", None)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        return self._attr_extra_state_attributes
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def async_on_remove(self, func: Callable[[], None]) -> None:
+        self.__dict__.setdefault("_on_remove", []).append(func)
+
+    async def async_added_to_hass(self) -> None:
+        pass
+
+    async def async_will_remove_from_hass(self) -> None:
+        pass
+
+    async def async_internal_remove(self) -> None:
+        await self.async_will_remove_from_hass()
+        for func in self.__dict__.pop("_on_remove", []):
+            func()
+        self.hass.states.async_remove(self.entity_id)
+
+    async def async_remove(self, *, force_remove: bool = False) -> None:
+        await self.async_internal_remove()
+
+    def async_write_ha_state(self) -> None:
+        attributes = dict(self.extra_state_attributes or {})
+        unit = getattr(self, "native_unit_of_measurement", None)
+        if unit is not None:
+            attributes["unit_of_measurement"] = unit
+        # Base attributes the real state machine adds, so recorder rows are realistic
+        parts = [_device_name(self.hass, self.device_info)] if self._attr_has_entity_name else []
+        parts.append(self.name or _translated_name(self, self.entity_id.split(".")[0]) or self._attr_translation_key)
+        attributes["friendly_name"] = " ".join(str(p) for p in parts if p)
+        if self.icon:
+            attributes["icon"] = self.icon
+        self.hass.states.async_set(self.entity_id, self.state, attributes, self._unrecorded_attributes)
+
+
+class SensorEntity(Entity):
+    _attr_native_value: Any = None
+    _attr_native_unit_of_measurement: str | None = None
+    _attr_state_class: Any = None
+
+    @property
+    def native_value(self) -> Any:
+        return self._attr_native_value
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        return self._attr_native_unit_of_measurement
+
+    @property
+    def state(self) -> Any:
+        value = self.native_value
+        if isinstance(value, (dt.date, dt.datetime)):
+            return value.isoformat()
+        return value
+
+
+class ButtonEntity(Entity):
+    _attr_state: Any = None
+
+
+class BinarySensorDeviceClass(str, enum.Enum):
+    PROBLEM = "problem"
+
+
+class BinarySensorEntity(Entity):
+    _attr_is_on: bool | None = None
+    _attr_device_class: Any = None
+
+    @property
+    def is_on(self) -> bool | None:
+        return self._attr_is_on
+
+    @property
+    def state(self) -> str | None:
+        is_on = self.is_on
+        return None if is_on is None else "on" if is_on else "off"
+
+
+class CalendarEvent:
+    def __init__(self, start, end, summary, description=None, location=None, uid=None) -> None:
+        self.start = start
+        self.end = end
+        self.summary = summary
+        self.description = description
+        self.location = location
+        self.uid = uid
+
+    @property
+    def all_day(self) -> bool:
+        return not isinstance(self.start, dt.datetime)
+
+    @staticmethod
+    def _local(value: dt.date | dt.datetime) -> dt.datetime:
+        return value if isinstance(value, dt.datetime) else _start_of_local_day(value)
+
+    @property
+    def start_datetime_local(self) -> dt.datetime:
+        return self._local(self.start)
+
+    @property
+    def end_datetime_local(self) -> dt.datetime:
+        return self._local(self.end)
+
+
+class CalendarEntity(Entity):
+    @property
+    def event(self) -> CalendarEvent | None:
+        return None
+
+    @property
+    def state(self) -> str:
+        event = self.event
+        if event is not None and event.start_datetime_local <= CLOCK.now < event.end_datetime_local:
+            return "on"
+        return "off"
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        event = self.event
+        if event is None:
+            return None
+        return {
+            "message": event.summary,
+            "all_day": event.all_day,
+            "start_time": event.start_datetime_local.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": event.end_datetime_local.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    async def async_get_events(self, hass, start_date, end_date) -> list[CalendarEvent]:
+        raise NotImplementedError
+
+
+class SensorDeviceClass(str, enum.Enum):
+    DATE = "date"
+    TIMESTAMP = "timestamp"
+
+
+class SensorStateClass(str, enum.Enum):
+    MEASUREMENT = "measurement"
+    TOTAL = "total"
+    TOTAL_INCREASING = "total_increasing"
+
+
+class EntityCategory(str, enum.Enum):
+    CONFIG = "config"
+    DIAGNOSTIC = "diagnostic"
+
+
+class DeviceInfo(dict):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+
+
+def _device_name(hass: HomeAssistant, info: dict | None) -> str | None:
+    """Name of the device ``info`` describes; a link to another device has none of its own."""
+    if not info:
+        return None
+    if info.get("name"):
+        return info["name"]
+    registry = _device_registries.get(id(hass))
+    device = registry.async_get_device(identifiers=info.get("identifiers")) if registry else None
+    return device.name if device else None
+
+
+def _translated_name(entity: Entity, domain: str) -> str | None:
+    """Entity name from strings.json, only for names with placeholders."""
+    if not entity._attr_translation_placeholders:
+        return None
+    if "strings" not in _translations:
+        _translations["strings"] = json.loads((INTEGRATION_DIR / "strings.json").read_text())
+    name = _translations["strings"]["entity"][domain][entity._attr_translation_key]["name"]
+    return name.format(**entity._attr_translation_placeholders)
+
+
+_translations: dict[str, Any] = {}
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "unnamed"
+
+
+EVENT_ENTITY_REGISTRY_UPDATED = "entity_registry_updated"
+
+
+class RegistryEntry:
+    def __init__(self, entity_id, unique_id, platform, domain, config_entry_id) -> None:
+        self.entity_id = entity_id
+        self.unique_id = unique_id
+        self.platform = platform
+        self.domain = domain
+        self.config_entry_id = config_entry_id
+        self.device_id = None
+        self.area_id = None
+        self.labels: set[str] = set()
+        self.disabled_by = None
+
+
+class EntityRegistry:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.entities: dict[str, RegistryEntry] = {}
+        self._by_unique_id: dict[tuple[str, str, str], str] = {}
+        self._live: dict[str, Entity] = {}
+
+    def generate_entity_id(self, domain: str, entity: Entity) -> str:
+        parts = [_device_name(self.hass, entity.device_info)] if entity._attr_has_entity_name else []
+        parts.append(
+            entity.name or _translated_name(entity, domain) or entity._attr_translation_key or entity.unique_id
+        )
+        base = f"{domain}.{_slugify('_'.join(str(p) for p in parts if p))}"
+        entity_id, suffix = base, 2
+        while entity_id in self.entities:
+            entity_id, suffix = f"{base}_{suffix}", suffix + 1
+        return entity_id
+
+    def register(self, entity: Entity, domain: str, config_entry_id: str) -> RegistryEntry:
+        entry = self.entities.get(entity.entity_id)
+        if entry is None:
+            entry = RegistryEntry(entity.entity_id, entity.unique_id, DOMAIN, domain, config_entry_id)
+            if not entity._attr_entity_registry_enabled_default:
+                entry.disabled_by = "integration"
+            self.entities[entity.entity_id] = entry
+            self._by_unique_id[(domain, DOMAIN, entity.unique_id)] = entity.entity_id
+        if not entry.disabled_by:
+            self._live[entity.entity_id] = entity
+        return entry
+
+    def async_get(self, entity_id: str) -> RegistryEntry | None:
+        return self.entities.get(entity_id)
+
+    def async_get_entity_id(self, domain: str, platform: str, unique_id: str) -> str | None:
+        return self._by_unique_id.get((str(_platform_name(domain)), platform, unique_id))
+
+    def async_update_entity(self, entity_id: str, **changes: Any) -> RegistryEntry:
+        entry = self.entities[entity_id]
+        new_entity_id = changes.pop("new_entity_id", None)
+        old_values = {attr: getattr(entry, attr) for attr in changes}
+        for attr, value in changes.items():
+            setattr(entry, attr, value)
+        data: dict[str, Any] = {"action": "update", "entity_id": entity_id, "changes": old_values}
+        if new_entity_id is not None and new_entity_id != entity_id:
+            # The live entity follows the rename, as Home Assistant re-adds it
+            del self.entities[entity_id]
+            entry.entity_id = new_entity_id
+            self.entities[new_entity_id] = entry
+            self._by_unique_id[(entry.domain, entry.platform, entry.unique_id)] = new_entity_id
+            entity = self._live.pop(entity_id, None)
+            if entity is not None:
+                self._live[new_entity_id] = entity
+                self.hass.states.async_remove(entity_id)
+                entity.entity_id = new_entity_id
+                entity.async_write_ha_state()
+            data.update(entity_id=new_entity_id, old_entity_id=entity_id)
+            data["changes"]["entity_id"] = entity_id
+        self.hass.bus.async_fire(EVENT_ENTITY_REGISTRY_UPDATED, data)
+        return entry
+
+    def async_remove(self, entity_id: str) -> None:
+        entry = self.entities.pop(entity_id, None)
+        if entry is None:
+            return
+        self._by_unique_id.pop((entry.domain, entry.platform, entry.unique_id), None)
+        self.hass.bus.async_fire(EVENT_ENTITY_REGISTRY_UPDATED, {"action": "remove", "entity_id": entity_id})
+        entity = self._live.pop(entity_id, None)
+        if entity is not None:
+            for entities in self.hass.config_entries.entities.values():
+                if entity in entities:
+                    entities.remove(entity)
+            self.hass.async_create_task(entity.async_internal_remove())
+
+
+def async_entries_for_config_entry(registry: EntityRegistry, config_entry_id: str) -> list[RegistryEntry]:
+    return [e for e in registry.entities.values() if e.config_entry_id == config_entry_id]
+
+
+def async_entries_for_device(
+    registry: EntityRegistry, device_id: str, include_disabled_entities: bool = False
+) -> list[RegistryEntry]:
+    return [
+        e
+        for e in registry.entities.values()
+        if e.device_id == device_id and (include_disabled_entities or not e.disabled_by)
+    ]
+
+
+class DeviceEntry:
+    def __init__(self, device_id: str, identifiers: set, name: Any, connections: set | None = None) -> None:
+        self.id = device_id
+        self.identifiers = identifiers
+        self.connections = connections or set()
+        self.name = name
+        self.area_id = None
+        self.config_entries: set[str] = set()
+
+
+EVENT_DEVICE_REGISTRY_UPDATED = "device_registry_updated"
+
+
+class DeviceRegistry:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.devices: dict[str, DeviceEntry] = {}
+        self._by_identifier: dict[tuple, str] = {}
+        self._ids = itertools.count(1)
+
+    def register(self, info: dict, config_entry_id: str) -> DeviceEntry:
+        identifiers = set(info.get("identifiers") or ())
+        device = self.async_get_device(identifiers=identifiers)
+        if device is None:
+            device = DeviceEntry(
+                f"device{next(self._ids)}", identifiers, info.get("name"), set(info.get("connections") or ())
+            )
+            self.devices[device.id] = device
+            for identifier in identifiers:
+                self._by_identifier[identifier] = device.id
+            if info.get("suggested_area"):
+                # Like Home Assistant, only new devices take the suggested area
+                device.area_id = _area_registries.setdefault(
+                    id(self.hass), AreaRegistry()
+                ).async_get_or_create(info["suggested_area"]).id
+        device.config_entries.add(config_entry_id)
+        return device
+
+    def async_get_or_create(self, *, config_entry_id: str, **info: Any) -> DeviceEntry:
+        return self.register(info, config_entry_id)
+
+    def async_get_device(self, identifiers: set | None = None, **_: Any) -> DeviceEntry | None:
+        for identifier in identifiers or ():
+            device_id = self._by_identifier.get(identifier)
+            if device_id:
+                return self.devices.get(device_id)
+        return None
+
+    def async_get(self, device_id: str) -> DeviceEntry | None:
+        return self.devices.get(device_id)
+
+    def async_update_device(
+        self,
+        device_id: str,
+        add_config_entry_id: str | None = None,
+        remove_config_entry_id: str | None = None,
+        **changes: Any,
+    ) -> None:
+        device = self.devices[device_id]
+        if add_config_entry_id:
+            device.config_entries.add(add_config_entry_id)
+        if remove_config_entry_id:
+            device.config_entries.discard(remove_config_entry_id)
+            if not device.config_entries:
+                self.async_remove_device(device_id)
+                return
+        old_values = {attr: getattr(device, attr) for attr in changes if hasattr(device, attr)}
+        for attr in old_values:
+            setattr(device, attr, changes[attr])
+        if old_values:
+            self.hass.bus.async_fire(
+                EVENT_DEVICE_REGISTRY_UPDATED, {"action": "update", "device_id": device_id, "changes": old_values}
+            )
+
+    def async_remove_device(self, device_id: str) -> None:
+        device = self.devices.pop(device_id, None)
+        if device:
+            for identifier in device.identifiers:
+                self._by_identifier.pop(identifier, None)
+
+
+def async_device_entries_for_config_entry(registry: DeviceRegistry, config_entry_id: str) -> list[DeviceEntry]:
+    return [d for d in registry.devices.values() if config_entry_id in d.config_entries]
+
+
+class AreaEntry:
+    def __init__(self, area_id: str, name: str) -> None:
+        self.id = area_id
+        self.name = name
+
+
+class AreaRegistry:
+    def __init__(self) -> None:
+        self.areas: dict[str, AreaEntry] = {}
+
+    def async_create(self, name: str) -> AreaEntry:
+        area = AreaEntry(_slugify(name), name)
+        self.areas[area.id] = area
+        return area
+
+    def async_get_area(self, area_id: str) -> AreaEntry | None:
+        return self.areas.get(area_id)
+
+    def async_get_or_create(self, name: str) -> AreaEntry:
+        return next((a for a in self.areas.values() if a.name == name), None) or self.async_create(name)
+
+
+_entity_registries: dict[int, EntityRegistry] = {}
+_device_registries: dict[int, DeviceRegistry] = {}
+_area_registries: dict[int, AreaRegistry] = {}
+
+
+# --------------------------------------------------------------------------
+# helpers
+
+
+def async_dispatcher_connect(hass: HomeAssistant, signal: str, target: Callable) -> Callable[[], None]:
+    targets = hass.data.setdefault("_dispatcher", {}).setdefault(signal, [])
+    targets.append(target)
+    return lambda: targets.remove(target) if target in targets else None
+
+
+def async_dispatcher_send(hass: HomeAssistant, signal: str, *args: Any) -> None:
+    for target in list(hass.data.get("_dispatcher", {}).get(signal, ())):
+        target(*args)
+
+
+def async_track_point_in_utc_time(hass: HomeAssistant, action: Callable, point: dt.datetime) -> Callable[[], None]:
+    return hass._add_timer(point, action)
+
+
+def async_call_later(hass: HomeAssistant, delay: float, action: Callable) -> Callable[[], None]:
+    return hass._add_timer(CLOCK.now + dt.timedelta(seconds=delay), action)
+
+
+def async_track_state_change_event(hass: HomeAssistant, entity_ids: Any, action: Callable) -> Callable[[], None]:
+    ids = [entity_ids] if isinstance(entity_ids, str) else list(entity_ids)
+    for entity_id in ids:
+        hass._state_listeners.setdefault(entity_id, []).append(action)
+
+    def remove() -> None:
+        for entity_id in ids:
+            hass._state_listeners[entity_id].remove(action)
+
+    return remove
+
+
+class SelectedEntities:
+    def __init__(self, referenced: set, indirectly_referenced: set) -> None:
+        self.referenced = referenced
+        self.indirectly_referenced = indirectly_referenced
+
+
+def async_extract_referenced_entity_ids(hass: HomeAssistant, call: ServiceCall, expand_group: bool = True):
+    entity_ids = call.data.get("entity_id") or []
+    if isinstance(entity_ids, str):
+        entity_ids = [entity_ids]
+    return SelectedEntities(set(entity_ids), set())
+
+
+class Store:
+    """Store that keeps data in ``hass.storage`` and saves delayed data on flush."""
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str, **_: Any) -> None:
+        self.hass = hass
+        self.version = version
+        self.key = key
+        self._data_func: Callable[[], Any] | None = None
+        hass.data.setdefault("_stores", []).append(self)
+
+    async def async_load(self) -> Any:
+        return self.hass.storage.get(self.key)
+
+    async def async_save(self, data: Any) -> None:
+        self._data_func = None
+        self.hass.storage[self.key] = data
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float = 0) -> None:
+        self._data_func = data_func
+
+    async def async_remove(self) -> None:
+        self._data_func = None
+        self.hass.storage.pop(self.key, None)
+
+    def flush(self) -> None:
+        if self._data_func is not None:
+            self.hass.storage[self.key] = self._data_func()
+            self._data_func = None
+
+
+def _comp_entity_ids(value: Any) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def make_entity_service_schema(schema: dict, **_: Any) -> Schema:
+    return Schema(
+        {
+            Optional("entity_id"): _comp_entity_ids,
+            Optional("device_id"): _comp_entity_ids,
+            Optional("area_id"): _comp_entity_ids,
+            Optional("label_id"): _comp_entity_ids,
+            **schema,
+        }
+    )
+
+
+# --------------------------------------------------------------------------
+# homeassistant.components.websocket_api
+
+ERR_INVALID_FORMAT = "invalid_format"
+
+
+def websocket_command(schema: dict) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        func._ws_schema = Schema(schema)
+        func._ws_command = next(
+            value for marker, value in schema.items() if getattr(marker, "key", marker) == "type"
+        )
+        return func
+
+    return decorator
+
+
+def async_response(func: Callable) -> Callable:
+    def schedule(hass: HomeAssistant, connection: Any, msg: dict) -> None:
+        hass.async_create_task(func(hass, connection, msg))
+
+    schedule._ws_schema = getattr(func, "_ws_schema", None)
+    schedule._ws_command = getattr(func, "_ws_command", None)
+    return schedule
+
+
+def async_register_command(hass: HomeAssistant, handler: Callable) -> None:
+    hass.data.setdefault("_websocket_commands", {})[handler._ws_command] = handler
+
+
+def event_message(iden: int, event: Any) -> dict:
+    return {"id": iden, "type": "event", "event": event}
+
+
+class ActiveConnection:
+    """A websocket client and server connection in one; messages are kept in order."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.messages: list[dict] = []
+        self.subscriptions: dict[int, Callable[[], None]] = {}
+        self._ids = itertools.count(1)
+
+    def send_result(self, msg_id: int, result: Any = None) -> None:
+        self.messages.append({"id": msg_id, "type": "result", "success": True, "result": result})
+
+    def send_error(self, msg_id: int, code: str, message: str) -> None:
+        self.messages.append(
+            {"id": msg_id, "type": "result", "success": False, "error": {"code": code, "message": message}}
+        )
+
+    def send_message(self, message: dict) -> None:
+        self.messages.append(message)
+
+    async def async_send(self, msg: dict) -> dict:
+        """Run a command and return its result message."""
+        msg = {"id": next(self._ids), **msg}
+        handler = self.hass.data["_websocket_commands"][msg["type"]]
+        try:
+            data = handler._ws_schema(msg)
+        except Invalid as err:
+            self.send_error(msg["id"], ERR_INVALID_FORMAT, str(err))
+        else:
+            handler(self.hass, self, data)
+        await self.hass.async_block_till_done()
+        return next(m for m in self.messages if m["id"] == msg["id"] and m["type"] == "result")
+
+    def events(self, msg_id: int) -> list[Any]:
+        return [m["event"] for m in self.messages if m["id"] == msg_id and m["type"] == "event"]
+
+    def async_unsubscribe(self, msg_id: int) -> None:
+        self.subscriptions.pop(msg_id)()
+
+
+# --------------------------------------------------------------------------
+# Installation
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def build_modules() -> dict[str, types.ModuleType]:
+    """Return fake ``voluptuous`` and ``homeassistant`` modules by name."""
+    modules = {
+        "voluptuous": _module(
+            "voluptuous",
+            Invalid=Invalid,
+            Schema=Schema,
+            Required=Required,
+            Optional=Optional,
+            All=All,
+            Coerce=Coerce,
+            Range=Range,
+            In=In,
+            ALLOW_EXTRA=None,
+        ),
+        "homeassistant": _module("homeassistant"),
+        "homeassistant.const": _module(
+            "homeassistant.const",
+            Platform=Platform,
+            EntityCategory=EntityCategory,
+            EVENT_HOMEASSISTANT_STOP="homeassistant_stop",
+            STATE_ON="on",
+            STATE_OFF="off",
+        ),
+        "homeassistant.core": _module(
+            "homeassistant.core",
+            HomeAssistant=HomeAssistant,
+            callback=callback,
+            Event=Event,
+            State=State,
+            ServiceCall=ServiceCall,
+            ServiceResponse=Any,
+            SupportsResponse=SupportsResponse,
+        ),
+        "homeassistant.config_entries": _module(
+            "homeassistant.config_entries", ConfigEntry=ConfigEntry
+        ),
+        "homeassistant.components": _module("homeassistant.components"),
+        "homeassistant.components.sensor": _module(
+            "homeassistant.components.sensor",
+            SensorEntity=SensorEntity,
+            SensorDeviceClass=SensorDeviceClass,
+            SensorStateClass=SensorStateClass,
+        ),
+        "homeassistant.components.sensor.const": _module(
+            "homeassistant.components.sensor.const",
+            SensorDeviceClass=SensorDeviceClass,
+            SensorStateClass=SensorStateClass,
+        ),
+        "homeassistant.components.binary_sensor": _module(
+            "homeassistant.components.binary_sensor",
+            BinarySensorEntity=BinarySensorEntity,
+            BinarySensorDeviceClass=BinarySensorDeviceClass,
+        ),
+        "homeassistant.components.button": _module(
+            "homeassistant.components.button", ButtonEntity=ButtonEntity
+        ),
+        "homeassistant.components.websocket_api": _module(
+            "homeassistant.components.websocket_api",
+            ActiveConnection=ActiveConnection,
+            ERR_INVALID_FORMAT=ERR_INVALID_FORMAT,
+            async_register_command=async_register_command,
+            async_response=async_response,
+            event_message=event_message,
+            websocket_command=websocket_command,
+        ),
+        "homeassistant.components.calendar": _module(
+            "homeassistant.components.calendar", CalendarEntity=CalendarEntity, CalendarEvent=CalendarEvent
+        ),
+        "homeassistant.helpers": _module("homeassistant.helpers"),
+        "homeassistant.helpers.config_validation": _module(
+            "homeassistant.helpers.config_validation",
+            date=_parse_date,
+            string=lambda value: str(value),
+            icon=lambda value: str(value),
+            entity_id=lambda value: str(value).lower(),
+            entity_ids=_comp_entity_ids,
+            boolean=bool,
+            ensure_list=lambda value: [] if value is None else value if isinstance(value, list) else [value],
+            make_entity_service_schema=make_entity_service_schema,
+        ),
+        "homeassistant.helpers.device_registry": _module(
+            "homeassistant.helpers.device_registry",
+            async_get=lambda hass: _device_registries.setdefault(id(hass), DeviceRegistry(hass)),
+            DeviceEntry=DeviceEntry,
+            async_entries_for_config_entry=async_device_entries_for_config_entry,
+            EVENT_DEVICE_REGISTRY_UPDATED=EVENT_DEVICE_REGISTRY_UPDATED,
+        ),
+        "homeassistant.helpers.area_registry": _module(
+            "homeassistant.helpers.area_registry",
+            async_get=lambda hass: _area_registries.setdefault(id(hass), AreaRegistry()),
+            AreaEntry=AreaEntry,
+        ),
+        "homeassistant.helpers.entity_registry": _module(
+            "homeassistant.helpers.entity_registry",
+            async_get=lambda hass: _entity_registries.setdefault(id(hass), EntityRegistry(hass)),
+            async_entries_for_config_entry=async_entries_for_config_entry,
+            async_entries_for_device=async_entries_for_device,
+            RegistryEntry=RegistryEntry,
+            EVENT_ENTITY_REGISTRY_UPDATED=EVENT_ENTITY_REGISTRY_UPDATED,
+        ),
+        "homeassistant.helpers.dispatcher": _module(
+            "homeassistant.helpers.dispatcher",
+            async_dispatcher_connect=async_dispatcher_connect,
+            async_dispatcher_send=async_dispatcher_send,
+        ),
+        "homeassistant.helpers.entity": _module(
+            "homeassistant.helpers.entity", Entity=Entity, DeviceInfo=DeviceInfo
+        ),
+        "homeassistant.helpers.entity_platform": _module(
+            "homeassistant.helpers.entity_platform", AddEntitiesCallback=Callable
+        ),
+        "homeassistant.helpers.event": _module(
+            "homeassistant.helpers.event",
+            async_track_point_in_utc_time=async_track_point_in_utc_time,
+            async_call_later=async_call_later,
+            async_track_state_change_event=async_track_state_change_event,
+        ),
+        "homeassistant.helpers.service": _module(
+            "homeassistant.helpers.service",
+            async_extract_referenced_entity_ids=async_extract_referenced_entity_ids,
+        ),
+        "homeassistant.helpers.storage": _module("homeassistant.helpers.storage", Store=Store),
+        "homeassistant.util": _module("homeassistant.util"),
+        "homeassistant.util.dt": _module(
+            "homeassistant.util.dt",
+            utcnow=_utcnow,
+            now=_utcnow,
+            as_local=lambda value: value.astimezone(UTC),
+            as_utc=lambda value: value.astimezone(UTC),
+            start_of_local_day=_start_of_local_day,
+            utc_from_timestamp=lambda ts: dt.datetime.fromtimestamp(ts, UTC),
+            get_default_time_zone=lambda: UTC,
+            DEFAULT_TIME_ZONE=UTC,
+        ),
+    }
+    # Let ``from homeassistant.helpers import entity_registry as er`` work
+    for name, module in modules.items():
+        parent, _, child = name.rpartition(".")
+        if parent in modules:
+            setattr(modules[parent], child, module)
+    return modules
+
+
+def _is_fake_module(name: str) -> bool:
+    return name.split(".")[0] in FAKE_PACKAGES
+
+
+@contextlib.contextmanager
+def installed() -> Iterator[None]:
+    """Swap the fake modules into ``sys.modules`` and restore them afterwards."""
+    saved = {name: module for name, module in sys.modules.items() if _is_fake_module(name)}
+    for name in saved:
+        del sys.modules[name]
+    sys.modules.update(build_modules())
+    CLOCK.now = dt.datetime(2024, 1, 1, 12, tzinfo=UTC)
+    try:
+        yield
+    finally:
+        for name in [name for name in sys.modules if _is_fake_module(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+        _entity_registries.clear()
+        _device_registries.clear()
+        _area_registries.clear()
+
+
+def patch_modules(monkeypatch: Any) -> dict[str, types.ModuleType]:
+    """Install the fake modules through pytest's ``monkeypatch``.
+
+    For tests that stub a few modules of their own: they replace those
+    afterwards and take every other module from here.
+    """
+    modules = build_modules()
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    return modules
+
+
+def load_integration() -> types.ModuleType:
+    """Import the integration package from ``custom_components``."""
+    spec = importlib.util.spec_from_file_location(
+        DOMAIN, INTEGRATION_DIR / "__init__.py", submodule_search_locations=[str(INTEGRATION_DIR)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[DOMAIN] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_hass(config_dir: str | None = None) -> tuple[HomeAssistant, types.ModuleType]:
+    """Return a fake hass wired to the freshly imported integration.
+
+    Files the integration writes, such as the replacement journal, go to
+    ``config_dir`` or a new temporary directory.
+    """
+    hass = HomeAssistant(config_dir or tempfile.mkdtemp(prefix="fake_hass_"))
+    hass.config_entries._integration = load_integration()
+    return hass, hass.config_entries._integration
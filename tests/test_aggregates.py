@@ -0,0 +1,112 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def test_aggregates_follow_specs_groups_and_days():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        aggregates_mod = importlib.import_module("consumable_expiration.aggregates")
+        due_index = importlib.import_module("consumable_expiration.due_index")
+        spec = importlib.import_module("consumable_expiration.spec")
+        specs = due_index.IndexedSpecs()
+        specs["a"] = spec.ConsumableSpec("a", 10, _ord("2024-01-01"))
+        aggregates = aggregates_mod.Aggregates(specs, _ord("2024-01-06"))
+        specs["b"] = spec.ConsumableSpec("b", 20, _ord("2024-01-11"))
+        specs["c"] = spec.ConsumableSpec("c", None, _ord("2024-01-01"))
+        assert len(aggregates) == 2
+
+        today = _ord("2024-01-06")
+        assert aggregates.overdue(today) == 0
+        assert aggregates.due_within(today, 7) == 1
+        assert aggregates.next_due(today) == (_ord("2024-01-11"), ["a"])
+        # a is half used and b has not started
+        assert aggregates.percent_used(today) == 25.0
+
+        aggregates.async_set_groups("a", ("area:garage", "label:water"))
+        aggregates.async_set_groups("b", ("area:garage",))
+        assert aggregates.percent_used_by(today, "area") == {"garage": 25.0}
+        assert aggregates.percent_used_by(today, "label") == {"water": 50.0}
+
+        # Moving the day on only revisits a and b as they change phase
+        today = _ord("2024-01-21")
+        assert aggregates.overdue(today) == 1
+        assert aggregates.percent_used(today) == 75.0
+        assert aggregates.percent_used_by(today, "label") == {"water": 100.0}
+        assert aggregates.percent_used(_ord("2024-01-06")) == 25.0
+
+        specs.pop("a")
+        assert aggregates.percent_used_by(today, "label") == {}
+        assert aggregates.percent_used(today) == 50.0
+        specs.clear()
+        assert aggregates.percent_used(today) is None
+        assert aggregates.next_due(today) is None
+
+
+def test_hub_summary_sensors(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"soon_days": 5},
+        )
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "duration_days": 2, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "duration_days": 4, "start_date": "2024-01-01"},
+                {"id": "c", "name": "Filter C", "duration_days": 4, "start_date": "2024-01-01"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+
+        def value(name):
+            return hass.states.get(f"sensor.consumables_{name}")
+
+        assert value("overdue").state == "0"
+        assert value("due_soon").state == "3"
+        assert value("due_soon").attributes["days"] == 5
+        assert value("next_due").state == "2024-01-03"
+        assert value("next_due").attributes["consumables"] == ["Filter A"]
+        assert value("percent_used").state == "0.0"
+
+        # Areas come from the sensor or else its device; labels from the sensor
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        dev_reg = importlib.import_module("homeassistant.helpers.device_registry").async_get(hass)
+        ent_reg.async_update_entity("sensor.filter_a_days_remaining", labels={"water"})
+        device_id = ent_reg.async_get("sensor.filter_b_days_remaining").device_id
+        dev_reg.async_update_device(device_id, area_id="kitchen")
+        ent_reg.async_update_entity("sensor.filter_c_days_remaining", area_id="garage")
+        await hass.async_block_till_done()
+        attributes = value("percent_used").attributes
+        assert attributes["areas"] == {"garage": 0.0, "kitchen": 0.0}
+        assert attributes["labels"] == {"water": 0.0}
+
+        # One shared midnight refresh moves every summary along
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 3, tzinfo=fake_hass.UTC))
+        assert value("overdue").state == "1"
+        assert value("due_soon").state == "2"
+        assert value("next_due").attributes["consumables"] == ["Filter B", "Filter C"]
+        assert value("percent_used").state == "66.7"
+        assert value("percent_used").attributes["labels"] == {"water": 100.0}
+
+        # Replacing a consumable updates the counts without waiting for midnight
+        await hass.services.async_call(
+            "consumable_expiration", "mark_replaced", {"entity_id": "sensor.filter_a_days_remaining"}
+        )
+        await hass.async_block_till_done()
+        assert value("overdue").state == "0"
+
+        await hass.config_entries.async_unload(hub.entry_id)
+        assert hass.data["consumable_expiration"]["aggregates"].listeners == []
+        assert "aggregates_midnight" not in hass.data["consumable_expiration"]["scheduler"]._pending
+
+    with fake_hass.installed():
+        asyncio.run(run())
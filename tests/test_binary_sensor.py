@@ -0,0 +1,103 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import pytest
+
+import fake_hass
+
+DOMAIN = "consumable_expiration"
+
+
+def _at(*args):
+    return dt.datetime(*args, tzinfo=fake_hass.UTC)
+
+
+def test_binary_sensors_flip_at_local_midnight(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        scheduler = hass.data[DOMAIN]["scheduler"]
+
+        def states():
+            return (
+                hass.states.get("binary_sensor.filter_due_soon").state,
+                hass.states.get("binary_sensor.filter_expired").state,
+            )
+
+        assert states() == ("off", "off")
+
+        # Due on the 11th, so due soon from the 4th with the default seven days
+        await hass.async_fire_time_changed(_at(2024, 1, 3, 23, 59))
+        assert states() == ("off", "off")
+        await hass.async_fire_time_changed(_at(2024, 1, 4))
+        assert states() == ("on", "off")
+        await hass.async_fire_time_changed(_at(2024, 1, 11))
+        assert states() == ("off", "on")
+        # Nothing left to flip
+        assert f"{entry.entry_id}_is_expired" not in scheduler._pending
+        assert f"{entry.entry_id}_is_due_soon" not in scheduler._pending
+
+        # Replacing it turns both off and schedules the next flips
+        await hass.services.async_call(
+            DOMAIN, "set_start_date", {"entity_id": "binary_sensor.filter_expired", "start_date": "2024-01-11"}
+        )
+        await hass.async_block_till_done()
+        assert states() == ("off", "off")
+        assert scheduler._pending[f"{entry.entry_id}_is_due_soon"][0] == _at(2024, 1, 14).timestamp()
+
+        # Schedule changes that keep the state do not write it again
+        writes = hass.states.writes
+        await hass.services.async_call(
+            DOMAIN, "set_duration", {"entity_id": "sensor.filter_days_remaining", "duration_days": 30}
+        )
+        await hass.async_block_till_done()
+        assert hass.states.writes == writes + 1
+        assert states() == ("off", "off")
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_due_soon_window_follows_the_hub(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"soon_days": 14},
+        )
+        hass.storage[f"{DOMAIN}.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Brush", "duration_days": 10, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Undated"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        assert hass.states.get("binary_sensor.brush_due_soon").state == "on"
+        assert hass.states.get("binary_sensor.brush_expired").state == "off"
+        # No schedule, no state
+        assert hass.states.get("binary_sensor.undated_expired").state == "unknown"
+        assert "b_is_expired" not in hass.data[DOMAIN]["scheduler"]._pending
+
+        await hass.services.async_call(DOMAIN, "add_consumable", {"name": "Pad", "duration_days": 30})
+        await hass.async_block_till_done()
+        assert hass.states.get("binary_sensor.pad_due_soon").state == "off"
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_base_binary_sensor_is_abstract():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        binary_sensor = importlib.import_module("consumable_expiration.binary_sensor")
+        assert binary_sensor.ConsumableBinarySensor.__abstractmethods__ == {"_is_on", "_next_transition"}
+        with pytest.raises(TypeError):
+            binary_sensor.ConsumableBinarySensor(None, None, "a", {})
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+import fake_hass
+
+
+def _setup_package(monkeypatch):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.bulk", None)
+
+
+def test_validate_row_converts_due_date(monkeypatch):
+    _setup_package(monkeypatch)
+    from consumable_expiration.bulk import validate_row
+
+    assert validate_row({"id": "abc", "duration_days": "30", "due_date": "2024-01-31"}) == {
+        "id": "abc",
+        "duration_days": 30,
+        "start_date": "2024-01-01",
+    }
+    # Blank columns are left out so updates only touch what the row sets
+    assert validate_row({"name": " Filter ", "icon": "", "start_date": "2024-02-01"}) == {
+        "name": "Filter",
+        "start_date": "2024-02-01",
+    }
+    for raw in ({"duration_days": "0"}, {"start_date": "soon"}, {"due_date": "2024-01-31"}, {}):
+        with pytest.raises(ValueError):
+            validate_row(raw)
+
+
+def test_reader_streams_chunks_with_line_errors(monkeypatch, tmp_path):
+    _setup_package(monkeypatch)
+    from consumable_expiration.bulk import FORMAT_JSONL, RowReader
+
+    path = tmp_path / "items.jsonl"
+    path.write_text(
+        '{"name": "A", "duration_days": 10}\n'
+        "not json\n"
+        "\n"
+        '{"name": "B", "duration_days": -1}\n'
+        '{"name": "C", "duration_days": 5}\n'
+    )
+    reader = RowReader(path, FORMAT_JSONL)
+    first = reader.read_chunk(2)
+    second = reader.read_chunk(2)
+    assert reader.read_chunk(2) == []
+    reader.close()
+
+    assert [line for line, _, _ in first + second] == [1, 2, 4, 5]
+    assert first[0][1] == {"name": "A", "duration_days": 10}
+    assert first[1][1] is None and first[1][2].startswith("invalid JSON")
+    assert second[0][2] == "invalid duration_days -1"
+    assert second[1][1] == {"name": "C", "duration_days": 5}
+
+
+def test_reader_reports_unreadable_rows(monkeypatch, tmp_path):
+    _setup_package(monkeypatch)
+    import csv
+
+    from consumable_expiration.bulk import FORMAT_CSV, FORMAT_JSONL, RowReader
+
+    path = tmp_path / "items.csv"
+    huge = "x" * (csv.field_size_limit() + 1)
+    path.write_text(f"name,duration_days\nA,10\n{huge},5\nC,5\n")
+    reader = RowReader(path, FORMAT_CSV)
+    rows = reader.read_chunk()
+    assert reader.read_chunk() == []
+    reader.close()
+    assert [(line, row) for line, row, _ in rows] == [
+        (2, {"name": "A", "duration_days": 10}),
+        (3, None),
+        (4, {"name": "C", "duration_days": 5}),
+    ]
+    assert rows[1][2].startswith("invalid CSV")
+
+    # Undecodable bytes only fail their own row
+    path = tmp_path / "items.jsonl"
+    path.write_bytes(
+        b'{"name": "A", "duration_days": 10}\n{"name": "\xff\xfe", "duration_days": 5}\n{"name": "C", "duration_days": 5}\n'
+    )
+    reader = RowReader(path, FORMAT_JSONL)
+    rows = reader.read_chunk()
+    reader.close()
+    assert [(line, error) for line, _, error in rows] == [(1, None), (2, "invalid UTF-8"), (3, None)]
+
+
+def test_csv_round_trip(monkeypatch, tmp_path):
+    _setup_package(monkeypatch)
+    from consumable_expiration.bulk import FORMAT_CSV, RowReader, detect_format, write_rows
+
+    path = tmp_path / "export" / "items.csv"
+    rows = [
+        {
+            "id": "abc",
+            "name": "Filter",
+            "item_type": "hvac_filter",
+            "icon": None,
+            "duration_days": 90,
+            "start_date": "2024-01-01",
+            "due_date": "2024-03-31",
+        }
+    ]
+    assert write_rows(path, FORMAT_CSV, rows) == 1
+    assert not path.with_name("items.csv.tmp").exists()
+    assert detect_format(path) == FORMAT_CSV
+
+    reader = RowReader(path, FORMAT_CSV)
+    [(line, row, error)] = reader.read_chunk()
+    reader.close()
+    assert (line, error) == (2, None)
+    assert row == {
+        "id": "abc",
+        "name": "Filter",
+        "item_type": "hvac_filter",
+        "duration_days": 90,
+        "start_date": "2024-01-01",
+    }
+
+
+def test_resolve_config_path_stays_inside(monkeypatch, tmp_path):
+    _setup_package(monkeypatch)
+    from consumable_expiration.bulk import resolve_config_path
+
+    assert resolve_config_path(str(tmp_path), "a/b.csv") == tmp_path / "a" / "b.csv"
+    with pytest.raises(ValueError):
+        resolve_config_path(str(tmp_path), "../outside.csv")
+    with pytest.raises(ValueError):
+        resolve_config_path(str(tmp_path), "/etc/passwd")
+
+
+def test_reimporting_unchanged_rows_updates_nothing(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+
+        async def import_rows(rows):
+            with open(tmp_path / "rows.jsonl", "w", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(row) + "\n" for row in rows)
+            response = await hass.services.async_call(
+                "consumable_expiration", "import", {"file_path": "rows.jsonl"}, return_response=True
+            )
+            await hass.async_block_till_done()
+            return response["created"], response["updated"]
+
+        rows = [
+            {"id": "a", "name": "Filter A", "duration_days": 30, "start_date": "2024-01-01"},
+            {"id": "b", "name": "Filter B", "duration_days": 60, "start_date": "2024-01-01"},
+        ]
+        assert await import_rows(rows) == (2, 0)
+        assert await import_rows(rows) == (0, 0)
+        # Only the row that moves a date counts, and a due date is compared as its start
+        rows[0]["duration_days"] = 40
+        rows[1] = {"id": "b", "duration_days": 60, "due_date": "2024-03-01"}
+        assert await import_rows(rows) == (0, 1)
+        assert hass.data["consumable_expiration"]["specs"]["a"].duration == 40
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -16,12 +16,15 @@ def _setup_modules(monkeypatch, last_state=None):
     monkeypatch.setitem(sys.modules, "consumable_expiration", package)
     sys.modules.pop("consumable_expiration.button", None)
     sys.modules.pop("consumable_expiration.util", None)
+    sys.modules.pop("consumable_expiration.runtime", None)
 
     ha_module = types.ModuleType("homeassistant")
     components = types.ModuleType("homeassistant.components")
     button_module = types.ModuleType("homeassistant.components.button")
 
     class ButtonEntity:
+        entity_id = None
+        unique_id = None
         def __init__(self):
             self._attr_state = None
         @property
@@ -47,7 +50,11 @@ def _setup_modules(monkeypatch, last_state=None):
     class HomeAssistant:
         def __init__(self):
             self.config_entries = types.SimpleNamespace(async_update_entry=lambda *args, **kwargs: None)
+            index = types.SimpleNamespace(add=lambda *args: None, remove=lambda *args: None)
+            devices = types.SimpleNamespace(consumable=lambda entry, key, info: ({}, False))
+            self.data = {"consumable_expiration": {"index": index, "devices": devices}}
     core.HomeAssistant = HomeAssistant
+    core.callback = lambda func: func
 
     helpers = types.ModuleType("homeassistant.helpers")
     entity = types.ModuleType("homeassistant.helpers.entity")
@@ -55,6 +62,13 @@ def _setup_modules(monkeypatch, last_state=None):
         def __init__(self, **kwargs):
             pass
     entity.DeviceInfo = DeviceInfo
+    class Entity:
+        pass
+    entity.Entity = Entity
+    dispatcher = types.ModuleType("homeassistant.helpers.dispatcher")
+    dispatcher.async_dispatcher_connect = lambda hass, signal, target: (lambda: None)
+    dispatcher.async_dispatcher_send = lambda hass, signal, *args: None
+    helpers.dispatcher = dispatcher
     entity_platform = types.ModuleType("homeassistant.helpers.entity_platform")
     entity_platform.AddEntitiesCallback = object
     restore_state = types.ModuleType("homeassistant.helpers.restore_state")
@@ -75,6 +89,7 @@ def _setup_modules(monkeypatch, last_state=None):
     monkeypatch.setitem(sys.modules, "homeassistant.helpers.entity", entity)
     monkeypatch.setitem(sys.modules, "homeassistant.helpers.entity_platform", entity_platform)
     monkeypatch.setitem(sys.modules, "homeassistant.helpers.restore_state", restore_state)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers.dispatcher", dispatcher)
 
     return core, config_entries
 
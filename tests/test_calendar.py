@@ -0,0 +1,157 @@
+import asyncio
+import datetime as dt
+import importlib
+import random
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def test_due_index_moves_and_ranges():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        due_index = importlib.import_module("consumable_expiration.due_index")
+        spec = importlib.import_module("consumable_expiration.spec")
+        specs = due_index.IndexedSpecs()
+        changes = []
+        specs.due_index.listeners.append(lambda: changes.append(1))
+
+        specs["a"] = spec.ConsumableSpec("a", 10, _ord("2024-01-01"))
+        specs["b"] = spec.ConsumableSpec("b", 30, _ord("2024-01-01"))
+        specs["c"] = spec.ConsumableSpec("c", None, _ord("2024-01-01"))
+        index = specs.due_index
+        assert len(index) == 2
+        assert index.between(_ord("2024-01-01"), _ord("2024-02-01")) == [
+            (_ord("2024-01-11"), "a"),
+            (_ord("2024-01-31"), "b"),
+        ]
+        assert index.next_due(_ord("2024-01-12")) == _ord("2024-01-31")
+
+        # Re-setting the same schedule does not touch the index
+        specs["a"] = spec.ConsumableSpec("a", 10, _ord("2024-01-01"))
+        assert len(changes) == 2
+        specs["a"] = spec.ConsumableSpec("a", 60, _ord("2024-01-01"))
+        assert index.between(_ord("2024-01-01"), _ord("2024-02-01")) == [(_ord("2024-01-31"), "b")]
+        specs.pop("b")
+        assert index.next_due(0) == _ord("2024-03-01")
+        assert index.next_due(_ord("2024-03-02")) is None
+
+
+def test_due_index_matches_a_sorted_list():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        due_index = importlib.import_module("consumable_expiration.due_index")
+        rng = random.Random(7)
+        index = due_index.DueIndex()
+        due = {}
+        base = _ord("2024-01-01")
+        for _ in range(2000):
+            key = f"k{rng.randrange(200)}"
+            due_ord = None if rng.random() < 0.2 else base + rng.randrange(60)
+            index.update(key, due_ord)
+            if due_ord is None:
+                due.pop(key, None)
+            else:
+                due[key] = due_ord
+        expected = sorted((due_ord, key) for key, due_ord in due.items())
+        assert len(index) == len(expected)
+        assert index.between(0, base + 100) == expected
+        for _ in range(50):
+            lo = base + rng.randrange(-5, 65)
+            hi = lo + rng.randrange(0, 20)
+            window = [pair for pair in expected if lo <= pair[0] < hi]
+            assert index.between(lo, hi) == window
+            assert index.count(lo, hi) == len(window)
+            assert index.next_due(lo) == next((d for d, _key in expected if d >= lo), None)
+            cursor = rng.choice(expected)
+            assert index.after(*cursor, hi) == [pair for pair in expected if cursor < pair and pair[0] < hi]
+
+
+def test_day_counts_match_a_counter():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        due_index = importlib.import_module("consumable_expiration.due_index")
+        rng = random.Random(3)
+        counts = due_index.DayCounts()
+        days = []
+        base = _ord("2024-01-01")
+        for _ in range(500):
+            if days and rng.random() < 0.3:
+                counts.add(days.pop(rng.randrange(len(days))), -1)
+            else:
+                days.append(base + rng.randrange(40))
+                counts.add(days[-1])
+        assert len(counts) == len(days)
+        for start in range(base - 2, base + 42):
+            end = start + rng.randrange(10)
+            assert counts.count(start, end) == sum(start <= day < end for day in days)
+            assert counts.next_day(start) == min((day for day in days if day >= start), default=None)
+
+
+def test_calendar_shows_due_dates(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "duration_days": 3, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "duration_days": 10, "start_date": "2024-01-01"},
+            ]
+        }
+        entry = fake_hass.ConfigEntry(
+            title="Brush",
+            data={"name": "Brush", "duration_days": 5, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(hub)
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        calendar_id = "calendar.consumables_due_dates"
+        calendar = next(
+            e for e in hass.config_entries.entities[hub.entry_id] if e.entity_id == calendar_id
+        )
+        state = hass.states.get(calendar_id)
+        assert state.state == "off"
+        assert state.attributes["message"] == "Replace Filter A"
+
+        events = await calendar.async_get_events(
+            hass,
+            dt.datetime(2024, 1, 4, 12, tzinfo=fake_hass.UTC),
+            dt.datetime(2024, 1, 11, tzinfo=fake_hass.UTC),
+        )
+        assert [(e.start.isoformat(), e.summary, e.uid) for e in events] == [
+            ("2024-01-04", "Replace Filter A", "a"),
+            ("2024-01-06", "Replace Brush", entry.entry_id),
+        ]
+
+        # The state turns on at the due date's midnight without polling
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 4, tzinfo=fake_hass.UTC))
+        assert hass.states.get(calendar_id).state == "on"
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 5, tzinfo=fake_hass.UTC))
+        state = hass.states.get(calendar_id)
+        assert (state.state, state.attributes["message"]) == ("off", "Replace Brush")
+
+        # Changing a start date moves its event
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.brush_days_remaining", "start_date": "2024-01-07"},
+        )
+        await hass.async_block_till_done()
+        assert hass.states.get(calendar_id).attributes["message"] == "Replace Filter B"
+        events = await calendar.async_get_events(
+            hass,
+            dt.datetime(2024, 1, 1, tzinfo=fake_hass.UTC),
+            dt.datetime(2024, 2, 1, tzinfo=fake_hass.UTC),
+        )
+        assert [e.uid for e in events] == ["a", "b", entry.entry_id]
+        assert events[-1].start.isoformat() == "2024-01-12"
+
+        await hass.config_entries.async_unload(hub.entry_id)
+        assert hass.data["consumable_expiration"]["specs"].due_index.listeners == []
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -5,10 +5,14 @@ import types
 import datetime as dt
 from pathlib import Path
 
+import fake_hass
+
 
 def test_config_flow_form_and_entry(monkeypatch):
     """Ensure the config flow shows a form and creates an entry."""
     sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "custom_components"))
+    # The flow stubs below override the shared fake; the rest comes from it
+    fake_hass.patch_modules(monkeypatch)
 
     vol_module = types.ModuleType("voluptuous")
 
@@ -20,7 +24,7 @@ def test_config_flow_form_and_entry(monkeypatch):
             return data
 
     vol_module.Schema = Schema
-    def _identity(key, default=None):
+    def _identity(key, default=None, description=None):
         return key
 
     vol_module.Required = _identity
@@ -43,7 +47,7 @@ def test_config_flow_form_and_entry(monkeypatch):
     config_validation.date = _cv_identity
 
     class ConfigEntry:
-        pass
+        entry_id = "entry"
 
     config_entries.ConfigEntry = ConfigEntry
 
@@ -82,16 +86,21 @@ def test_config_flow_form_and_entry(monkeypatch):
 
     core.HomeAssistant = HomeAssistant
     core.ServiceCall = ServiceCall
+    core.ServiceResponse = dict
+    core.SupportsResponse = types.SimpleNamespace(NONE="none", OPTIONAL="optional", ONLY="only")
     core.callback = callback
+    core.Event = object
+    core.State = object
     ha_module.core = core
 
     class TextSelector:
         pass
 
     class SelectSelectorConfig:
-        def __init__(self, options=None, mode=None):
+        def __init__(self, options=None, mode=None, translation_key=None):
             self.options = options
             self.mode = mode
+            self.translation_key = translation_key
 
     class SelectSelectorMode:
         DROPDOWN = "dropdown"
@@ -122,6 +131,10 @@ def test_config_flow_form_and_entry(monkeypatch):
         def __init__(self, *args, **kwargs):
             pass
 
+    class BooleanSelector:
+        def __init__(self, *args, **kwargs):
+            pass
+
     selector.TextSelector = TextSelector
     selector.SelectSelector = SelectSelector
     selector.SelectSelectorConfig = SelectSelectorConfig
@@ -131,19 +144,24 @@ def test_config_flow_form_and_entry(monkeypatch):
     selector.NumberSelectorConfig = NumberSelectorConfig
     selector.NumberSelectorMode = NumberSelectorMode
     selector.DateSelector = DateSelector
+    selector.BooleanSelector = BooleanSelector
+    selector.DeviceSelector = BooleanSelector
+    selector.AreaSelector = BooleanSelector
 
     class Platform:
         SENSOR = "sensor"
+        BINARY_SENSOR = "binary_sensor"
         BUTTON = "button"
+        CALENDAR = "calendar"
 
     const_module.Platform = Platform
+    const_module.EVENT_HOMEASSISTANT_STOP = "homeassistant_stop"
 
     def async_get(hass):
         return object()
 
     entity_registry.async_get = async_get
     helpers.selector = selector
-    helpers.entity_registry = entity_registry
     helpers.config_validation = config_validation
     ha_module.helpers = helpers
 
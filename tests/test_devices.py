@@ -0,0 +1,106 @@
+import asyncio
+import importlib
+
+import fake_hass
+
+DOMAIN = "consumable_expiration"
+
+
+def _registries(hass):
+    return tuple(
+        importlib.import_module(f"homeassistant.helpers.{name}").async_get(hass)
+        for name in ("entity_registry", "device_registry", "area_registry")
+    )
+
+
+def test_hub_items_share_devices_by_type_and_area(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"{DOMAIN}.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Fridge filter", "item_type": "water filter", "duration_days": 30, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Sink filter", "item_type": "water filter", "duration_days": 60, "start_date": "2024-01-01"},
+                {"id": "c", "name": "Brush", "duration_days": 10, "start_date": "2024-01-01"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        ent_reg, dev_reg, area_reg = _registries(hass)
+        kitchen = area_reg.async_create("Kitchen")
+        own_a = dev_reg.async_get_device(identifiers={(DOMAIN, "a")})
+        dev_reg.async_update_device(own_a.id, area_id=kitchen.id)
+
+        def device_of(entity_id):
+            return dev_reg.async_get(ent_reg.async_get(entity_id).device_id)
+
+        hass.config_entries.async_update_entry(hub, options={"device_grouping": "item_type"})
+        await hass.async_block_till_done()
+        water = device_of("sensor.fridge_filter_days_remaining")
+        assert water.identifiers == {(DOMAIN, "item_type_water filter")}
+        assert device_of("sensor.sink_filter_days_remaining") is water
+        assert device_of("button.fridge_filter_mark_replaced") is water
+        # The old devices are gone and the entity keeps the area its device had
+        assert dev_reg.async_get_device(identifiers={(DOMAIN, "a")}) is None
+        assert dev_reg.async_get_device(identifiers={(DOMAIN, "b")}) is None
+        assert ent_reg.async_get("sensor.fridge_filter_days_remaining").area_id == kitchen.id
+        assert device_of("sensor.brush_days_remaining").identifiers == {(DOMAIN, "c")}
+        state = hass.states.get("sensor.fridge_filter_days_remaining")
+        assert state.attributes["friendly_name"] == "Water filter Fridge filter Days Remaining"
+        # One DeviceInfo for every entity on the shared device
+        entities = {entity.entity_id: entity for entity in hass.config_entries.entities[hub.entry_id]}
+        assert (
+            entities["sensor.fridge_filter_days_remaining"].device_info
+            is entities["sensor.sink_filter_days_remaining"].device_info
+        )
+
+        hass.config_entries.async_update_entry(hub, options={"device_grouping": "area"})
+        await hass.async_block_till_done()
+        room = device_of("sensor.fridge_filter_days_remaining")
+        assert (room.identifiers, room.name, room.area_id) == ({(DOMAIN, "area_kitchen")}, "Kitchen", kitchen.id)
+        # Without an area the others go back to a device of their own
+        assert device_of("sensor.sink_filter_days_remaining").identifiers == {(DOMAIN, "b")}
+        assert dev_reg.async_get(water.id) is None
+        assert "area:kitchen" in hass.data[DOMAIN]["aggregates"].groups("a")
+
+        # Items added later with an area land on that area's device, named after it
+        await hass.services.async_call(
+            DOMAIN, "add_consumable", {"name": "Tap filter", "duration_days": 90, "area_id": kitchen.id}
+        )
+        await hass.async_block_till_done()
+        assert device_of("sensor.kitchen_tap_filter_days_remaining") is room
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_consumable_attaches_to_an_appliance(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Fridge filter",
+            data={"name": "Fridge filter", "duration_days": 30, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        ent_reg, dev_reg, _area_reg = _registries(hass)
+        fridge = dev_reg.async_get_or_create(config_entry_id="other", identifiers={("acme", "fridge-1")}, name="Fridge")
+
+        hass.config_entries.async_update_entry(entry, options={**entry.options, "parent_device": fridge.id})
+        await hass.async_block_till_done()
+        sensor = ent_reg.async_get("sensor.fridge_filter_days_remaining")
+        assert sensor.device_id == fridge.id
+        assert fridge.config_entries == {"other", entry.entry_id}
+        assert dev_reg.async_get_device(identifiers={(DOMAIN, entry.entry_id)}) is None
+        state = hass.states.get("sensor.fridge_filter_days_remaining")
+        assert state.attributes["friendly_name"] == "Fridge Fridge filter Days Remaining"
+
+        # Detaching gives it its own device again and leaves the appliance alone
+        hass.config_entries.async_update_entry(entry, options={**entry.options, "parent_device": None})
+        await hass.async_block_till_done()
+        own = dev_reg.async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+        assert ent_reg.async_get("sensor.fridge_filter_days_remaining").device_id == own.id
+        assert dev_reg.async_get(fridge.id).config_entries == {"other"}
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,130 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _hub_entry(hass):
+    entry = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+    hass.storage[f"consumable_expiration.{entry.entry_id}"] = {
+        "items": [
+            {"id": "a", "name": "Filter A", "duration_days": 30, "start_date": "2024-01-01"},
+            {"id": "b", "name": "Filter B", "duration_days": 60, "start_date": "2024-01-01"},
+        ]
+    }
+    return entry
+
+
+def test_histogram_buckets():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        metrics_module = importlib.import_module("consumable_expiration.metrics")
+        metrics = metrics_module.Metrics()
+        assert metrics.start() is None
+        metrics.incr("registry_fallbacks")
+        assert metrics.counters == {}
+
+        metrics.acquire()
+        histogram = metrics_module.Histogram()
+        for ms in (0.05, 0.1, 3, 2000):
+            histogram.add(ms)
+        summary = histogram.as_dict()
+        assert summary["count"] == 4
+        assert summary["max_ms"] == 2000
+        assert summary["buckets"]["le_0.1"] == 2
+        assert summary["buckets"]["le_5"] == 1
+        assert summary["buckets"]["inf"] == 1
+
+
+def test_diagnostics_collect_only_while_a_metric_sensor_is_enabled(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        diagnostics = importlib.import_module("consumable_expiration.diagnostics")
+        entry = _hub_entry(hass)
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        # Diagnostic sensors are registered disabled, so nothing is collected
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        metric_id = "sensor.consumables_service_calls"
+        assert ent_reg.async_get(metric_id).disabled_by == "integration"
+        assert hass.states.get(metric_id) is None
+        await hass.services.async_call(
+            "consumable_expiration", "mark_replaced", {"entity_id": "sensor.filter_a_days_remaining"}
+        )
+        result = await diagnostics.async_get_config_entry_diagnostics(hass, entry)
+        assert result["metrics"] == {"enabled": False, "counters": {}, "histograms": {}}
+        assert result["runtime"]["hub_items"] == 2
+        assert result["runtime"]["entity_index_size"] == len(hass.data["consumable_expiration"]["index"])
+
+        ent_reg.async_update_entity(metric_id, disabled_by=None)
+        await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.filter_a_days_remaining", "start_date": "2024-01-02"},
+        )
+        # A consumable missing from the entity index is found through the registry
+        hass.data["consumable_expiration"]["index"].remove("sensor.filter_b_days_remaining")
+        await hass.services.async_call(
+            "consumable_expiration", "set_duration",
+            {"entity_id": "sensor.filter_b_days_remaining", "duration_days": 90},
+        )
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 2, tzinfo=fake_hass.UTC))
+
+        result = await diagnostics.async_get_config_entry_diagnostics(hass, entry)
+        metrics = result["metrics"]
+        assert metrics["enabled"]
+        assert metrics["counters"]["registry_fallbacks"] == 1
+        # Both consumables plus the hub's shared summary refresh
+        assert metrics["counters"]["scheduler_transitions"] == 3
+        assert set(metrics["histograms"]) >= {
+            "service.set_start_date",
+            "service.set_duration",
+            "state_write",
+            "scheduler_tick",
+        }
+        assert metrics["histograms"]["state_write"]["count"] >= 4
+
+        metric_sensor = next(
+            entity
+            for entity in hass.config_entries.entities[entry.entry_id]
+            if entity.entity_id == metric_id
+        )
+        assert metric_sensor.native_value == 2
+        assert metric_sensor._attr_state_class == "total_increasing"
+        assert set(metric_sensor.extra_state_attributes) == {"service.set_start_date", "service.set_duration"}
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_collect_metrics_option_works_without_the_hub(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        diagnostics = importlib.import_module("consumable_expiration.diagnostics")
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 30, "start_date": "2024-01-01"},
+            options={"collect_metrics": True},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        await hass.services.async_call(
+            "consumable_expiration", "mark_replaced", {"entity_id": "sensor.filter_days_remaining"}
+        )
+        result = await diagnostics.async_get_config_entry_diagnostics(hass, entry)
+        assert result["metrics"]["enabled"]
+        assert "service.mark_replaced" in result["metrics"]["histograms"]
+
+        # Turning the option off reloads the entry and stops collecting
+        hass.config_entries.async_update_entry(entry, options={})
+        await hass.async_block_till_done()
+        assert not hass.data["consumable_expiration"]["metrics"].enabled
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,72 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def test_daily_digest_event_and_service(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"soon_days": 3, "digest_time": "09:30:00"},
+        )
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "item_type": "ac filter", "duration_days": 1, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "item_type": "ac filter", "duration_days": 3, "start_date": "2024-01-01"},
+                {"id": "c", "name": "Filter C", "duration_days": 5, "start_date": "2024-01-01"},
+                {"id": "d", "name": "Filter D", "duration_days": 30, "start_date": "2024-01-01"},
+            ]
+        }
+        entry = fake_hass.ConfigEntry(
+            title="Brush",
+            data={"name": "Brush", "duration_days": 2, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(hub)
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        ent_reg.async_update_entity("sensor.filter_a_days_remaining", area_id="hallway")
+
+        digests = []
+        hass.bus.async_listen("consumable_expiration_digest", lambda event: digests.append(event.data))
+
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 3, 9, tzinfo=fake_hass.UTC))
+        assert len(digests) == 1
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 3, 10, tzinfo=fake_hass.UTC))
+        assert len(digests) == 2
+        digest = digests[-1]
+        assert digest["date"] == "2024-01-03"
+        assert (digest["overdue"], digest["due_today"], digest["due_soon"]) == (1, 1, 2)
+        assert [(c["id"], c["status"], c["days_remaining"]) for c in digest["consumables"]] == [
+            ("a", "overdue", -1),
+            (entry.entry_id, "due_today", 0),
+            ("b", "due_soon", 1),
+            ("c", "due_soon", 3),
+        ]
+        first = digest["consumables"][0]
+        assert first["entity_id"] == "sensor.filter_a_days_remaining"
+        assert first["device"] == "Filter A"
+        assert digest["areas"] == {"hallway": ["a"]}
+        assert digest["item_types"] == {"ac filter": ["a", "b"]}
+        assert digest["devices"][first["device_id"]] == ["a"]
+
+        # The next one follows a change of time; the service answers on demand
+        hass.config_entries.async_update_entry(hub, options={**hub.options, "digest_time": "07:00:00"})
+        await hass.async_block_till_done()
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 4, 7, tzinfo=fake_hass.UTC))
+        assert len(digests) == 3
+        response = await hass.services.async_call(
+            "consumable_expiration", "digest", {"days": 0}, return_response=True
+        )
+        assert [c["id"] for c in response["consumables"]] == ["a", entry.entry_id, "b"]
+
+        await hass.config_entries.async_unload(hub.entry_id)
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 5, 7, tzinfo=fake_hass.UTC))
+        assert len(digests) == 3
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,107 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def _forecast():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        return importlib.import_module("consumable_expiration.forecast")
+
+
+def test_add_months_clamps_to_month_end():
+    forecast = _forecast()
+    assert forecast.add_months(dt.date(2024, 1, 31), 1) == dt.date(2024, 2, 29)
+    assert forecast.add_months(dt.date(2024, 11, 15), 14) == dt.date(2026, 1, 15)
+    assert forecast.add_months(dt.date(2024, 3, 1), 0) == dt.date(2024, 3, 1)
+
+
+def test_bucket_starts():
+    forecast = _forecast()
+    # 2024-01-03 is a Wednesday; weeks start on the Monday before
+    weeks = forecast.bucket_starts(_ord("2024-01-03"), _ord("2024-01-22"), "week")
+    assert weeks == [_ord("2024-01-01"), _ord("2024-01-08"), _ord("2024-01-15")]
+    months = forecast.bucket_starts(_ord("2024-11-20"), _ord("2025-02-01"), "month")
+    assert months == [_ord("2024-11-01"), _ord("2024-12-01"), _ord("2025-01-01")]
+
+
+def test_forecast_counts_recurring_replacements():
+    forecast = _forecast()
+    columns = forecast.ScheduleColumns()
+    today = _ord("2024-01-01")
+    columns.append("a", _ord("2024-01-10"), 30, "ac filter")  # Jan 10, Feb 9, Mar 10
+    columns.append("b", _ord("2023-12-01"), 60, "ac filter")  # overdue: today, then Mar 1
+    columns.append("c", _ord("2024-02-15"), 7, None)  # weekly from Feb 15
+    result = forecast.forecast_by_type(columns, today, _ord("2024-03-01"), "month")
+    assert result["buckets"] == ["2024-01-01", "2024-02-01"]
+    assert result["item_types"] == {"ac filter": [2, 1], "unknown": [0, 3]}
+    assert result["total"] == [2, 4]
+
+    weekly = forecast.forecast_by_type(columns, today, _ord("2024-01-15"), "week")
+    assert weekly["item_types"] == {"ac filter": [1, 1], "unknown": [0, 0]}
+
+    empty = forecast.forecast_by_type(forecast.ScheduleColumns(), today, _ord("2024-03-01"), "month")
+    assert empty["item_types"] == {} and empty["total"] == [0, 0]
+
+
+def test_columns_from_specs():
+    forecast = _forecast()
+    spec = importlib.import_module("consumable_expiration.spec")
+    specs = {
+        "a": spec.ConsumableSpec("a", 30, _ord("2024-01-01")),
+        "b": spec.ConsumableSpec("b", None, _ord("2024-01-01")),
+        "c": spec.ConsumableSpec("c", 7, _ord("2024-01-05")),
+    }
+    types = {"a": "ac filter", "c": None}
+    columns = forecast.ScheduleColumns.from_specs(specs, types.get)
+    assert columns.keys == ["a", "c"]
+    assert list(columns.due) == [_ord("2024-01-31"), _ord("2024-01-12")]
+    assert [columns.types[code] for code in columns.type_codes] == ["ac filter", "unknown"]
+    only = forecast.ScheduleColumns.from_specs(specs, types.get, "ac filter")
+    assert only.keys == ["a"] and list(only.duration) == [30]
+
+
+def test_query_service(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "item_type": "ac filter", "duration_days": 30, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "item_type": "ac filter", "duration_days": 90, "start_date": "2024-01-01"},
+                {"id": "c", "name": "Brush", "item_type": "vacuum brush", "duration_days": 14, "start_date": "2024-01-01"},
+                {"id": "d", "name": "Pump", "usage_entity": "switch.pump", "usage_limit": 10, "start_date": "2024-01-01"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+
+        response = await hass.services.async_call(
+            "consumable_expiration", "query", {"horizon_months": 3}, return_response=True
+        )
+        assert (response["start_date"], response["end_date"]) == ("2024-01-01", "2024-01-31")
+        assert [(row["id"], row["due_date"]) for row in response["due"]] == [
+            ("c", "2024-01-15"),
+            ("a", "2024-01-31"),
+        ]
+        forecast = response["forecast"]
+        assert forecast["buckets"] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+        assert forecast["item_types"] == {"ac filter": [1, 0, 3], "vacuum brush": [2, 2, 2]}
+
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "query",
+            {"start_date": "2024-01-01", "end_date": "2024-12-31", "item_type": "ac filter", "horizon_months": 0},
+            return_response=True,
+        )
+        assert [row["id"] for row in response["due"]] == ["a", "b"]
+        assert "forecast" not in response
+
+    with fake_hass.installed():
+        asyncio.run(run())
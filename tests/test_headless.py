@@ -0,0 +1,127 @@
+import asyncio
+import datetime as dt
+import json
+
+import fake_hass
+
+
+def test_headless_items_feed_summaries_and_query(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"soon_days": 5},
+        )
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        states_before = len(hass.states.async_all())
+
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "track_items",
+            {
+                "items": [
+                    {"id": "lot-1", "item_type": "milk", "duration_days": 1, "start_date": "2023-12-30"},
+                    {"id": "lot-2", "item_type": "milk", "duration_days": 3},
+                    {"id": "lot-3", "item_type": "bread", "duration_days": 10},
+                    {"id": "lot-4", "item_type": "bread"},
+                    {"name": "no id", "duration_days": 3},
+                ]
+            },
+            return_response=True,
+        )
+        await hass.async_block_till_done()
+        assert (response["created"], response["updated"]) == (3, 0)
+        assert [error["index"] for error in response["errors"]] == [3, 4]
+        # No per-item entities
+        assert len(hass.states.async_all()) == states_before
+
+        def value(name):
+            return hass.states.get(f"sensor.consumables_{name}")
+
+        assert value("headless_overdue").state == "1"
+        attributes = value("headless_overdue").attributes
+        assert (attributes["tracked"], attributes["next_due"]) == (3, "2024-01-04")
+        assert value("headless_due_soon").state == "1"
+
+        # Updates keep omitted fields and removals keep the arrays dense
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "track_items",
+            {"items": [{"id": "lot-1", "start_date": "2024-01-01"}, {"id": "lot-3", "item_type": "bread"}]},
+            return_response=True,
+        )
+        # lot-3 already had that type
+        assert (response["created"], response["updated"]) == (0, 1)
+        response = await hass.services.async_call(
+            "consumable_expiration", "untrack_items", {"ids": ["lot-2", "missing"]}, return_response=True
+        )
+        await hass.async_block_till_done()
+        assert response == {"removed": 1}
+        headless = hass.data["consumable_expiration"]["headless"]
+        assert headless.ids == ["lot-1", "lot-3"]
+        assert list(headless.duration) == [1, 10]
+        assert value("headless_overdue").state == "0"
+        assert value("headless_due_soon").state == "1"
+
+        # The day rolls over with the shared midnight refresh
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 2, tzinfo=fake_hass.UTC))
+        assert value("headless_overdue").state == "1"
+
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "query",
+            {"start_date": "2024-01-01", "end_date": "2024-01-31", "horizon_months": 1},
+            return_response=True,
+        )
+        assert [(row["id"], row["due_date"], row["headless"]) for row in response["due"]] == [
+            ("lot-1", "2024-01-02", True),
+            ("lot-3", "2024-01-11", True),
+        ]
+        # lot-1 is replaced daily from today, lot-3 every ten days
+        forecast = response["forecast"]
+        assert forecast["buckets"] == ["2024-01-01", "2024-02-01"]
+        assert forecast["item_types"] == {"bread": [3, 0], "milk": [30, 1]}
+
+        # Stored as columns and read back on the next start
+        for store in hass.data["_stores"]:
+            store.flush()
+        saved = hass.storage[f"consumable_expiration.{hub.entry_id}.headless"]
+        assert saved["ids"] == ["lot-1", "lot-3"]
+        await hass.config_entries.async_reload(hub.entry_id)
+        await hass.async_block_till_done()
+        assert hass.data["consumable_expiration"]["headless"].ids == ["lot-1", "lot-3"]
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_headless_import_stays_small(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        count = 50_000
+        with open(tmp_path / "stock.jsonl", "w", encoding="utf-8") as handle:
+            for i in range(count):
+                row = {"id": f"{i:06d}", "item_type": f"type {i % 20}", "duration_days": 5 + i % 90}
+                handle.write(json.dumps(row) + "\n")
+            handle.write(json.dumps({"id": "bad", "duration_days": 0}) + "\n")
+
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "import",
+            {"file_path": "stock.jsonl", "headless": True},
+            return_response=True,
+        )
+        assert (response["created"], response["error_count"]) == (count, 1)
+        assert response["errors"][0]["line"] == count + 1
+        headless = hass.data["consumable_expiration"]["headless"]
+        assert len(headless) == count
+        assert hass.data["consumable_expiration"]["specs"] == {}
+        assert headless.memory_bytes() / count < 200
+
+    with fake_hass.installed():
+        asyncio.run(run())
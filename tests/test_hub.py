@@ -0,0 +1,89 @@
+import sys
+import types
+import asyncio
+from pathlib import Path
+
+
+def _setup_modules(monkeypatch, stored=None):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.hub", None)
+
+    saves = []
+
+    ha_module = types.ModuleType("homeassistant")
+    config_entries = types.ModuleType("homeassistant.config_entries")
+    class ConfigEntry:
+        pass
+    config_entries.ConfigEntry = ConfigEntry
+    core = types.ModuleType("homeassistant.core")
+    class HomeAssistant:
+        pass
+    core.HomeAssistant = HomeAssistant
+    core.callback = lambda func: func
+
+    helpers = types.ModuleType("homeassistant.helpers")
+    storage = types.ModuleType("homeassistant.helpers.storage")
+    class Store:
+        def __init__(self, hass, version, key):
+            self.key = key
+        async def async_load(self):
+            return stored
+        def async_delay_save(self, data_func, delay):
+            saves.append((self.key, data_func, delay))
+    storage.Store = Store
+    helpers.storage = storage
+
+    monkeypatch.setitem(sys.modules, "homeassistant", ha_module)
+    monkeypatch.setitem(sys.modules, "homeassistant.config_entries", config_entries)
+    monkeypatch.setitem(sys.modules, "homeassistant.core", core)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers", helpers)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers.storage", storage)
+
+    from consumable_expiration import hub
+    return hub, saves
+
+
+def test_collection_round_trip(monkeypatch):
+    hub_module, saves = _setup_modules(monkeypatch)
+    entry = types.SimpleNamespace(entry_id="hub1")
+    collection = hub_module.ConsumableCollection(types.SimpleNamespace(), entry)
+    asyncio.run(collection.async_load())
+    assert collection.items == {}
+
+    item_id = collection.async_add(
+        {"name": "Filter", "duration_days": 30, "start_date": "2024-01-01", "extra": 1}
+    )
+    other = collection.async_add({"name": "Brush", "duration_days": 60}, item_id="legacy")
+    collection.async_update(item_id, {"start_date": "2024-02-01"})
+    collection.async_remove([other])
+
+    assert other == "legacy"
+    assert all(key == "consumable_expiration.hub1" for key, _f, _d in saves)
+    data = saves[-1][1]()
+    assert data == {
+        "items": [
+            {
+                "id": item_id,
+                "name": "Filter",
+                "item_type": None,
+                "icon": None,
+                "duration_days": 30,
+                "start_date": "2024-02-01",
+            }
+        ]
+    }
+
+
+def test_collection_loads_stored_items(monkeypatch):
+    stored = {"items": [{"id": "a", "name": "Filter", "duration_days": 30, "start_date": "2024-01-01"}]}
+    hub_module, saves = _setup_modules(monkeypatch, stored=stored)
+    collection = hub_module.ConsumableCollection(
+        types.SimpleNamespace(), types.SimpleNamespace(entry_id="hub1")
+    )
+    asyncio.run(collection.async_load())
+    assert collection.items["a"]["duration_days"] == 30
+    assert saves == []
@@ -0,0 +1,107 @@
+import asyncio
+import importlib
+
+import fake_hass
+
+
+def test_index_maps_both_ways():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        index = importlib.import_module("consumable_expiration.index").EntityIndex()
+        index.add("sensor.a", "a", "a_days_remaining", "hub")
+        index.add("button.a", "a", "a_mark_replaced", "hub")
+        index.add("sensor.b", "b", "b_days_remaining", "entry_b")
+
+        assert index.key_for("button.a") == "a"
+        assert index.entity_id_for("b_days_remaining") == "sensor.b"
+
+        index.rename("sensor.a", "sensor.kitchen_filter")
+        assert "sensor.a" not in index
+        assert index.key_for("sensor.kitchen_filter") == "a"
+        assert index.entity_id_for("a_days_remaining") == "sensor.kitchen_filter"
+
+        index.set_config_entry("sensor.b", "hub")
+        assert sorted(index.remove_config_entry("hub")) == ["button.a", "sensor.b", "sensor.kitchen_filter"]
+        assert len(index) == 0
+        assert index.remove("sensor.b") is None
+
+        index.add("sensor.a", "a", "a_days_remaining", "hub")
+        index.add("button.a", "a", "a_mark_replaced", "hub")
+        index.add("sensor.b", "b", "b_days_remaining", "hub")
+        assert sorted(index.remove_key("a")) == ["button.a", "sensor.a"]
+        assert index.remove_key("a") == []
+        assert index.entity_id_for("a_days_remaining") is None
+        assert index.key_for("sensor.b") == "b"
+
+
+def test_index_follows_the_entity_registry(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        index = hass.data["consumable_expiration"]["index"]
+        # Only entity ids are indexed, never unique ids
+        assert set(index._entities) == {
+            "sensor.filter_days_remaining",
+            "button.filter_mark_replaced",
+            "binary_sensor.filter_expired",
+            "binary_sensor.filter_due_soon",
+        }
+
+        ent_reg.async_update_entity("sensor.filter_days_remaining", new_entity_id="sensor.water_filter")
+        assert index.key_for("sensor.water_filter") == entry.entry_id
+        assert "sensor.filter_days_remaining" not in index
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.water_filter", "start_date": "2024-01-05"},
+        )
+        assert hass.states.get("sensor.water_filter").state == "14"
+        assert hass.data["consumable_expiration"]["metrics"].counters == {}
+
+        await hass.config_entries.async_unload(entry.entry_id)
+        assert len(index) == 0
+
+        # Unloaded entities are found through the registry once, then indexed
+        assert _integration._resolve_key(hass, "sensor.water_filter") == entry.entry_id
+        assert index.key_for("sensor.water_filter") == entry.entry_id
+        ent_reg.async_remove("sensor.water_filter")
+        assert "sensor.water_filter" not in index
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_removing_a_hub_consumable_drops_its_entities(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "duration_days": 10, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "duration_days": 20, "start_date": "2024-01-01"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        index = hass.data["consumable_expiration"]["index"]
+        # An entity that missed its removal callback
+        index.add("sensor.stale_filter_a", "a", None, hub.entry_id)
+
+        await hass.services.async_call(
+            "consumable_expiration", "remove_consumable", {"entity_id": "sensor.filter_a_days_remaining"}
+        )
+        await hass.async_block_till_done()
+        assert ent_reg.async_get("sensor.filter_a_days_remaining") is None
+        assert "sensor.stale_filter_a" not in index
+        assert not any(index.key_for(entity_id) == "a" for entity_id in list(index._entities))
+        assert index.key_for("sensor.filter_b_days_remaining") == "b"
+
+    with fake_hass.installed():
+        asyncio.run(run())
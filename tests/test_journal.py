@@ -0,0 +1,180 @@
+import sys
+import types
+import asyncio
+import datetime as dt
+from pathlib import Path
+
+import fake_hass
+
+
+def _setup_modules(monkeypatch):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.journal", None)
+
+    ha = types.ModuleType("homeassistant")
+    core = types.ModuleType("homeassistant.core")
+    core.HomeAssistant = object
+    core.callback = lambda func: func
+    helpers = types.ModuleType("homeassistant.helpers")
+    event = types.ModuleType("homeassistant.helpers.event")
+    event.async_call_later = lambda hass, delay, action: (lambda: None)
+    helpers.event = event
+    util = types.ModuleType("homeassistant.util")
+    dt_util = types.ModuleType("homeassistant.util.dt")
+    dt_util.utcnow = lambda: dt.datetime(2024, 6, 1, tzinfo=dt.timezone.utc)
+    dt_util.utc_from_timestamp = lambda ts: dt.datetime.fromtimestamp(ts, dt.timezone.utc)
+    util.dt = dt_util
+
+    for name, module in (
+        ("homeassistant", ha),
+        ("homeassistant.core", core),
+        ("homeassistant.helpers", helpers),
+        ("homeassistant.helpers.event", event),
+        ("homeassistant.util", util),
+        ("homeassistant.util.dt", dt_util),
+    ):
+        monkeypatch.setitem(sys.modules, name, module)
+
+
+class FakeHass:
+    def __init__(self, config_dir):
+        self.config = types.SimpleNamespace(path=lambda *parts: str(Path(config_dir, *parts)))
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+
+def _ord(day):
+    return dt.date(2024, 1, day).toordinal()
+
+
+def test_journal_keeps_ring_buffer_and_stats(monkeypatch, tmp_path):
+    _setup_modules(monkeypatch)
+    from consumable_expiration.journal import ReplacementJournal
+    from consumable_expiration.const import HISTORY_DATE_CHANGED, HISTORY_REPLACED
+
+    async def run():
+        hass = FakeHass(tmp_path)
+        journal = ReplacementJournal(hass, limit=2)
+        # Lifespans of 10, 20 and 30 days plus a correction
+        journal.async_record("a", HISTORY_REPLACED, _ord(1), _ord(11))
+        journal.async_record("a", HISTORY_REPLACED, _ord(11), _ord(31))
+        journal.async_record("a", HISTORY_DATE_CHANGED, _ord(31), _ord(30))
+        journal.async_record("b", HISTORY_REPLACED, None, _ord(5))
+        await journal.async_flush()
+        journal.async_record("a", HISTORY_REPLACED, _ord(1) - 30, _ord(1))
+        await journal.async_flush()
+        # Nothing is read until history is queried
+        assert not journal.loaded
+
+        history = await journal.async_history("a")
+        assert journal.loaded
+        assert [r["event"] for r in history["records"]] == ["replaced", "date_changed"]
+        assert history["records"][0]["lifespan_days"] == 30
+        assert history["stats"] == {"count": 3, "mean_days": 20.0, "stddev_days": 8.2}
+
+        await journal.async_compact()
+        lines = (tmp_path / ".storage" / "consumable_expiration.journal").read_text().splitlines()
+        assert len(lines) == 4  # one summary for "a", two records for "a", one for "b"
+
+        reloaded = ReplacementJournal(hass, limit=2)
+        again = await reloaded.async_history("a", limit=1)
+        assert len(again["records"]) == 1
+        assert again["stats"] == history["stats"]
+        assert (await reloaded.async_history("b"))["stats"]["count"] == 0
+
+    asyncio.run(run())
+
+
+def test_removed_consumable_is_dropped(monkeypatch, tmp_path):
+    _setup_modules(monkeypatch)
+    from consumable_expiration.journal import ReplacementJournal
+    from consumable_expiration.const import HISTORY_REMOVED, HISTORY_REPLACED
+
+    async def run():
+        hass = FakeHass(tmp_path)
+        journal = ReplacementJournal(hass)
+        journal.async_record("a", HISTORY_REPLACED, _ord(1), _ord(11))
+        journal.async_record("a", HISTORY_REMOVED)
+        await journal.async_flush()
+        history = await ReplacementJournal(hass).async_history("a")
+        assert history == {
+            "records": [],
+            "stats": {"count": 0, "mean_days": None, "stddev_days": None},
+        }
+
+    asyncio.run(run())
+
+
+def test_history_reads_only_its_own_lines(monkeypatch, tmp_path):
+    _setup_modules(monkeypatch)
+    from consumable_expiration import journal as journal_module
+    from consumable_expiration.const import HISTORY_REPLACED
+
+    reads = []
+    read_at = journal_module._read_at
+    monkeypatch.setattr(
+        journal_module, "_read_at", lambda path, offsets: reads.append(len(offsets)) or read_at(path, offsets)
+    )
+
+    async def run():
+        hass = FakeHass(tmp_path)
+        journal = journal_module.ReplacementJournal(hass, limit=3)
+        for day in range(1, 21):
+            journal.async_record("b", HISTORY_REPLACED, _ord(day), _ord(day + 1))
+        journal.async_record("a", HISTORY_REPLACED, _ord(1), _ord(11))
+        await journal.async_flush()
+
+        history = await journal.async_history("a")
+        assert reads == [1]
+        assert history["stats"]["count"] == 1
+
+        # Records appended or buffered after the scan are found without another scan
+        journal.async_record("a", HISTORY_REPLACED, _ord(11), _ord(21))
+        await journal.async_flush()
+        journal.async_record("a", HISTORY_REPLACED, _ord(21), _ord(31))
+        history = await journal.async_history("a")
+        assert reads == [1, 2]
+        assert [r["lifespan_days"] for r in history["records"]] == [10, 10, 10]
+
+        b = await journal.async_history("b", limit=1)
+        assert reads[-1] == 20
+        assert b["stats"]["count"] == 20
+
+    asyncio.run(run())
+
+
+def test_every_replacement_is_recorded(tmp_path):
+    # mark_replaced restarts the consumable on the system's today
+    start = dt.date.today() - dt.timedelta(days=10)
+
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 30, "start_date": start.isoformat()},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        # The second replacement happens on the same day and keeps the start date
+        for _ in range(2):
+            await hass.services.async_call(
+                "consumable_expiration", "mark_replaced", {"entity_id": "sensor.filter_days_remaining"}
+            )
+        response = await hass.services.async_call(
+            "consumable_expiration",
+            "history",
+            {"entity_id": "sensor.filter_days_remaining"},
+            return_response=True,
+        )
+        records = response["history"]["sensor.filter_days_remaining"]["records"]
+        assert [r["event"] for r in records] == ["replaced", "replaced"]
+        assert [r["lifespan_days"] for r in records] == [0, 10]
+
+    with fake_hass.installed():
+        asyncio.run(run())
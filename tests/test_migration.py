@@ -0,0 +1,80 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def test_version_1_entries_migrate_to_ordinals(tmp_path):
+    async def run():
+        hass, integration = fake_hass.create_hass(str(tmp_path))
+        old = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": "30", "start_date": "2023-12-5"},
+            options={"thresholds": "7, 1"},
+        )
+        broken = fake_hass.ConfigEntry(
+            title="Broken", data={"name": "Broken", "duration_days": "soon", "start_date": "2024-01-01"}
+        )
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        for entry in (old, broken, hub):
+            assert await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        assert old.version == broken.version == hub.version == 2
+        assert old.data == {"name": "Filter"}
+        assert old.options == {
+            "thresholds": [7, 1],
+            "duration_days": 30,
+            "start_date": "2023-12-05",
+            "start_ord": _ord("2023-12-05"),
+            "due_ord": _ord("2024-01-04"),
+        }
+        assert hass.states.get("sensor.filter_days_remaining").state == "3"
+        # Unusable schedules are left as they were
+        assert broken.data["duration_days"] == "soon"
+        assert "start_ord" not in broken.options
+
+        # Service updates keep the ordinals in step
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_duration",
+            {"entity_id": "sensor.filter_days_remaining", "duration_days": 10},
+        )
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.filter_days_remaining", "start_date": "2024-01-02"},
+        )
+        hass.data["consumable_expiration"]["writer"].async_flush()
+        await hass.async_block_till_done()
+        assert (old.options["start_ord"], old.options["due_ord"]) == (_ord("2024-01-02"), _ord("2024-01-12"))
+        assert old.options["start_date"] == "2024-01-02"
+
+        # An unusable duration clears the ordinals instead of keeping stale ones
+        runtime = importlib.import_module("consumable_expiration.runtime")
+        spec = runtime.async_update_consumable(hass, old.entry_id, {"duration_days": 0})
+        assert not spec.valid
+        hass.data["consumable_expiration"]["writer"].async_flush()
+        await hass.async_block_till_done()
+        assert (old.options["start_ord"], old.options["due_ord"]) == (None, None)
+        assert hass.states.get("sensor.filter_days_remaining").state == "unknown"
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_duration",
+            {"entity_id": "sensor.filter_days_remaining", "duration_days": 10},
+        )
+        hass.data["consumable_expiration"]["writer"].async_flush()
+        await hass.async_block_till_done()
+        assert (old.options["start_ord"], old.options["due_ord"]) == (_ord("2024-01-02"), _ord("2024-01-12"))
+
+        # Entries from a newer release are not touched
+        newer = fake_hass.ConfigEntry(title="Newer", data={"name": "Newer"}, version=3)
+        assert not await integration.async_migrate_entry(hass, newer)
+
+    with fake_hass.installed():
+        asyncio.run(run())
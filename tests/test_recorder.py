@@ -0,0 +1,115 @@
+import asyncio
+import datetime as dt
+import importlib.util
+from pathlib import Path
+
+import fake_hass
+
+
+def _load_benchmark():
+    path = Path(__file__).resolve().parents[1] / "benchmarks" / "bench_recorder.py"
+    spec = importlib.util.spec_from_file_location("bench_recorder", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compact_mode_keeps_attributes_out_of_the_recorder(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+            options={"duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        sensor_id = "sensor.filter_days_remaining"
+
+        rows = hass.recorder.attribute_rows
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 2, tzinfo=fake_hass.UTC))
+        assert hass.recorder.attribute_rows == rows + 1
+
+        # Switching modes reloads the entry with the compact sensor class
+        hass.config_entries.async_update_entry(entry, options={**entry.options, "compact_state": True})
+        await hass.async_block_till_done()
+        sensor = next(e for e in hass.config_entries.entities[entry.entry_id] if e.entity_id == sensor_id)
+        assert type(sensor).__name__ == "CompactExpirationSensor"
+
+        rows = hass.recorder.attribute_rows
+        for day in (3, 4, 5):
+            await hass.async_fire_time_changed(dt.datetime(2024, 1, day, tzinfo=fake_hass.UTC))
+        assert hass.recorder.attribute_rows == rows
+        # The live state still carries every attribute
+        state = hass.states.get(sensor_id)
+        assert state.state == "6"
+        assert state.attributes["days_elapsed"] == 4
+        assert state.attributes["due_date"] == "2024-01-11"
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_recorder_benchmark_compares_both_modes():
+    bench = _load_benchmark()
+    report = bench.run(size=20, days=3)
+    full, compact = report["results"]
+    assert (full["mode"], compact["mode"]) == ("full", "compact")
+    assert full["state_rows_per_day"] == compact["state_rows_per_day"] == 20
+    assert full["attribute_rows_per_day"] == 20
+    assert compact["attribute_rows_per_day"] == 0
+    assert report["bytes_saved_per_day"] > 0
+
+
+def test_unchanged_consumables_are_not_rewritten(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        metrics = hass.data["consumable_expiration"]["metrics"]
+        # Skipped writes are counted even while metrics collection is off
+        assert not metrics.enabled
+        # One write per entity at startup
+        assert hass.states.writes == 4
+
+        writes = hass.states.writes
+        for _ in range(2):
+            await hass.services.async_call(
+                "consumable_expiration", "set_duration",
+                {"entity_id": "sensor.filter_days_remaining", "duration_days": 20},
+            )
+        assert hass.states.writes == writes + 1
+        assert hass.states.get("sensor.filter_days_remaining").state == "20"
+        assert metrics.counters["writes_suppressed"] == 1
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_expired_consumables_are_not_rewritten_at_midnight(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2023-12-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        metrics = hass.data["consumable_expiration"]["metrics"]
+        state = hass.states.get("sensor.filter_days_remaining")
+        assert state.state == "0"
+        assert state.attributes["days_elapsed"] == 10
+
+        writes = hass.states.writes
+        for day in (2, 3):
+            await hass.async_fire_time_changed(dt.datetime(2024, 1, day, tzinfo=fake_hass.UTC))
+        assert hass.states.writes == writes
+        assert metrics.counters["writes_suppressed"] == 2
+        assert hass.states.get("sensor.filter_days_remaining").attributes["days_elapsed"] == 10
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,124 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPORT = Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration" / "report.py"
+
+
+def _write_store(storage: Path, key: str, data: dict) -> None:
+    (storage / key).write_text(json.dumps({"version": 1, "minor_version": 1, "key": key, "data": data}))
+
+
+def _config_dir(tmp_path: Path, other_entries: int = 0) -> Path:
+    storage = tmp_path / ".storage"
+    storage.mkdir()
+    entries = [
+        {"entry_id": f"other{i}", "domain": "mqtt", "data": {"blob": "x" * 500}, "options": {}}
+        for i in range(other_entries)
+    ]
+    entries.insert(
+        len(entries) // 2,
+        {
+            "entry_id": "single",
+            "domain": "consumable_expiration",
+            "title": "Water Filter",
+            "data": {"name": "Water Filter", "item_type": "water filter", "duration_days": 30, "start_date": "2024-01-01"},
+            "options": {"duration_days": 10, "start_date": "2024-01-01"},
+        },
+    )
+    entries.append(
+        {
+            "entry_id": "hub1",
+            "domain": "consumable_expiration",
+            "title": "Consumables",
+            "data": {"name": "Consumables", "entry_type": "hub"},
+            "options": {},
+        }
+    )
+    _write_store(storage, "core.config_entries", {"entries": entries})
+    _write_store(
+        storage,
+        "consumable_expiration.hub1",
+        {
+            "items": [
+                {"id": "a", "name": "Filter A", "item_type": "ac filter", "duration_days": 4, "start_date": "2024-01-02"},
+                {"id": "p", "name": "Pump", "usage_entity": "switch.pump", "usage_limit": 10},
+            ]
+        },
+    )
+    _write_store(
+        storage,
+        "consumable_expiration.hub1.headless",
+        {"ids": ["lot-1"], "start": [738886], "duration": [3], "type_codes": [0], "types": ["milk"]},
+    )
+    return tmp_path
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    # A fresh interpreter proves the report runs without Home Assistant
+    return subprocess.run(
+        [sys.executable, str(REPORT), *args], capture_output=True, text=True, check=False
+    )
+
+
+def test_report_json_matches_sensor_math(tmp_path):
+    config = _config_dir(tmp_path)
+    result = _run("--config", str(config), "--format", "json", "--date", "2024-01-05")
+    assert result.returncode == 0, result.stderr
+    rows = json.loads(result.stdout)
+    assert [(row["id"], row["source"]) for row in rows] == [("a", "hub"), ("single", "entry"), ("p", "hub")]
+    hub_row, single, pump = rows
+    assert (hub_row["due_date"], hub_row["days_remaining"], hub_row["percent_used"]) == ("2024-01-06", 1, 75.0)
+    # Options win over entry data, as on the sensor
+    assert (single["duration_days"], single["days_remaining"], single["expired"]) == (10, 6, False)
+    assert pump["days_remaining"] is None
+
+    result = _run("--config", str(config), "--format", "json", "--date", "2024-01-05", "--headless")
+    rows = json.loads(result.stdout)
+    assert rows[0]["id"] == "lot-1" and rows[0]["expired"] is True
+
+
+def test_report_table_and_csv(tmp_path):
+    config = _config_dir(tmp_path, other_entries=5000)
+    assert (config / ".storage" / "core.config_entries").stat().st_size > 2_000_000
+    table = _run("--config", str(config), "--date", "2024-01-05")
+    assert table.returncode == 0, table.stderr
+    lines = table.stdout.splitlines()
+    assert lines[0].split()[:3] == ["id", "name", "item_type"]
+    assert lines[2].split()[0] == "a"
+    assert "Water Filter" in lines[3]
+
+    result = _run("--config", str(config), "--format", "csv", "--date", "2024-01-05")
+    header, first = result.stdout.splitlines()[:2]
+    assert header.startswith("id,name,item_type,source")
+    assert first.startswith("a,Filter A,ac filter,hub,2024-01-02,4,2024-01-06,1,75.0")
+
+    missing = _run("--config", str(tmp_path / "nowhere"))
+    assert missing.returncode == 1
+    assert missing.stderr.startswith("error:")
+
+
+def test_entries_are_split_across_any_chunk_boundary(tmp_path):
+    entries = [
+        {"entry_id": "x1", "domain": "mqtt", "data": {"note": 'tricky "}]{[" \\ text', "list": [1, {"a": []}]}},
+        {"entry_id": "c1", "domain": "consumable_expiration", "data": {"name": 'Brush "1" \\'}, "options": {}},
+        {"entry_id": "x2", "domain": "hue", "data": {"mentions": "consumable_expiration"}},
+        {"entry_id": "c2", "domain": "consumable_expiration", "data": {"name": "Pad ]"}, "options": {}},
+    ]
+    path = tmp_path / "core.config_entries"
+    path.write_text(json.dumps({"version": 1, "key": "core.config_entries", "data": {"entries": entries}}, indent=1))
+    script = f"""
+import importlib.util, json, sys
+spec = importlib.util.spec_from_file_location("report", {str(REPORT)!r})
+report = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(report)
+expected = [e for e in json.load(open({str(path)!r}))["data"]["entries"] if e["domain"] == "consumable_expiration"]
+for size in range(1, 40):
+    report.CHUNK_SIZE = size
+    with open({str(path)!r}) as handle:
+        assert list(report.iter_domain_entries(handle)) == expected, size
+print("ok")
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=False)
+    assert result.stdout.strip() == "ok", result.stderr
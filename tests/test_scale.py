@@ -0,0 +1,53 @@
+import asyncio
+import datetime as dt
+import importlib.util
+from pathlib import Path
+
+import fake_hass
+
+
+def _load_benchmark():
+    path = Path(__file__).resolve().parents[1] / "benchmarks" / "bench_scale.py"
+    spec = importlib.util.spec_from_file_location("bench_scale", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_fake_hass_runs_the_integration(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.filter_days_remaining").state == "10"
+        assert hass.states.get("button.filter_mark_replaced") is not None
+
+        # One shared timer moves every sensor at local midnight
+        assert hass.pending_timers == 1
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 2, tzinfo=fake_hass.UTC))
+        assert hass.states.get("sensor.filter_days_remaining").state == "9"
+
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.filter_days_remaining", "start_date": "2024-01-02"},
+        )
+        assert hass.states.get("sensor.filter_days_remaining").state == "10"
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_benchmark_report_is_json_ready():
+    bench = _load_benchmark()
+    report = bench.run(sizes=(5,), samples=2)
+    assert [(r["mode"], r["consumables"]) for r in report["results"]] == [("entries", 5), ("hub", 5)]
+    entries = report["results"][0]
+    assert entries["entities"] == 20
+    assert entries["midnight_tick_writes"] == 5
+    assert set(entries["update_reload_ms"]) == {"median", "p95", "max"}
+    assert entries["peak_memory_bytes"] > 0
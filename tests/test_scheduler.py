@@ -0,0 +1,141 @@
+import sys
+import types
+import datetime as dt
+from pathlib import Path
+
+
+def _setup_modules(monkeypatch):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.scheduler", None)
+
+    timers = []
+
+    ha_module = types.ModuleType("homeassistant")
+    core = types.ModuleType("homeassistant.core")
+    class HomeAssistant:
+        pass
+    core.HomeAssistant = HomeAssistant
+    core.callback = lambda func: func
+
+    helpers = types.ModuleType("homeassistant.helpers")
+    event = types.ModuleType("homeassistant.helpers.event")
+    def async_track_point_in_utc_time(hass, action, point):
+        timer = {"action": action, "point": point, "cancelled": False}
+        timers.append(timer)
+        def _cancel():
+            timer["cancelled"] = True
+        return _cancel
+    event.async_track_point_in_utc_time = async_track_point_in_utc_time
+    helpers.event = event
+
+    util = types.ModuleType("homeassistant.util")
+    dt_util = types.ModuleType("homeassistant.util.dt")
+    dt_util.utc_from_timestamp = lambda ts: dt.datetime.fromtimestamp(ts, dt.timezone.utc)
+    dt_util.start_of_local_day = lambda date: dt.datetime.combine(
+        date, dt.time(), tzinfo=dt.timezone.utc
+    )
+    util.dt = dt_util
+
+    monkeypatch.setitem(sys.modules, "homeassistant", ha_module)
+    monkeypatch.setitem(sys.modules, "homeassistant.core", core)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers", helpers)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers.event", event)
+    monkeypatch.setitem(sys.modules, "homeassistant.util", util)
+    monkeypatch.setitem(sys.modules, "homeassistant.util.dt", dt_util)
+
+    from consumable_expiration.scheduler import ExpiryScheduler, local_midnight
+
+    return ExpiryScheduler, local_midnight, timers
+
+
+def _live(timers):
+    return [t for t in timers if not t["cancelled"]]
+
+
+def _fire(timer, now):
+    # A timer that has run can no longer be cancelled
+    timer["cancelled"] = True
+    timer["action"](now)
+
+
+def test_single_timer_armed_for_earliest_transition(monkeypatch):
+    ExpiryScheduler, local_midnight, timers = _setup_modules(monkeypatch)
+    scheduler = ExpiryScheduler(types.SimpleNamespace())
+    day = dt.date(2024, 1, 1).toordinal()
+
+    fired = []
+    for i in range(100):
+        scheduler.async_schedule(f"item{i}", local_midnight(day + 1 + i % 3), fired.append)
+
+    live = _live(timers)
+    assert len(live) == 1
+    assert live[0]["point"] == local_midnight(day + 1)
+    assert len(scheduler) == 100
+
+    _fire(live[0], local_midnight(day + 1))
+    # Only the consumables due on the first day ran
+    assert len(fired) == 34
+    assert len(scheduler) == 66
+    live = _live(timers)
+    assert len(live) == 1
+    assert live[0]["point"] == local_midnight(day + 2)
+
+
+def test_reschedule_and_cancel_skip_stale_items(monkeypatch):
+    ExpiryScheduler, local_midnight, timers = _setup_modules(monkeypatch)
+    scheduler = ExpiryScheduler(types.SimpleNamespace())
+    day = dt.date(2024, 1, 1).toordinal()
+
+    fired = []
+    scheduler.async_schedule("a", local_midnight(day + 1), lambda now: fired.append("a"))
+    scheduler.async_schedule("b", local_midnight(day + 2), lambda now: fired.append("b"))
+    scheduler.async_schedule("a", local_midnight(day + 3), lambda now: fired.append("a"))
+    scheduler.async_cancel("b")
+
+    live = _live(timers)
+    assert len(live) == 1
+    assert live[0]["point"] == local_midnight(day + 3)
+
+    _fire(live[0], local_midnight(day + 3))
+    assert fired == ["a"]
+    assert len(scheduler) == 0
+    assert _live(timers) == []
+
+
+def test_last_unload_shuts_the_timer_down(tmp_path):
+    import asyncio
+
+    import fake_hass
+
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entries = [
+            fake_hass.ConfigEntry(title=name, data={"name": name, "duration_days": 30, "start_date": "2024-01-01"})
+            for name in ("Filter", "Brush")
+        ]
+        for entry in entries:
+            await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        scheduler = hass.data["consumable_expiration"]["scheduler"]
+
+        # Stands in for a transition whose owner never cancelled it
+        scheduler.async_schedule("stray", dt.datetime(2024, 6, 1, tzinfo=fake_hass.UTC), lambda now: None)
+
+        await hass.config_entries.async_unload(entries[0].entry_id)
+        assert hass.pending_timers == 1
+        assert len(scheduler) > 0
+        await hass.config_entries.async_unload(entries[1].entry_id)
+        assert hass.pending_timers == 0
+        assert len(scheduler) == 0 and scheduler._heap == []
+
+        # Setting up again starts from a clean queue
+        await hass.config_entries.async_setup(entries[1].entry_id)
+        await hass.async_block_till_done()
+        assert hass.pending_timers == 1
+
+    with fake_hass.installed():
+        asyncio.run(run())
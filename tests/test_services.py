@@ -3,75 +3,25 @@ import types
 import datetime as dt
 from pathlib import Path
 
+import fake_hass
+
 
 def _setup_modules(monkeypatch):
+    # Home Assistant and voluptuous come from the shared fake
+    modules = fake_hass.patch_modules(monkeypatch)
+    # The tests below flush the option writer themselves
+    monkeypatch.setattr(
+        modules["homeassistant.helpers.event"], "async_call_later", lambda hass, delay, action: (lambda: None)
+    )
     package = types.ModuleType("consumable_expiration")
     package.__path__ = [
         str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
     ]
     monkeypatch.setitem(sys.modules, "consumable_expiration", package)
     sys.modules.pop("consumable_expiration.__init__", None)
-
-    vol_module = types.ModuleType("voluptuous")
-    class Schema:
-        def __init__(self, schema):
-            self.schema = schema
-        def __call__(self, data):
-            return data
-    vol_module.Schema = Schema
-    vol_module.Required = lambda key, default=None: key
-    vol_module.Optional = lambda key, default=None: key
-    vol_module.All = lambda *args, **kwargs: (lambda v: v)
-    vol_module.Coerce = lambda t: (lambda v: v)
-    vol_module.Range = lambda *args, **kwargs: (lambda v: v)
-    monkeypatch.setitem(sys.modules, "voluptuous", vol_module)
-
-    cv_module = types.ModuleType("homeassistant.helpers.config_validation")
-    cv_module.entity_id = lambda v: v
-    cv_module.date = lambda v: v
-    monkeypatch.setitem(sys.modules, "homeassistant.helpers.config_validation", cv_module)
-
-    const_module = types.ModuleType("homeassistant.const")
-    class Platform:
-        SENSOR = "sensor"
-        BUTTON = "button"
-    const_module.Platform = Platform
-    monkeypatch.setitem(sys.modules, "homeassistant.const", const_module)
-
-    ha_module = types.ModuleType("homeassistant")
-    config_entries = types.ModuleType("homeassistant.config_entries")
-    class ConfigEntry:
-        pass
-    config_entries.ConfigEntry = ConfigEntry
-
-    core = types.ModuleType("homeassistant.core")
-    class HomeAssistant:
-        def __init__(self):
-            self.config_entries = None
-    class ServiceCall:
-        def __init__(self, data=None):
-            self.data = data or {}
-    core.HomeAssistant = HomeAssistant
-    core.ServiceCall = ServiceCall
-
-    helpers = types.ModuleType("homeassistant.helpers")
-    entity_registry = types.ModuleType("homeassistant.helpers.entity_registry")
-    def async_get(hass):
-        return types.SimpleNamespace(async_get=lambda entity_id: None)
-    entity_registry.async_get = async_get
-    helpers.entity_registry = entity_registry
-
-    ha_module.config_entries = config_entries
-    ha_module.core = core
-    ha_module.helpers = helpers
-
-    monkeypatch.setitem(sys.modules, "homeassistant", ha_module)
-    monkeypatch.setitem(sys.modules, "homeassistant.config_entries", config_entries)
-    monkeypatch.setitem(sys.modules, "homeassistant.core", core)
-    monkeypatch.setitem(sys.modules, "homeassistant.helpers", helpers)
-    monkeypatch.setitem(sys.modules, "homeassistant.helpers.entity_registry", entity_registry)
-    monkeypatch.setitem(sys.modules, "homeassistant.helpers.config_validation", cv_module)
-    monkeypatch.setitem(sys.modules, "homeassistant.const", const_module)
+    # Import the integration's modules afresh against the fake
+    for name in [name for name in sys.modules if name.startswith("consumable_expiration.")]:
+        monkeypatch.delitem(sys.modules, name)
 
 
 def test_set_expiry_date_updates_start(monkeypatch):
@@ -100,13 +50,19 @@ def test_set_expiry_date_updates_start(monkeypatch):
 
     entry = ConfigEntry()
     hass = types.SimpleNamespace(
-        data={DOMAIN: {"entity_map": {"sensor.test": entry.entry_id}}},
+        data={DOMAIN: {"specs": {}}},
         config_entries=ConfigEntries(entry),
     )
+    index = importlib.import_module("consumable_expiration.index").EntityIndex()
+    index.add("sensor.test", entry.entry_id)
+    hass.data[DOMAIN]["index"] = index
+    writer_module = importlib.import_module("consumable_expiration.writer")
+    hass.data[DOMAIN]["writer"] = writer_module.OptionsWriter(hass)
+    hass.data[DOMAIN]["metrics"] = importlib.import_module("consumable_expiration.metrics").Metrics()
 
     services = {}
     class Services:
-        def async_register(self, domain, name, handler, schema=None):
+        def async_register(self, domain, name, handler, schema=None, supports_response=None):
             services[name] = handler
     hass.services = Services()
 
@@ -115,12 +71,134 @@ def test_set_expiry_date_updates_start(monkeypatch):
     class Call:
         def __init__(self, data):
             self.data = data
+            self.return_response = False
 
     expiry = dt.date(2024, 2, 10)
     call = Call({"entity_id": "sensor.test", "expiry_date": expiry})
 
     import asyncio
     asyncio.run(services["set_expiry_date"](call))
+    # Options are persisted by the write-behind buffer
+    hass.data[DOMAIN]["writer"].async_flush()
 
     assert entry.options[CONF_START_DATE] == "2024-01-11"
     assert entry.options[CONF_DURATION_DAYS] == 30
+
+
+def _load_init(monkeypatch):
+    _setup_modules(monkeypatch)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "custom_components"))
+    import importlib
+    init = importlib.import_module("consumable_expiration.__init__")
+    const = importlib.import_module("consumable_expiration.const")
+    spec = importlib.import_module("consumable_expiration.spec")
+    return init, const, spec
+
+
+def test_option_change_applies_in_place(monkeypatch):
+    init, const, spec_module = _load_init(monkeypatch)
+    import asyncio
+
+    entry = types.SimpleNamespace(
+        entry_id="123",
+        data={const.CONF_NAME: "Filter"},
+        options={const.CONF_DURATION_DAYS: 30, const.CONF_START_DATE: "2024-01-01"},
+    )
+    reloads = []
+    async def async_reload(entry_id):
+        reloads.append(entry_id)
+    import importlib
+    hass = types.SimpleNamespace(
+        data={
+            const.DOMAIN: {
+                "specs": {
+                    entry.entry_id: spec_module.ConsumableSpec.from_options(
+                        entry.entry_id, entry.options, entry.data
+                    )
+                },
+                "structure": {entry.entry_id: init._structural_data(entry)},
+                "metrics": importlib.import_module("consumable_expiration.metrics").Metrics(),
+            }
+        },
+        config_entries=types.SimpleNamespace(async_reload=async_reload),
+    )
+    sent = []
+    runtime = importlib.import_module("consumable_expiration.runtime")
+    monkeypatch.setattr(runtime, "async_dispatcher_send", lambda hass, signal: sent.append(signal))
+
+    entry.options = {const.CONF_DURATION_DAYS: 60, const.CONF_START_DATE: "2024-01-01"}
+    asyncio.run(init._update_listener(hass, entry))
+    assert reloads == []
+    assert sent == [const.SIGNAL_SPEC_UPDATED.format("123")]
+    assert hass.data[const.DOMAIN]["specs"]["123"].duration == 60
+
+    entry.data = {const.CONF_NAME: "Renamed"}
+    asyncio.run(init._update_listener(hass, entry))
+    assert reloads == ["123"]
+    assert len(sent) == 1
+
+
+def test_batch_targets_update_each_entry_once(monkeypatch):
+    init, const, _spec = _load_init(monkeypatch)
+    import asyncio
+
+    class ConfigEntry:
+        def __init__(self, entry_id):
+            self.entry_id = entry_id
+            self.data = {}
+            self.options = {const.CONF_DURATION_DAYS: 30, const.CONF_START_DATE: "2024-01-01"}
+
+    entries = {"a": ConfigEntry("a"), "b": ConfigEntry("b")}
+    updates = []
+
+    class ConfigEntries:
+        def async_get_entry(self, entry_id):
+            return entries.get(entry_id)
+        def async_update_entry(self, entry, options=None, data=None):
+            updates.append(entry.entry_id)
+            entry.options = options
+
+    services = {}
+    class Services:
+        def async_register(self, domain, name, handler, schema=None, supports_response=None):
+            services[name] = handler
+
+    hass = types.SimpleNamespace(
+        data={
+            const.DOMAIN: {
+                "specs": {},
+            }
+        },
+        config_entries=ConfigEntries(),
+        services=Services(),
+    )
+    import importlib
+    index = importlib.import_module("consumable_expiration.index").EntityIndex()
+    for entity_id, key in (("sensor.a", "a"), ("button.a", "a"), ("sensor.b", "b")):
+        index.add(entity_id, key)
+    hass.data[const.DOMAIN]["index"] = index
+    writer = importlib.import_module("consumable_expiration.writer").OptionsWriter(hass)
+    hass.data[const.DOMAIN]["writer"] = writer
+    hass.data[const.DOMAIN]["metrics"] = importlib.import_module("consumable_expiration.metrics").Metrics()
+    init._register_services(hass)
+
+    # A device target pulls in both entities of entry "a" plus another integration's light
+    monkeypatch.setattr(
+        init,
+        "async_extract_referenced_entity_ids",
+        lambda hass, call: types.SimpleNamespace(
+            referenced={"sensor.b", "sensor.unknown"},
+            indirectly_referenced={"sensor.a", "button.a", "light.kitchen"},
+        ),
+    )
+    call = types.SimpleNamespace(data={"duration_days": 60}, return_response=True)
+    response = asyncio.run(services["set_duration"](call))
+    assert updates == []
+    writer.async_flush()
+
+    assert sorted(updates) == ["a", "b"]
+    results = response["results"]
+    assert set(results) == {"sensor.a", "sensor.b", "sensor.unknown"}
+    assert results["sensor.a"]["due_date"] == "2024-03-01"
+    assert results["sensor.unknown"] == {"error": "not a consumable"}
+    assert entries["b"].options[const.CONF_DURATION_DAYS] == 60
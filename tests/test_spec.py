@@ -0,0 +1,78 @@
+import sys
+import types
+import datetime as dt
+from pathlib import Path
+
+
+def _setup_package(monkeypatch):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.spec", None)
+
+
+def test_spec_precomputes_ordinals(monkeypatch):
+    _setup_package(monkeypatch)
+    from consumable_expiration.spec import ConsumableSpec
+    from consumable_expiration.const import CONF_DURATION_DAYS, CONF_START_DATE
+
+    spec = ConsumableSpec.from_options(
+        "1", {CONF_DURATION_DAYS: "30", CONF_START_DATE: "2024-01-01"}, {}
+    )
+    assert spec.valid
+    assert spec.start_ord == dt.date(2024, 1, 1).toordinal()
+    assert spec.due_date == dt.date(2024, 1, 31)
+
+    today = dt.date(2024, 1, 11).toordinal()
+    snap = spec.snapshot(today)
+    assert snap.remaining == 20
+    assert snap.percent_used == 33.3
+    assert not snap.expired
+    # The same day is served from the cached snapshot
+    assert spec.snapshot(today) is snap
+    assert snap.attributes(spec) == {
+        "start_date": "2024-01-01",
+        "duration_days": 30,
+        "due_date": "2024-01-31",
+        "days_elapsed": 10,
+        "percent_used": 33.3,
+        "expired": False,
+    }
+
+    late = spec.snapshot(dt.date(2024, 3, 1).toordinal())
+    assert late.remaining == 0
+    assert late.percent_used == 100.0
+    assert late.expired
+
+
+def test_spec_invalid_values(monkeypatch):
+    _setup_package(monkeypatch)
+    from consumable_expiration.spec import ConsumableSpec
+    from consumable_expiration.const import CONF_DURATION_DAYS, CONF_START_DATE
+
+    spec = ConsumableSpec.from_options("1", {CONF_START_DATE: "not-a-date"}, {CONF_DURATION_DAYS: 30})
+    assert not spec.valid
+    assert spec.snapshot(dt.date(2024, 1, 1).toordinal()) is None
+
+    legacy = ConsumableSpec.from_options("2", {}, {CONF_DURATION_DAYS: 10, CONF_START_DATE: "2024-1-5"})
+    assert legacy.start_date == dt.date(2024, 1, 5)
+
+
+def test_spec_from_entry_reads_stored_ordinals(monkeypatch):
+    _setup_package(monkeypatch)
+    from consumable_expiration.spec import ConsumableSpec, schedule_options
+
+    start = dt.date(2024, 1, 1).toordinal()
+    options = schedule_options(30, start)
+    spec = ConsumableSpec.from_entry("1", options, {})
+    assert (spec.start_ord, spec.due_ord) == (start, start + 30)
+    # The stored due ordinal is used as is
+    assert ConsumableSpec.from_entry("1", {**options, "due_ord": start + 31}, {}).due_ord == start + 31
+
+    # Cleared ordinals fall back to parsing the stored fields
+    cleared = {**options, "duration_days": 0, "start_ord": None, "due_ord": None}
+    spec = ConsumableSpec.from_entry("1", cleared, {})
+    assert spec.start_ord == start
+    assert not spec.valid
@@ -0,0 +1,117 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def test_parse_thresholds():
+    with fake_hass.installed():
+        fake_hass.load_integration()
+        spec = importlib.import_module("consumable_expiration.spec")
+        assert spec.parse_thresholds(None) is None
+        assert spec.parse_thresholds("") == ()
+        assert spec.parse_thresholds("1, 14 7,7") == (14, 7, 1)
+        assert spec.parse_thresholds([3, "5"]) == (5, 3)
+        for bad in ("0", "soon", [-1]):
+            try:
+                spec.parse_thresholds(bad)
+            except ValueError:
+                continue
+            raise AssertionError(bad)
+        # Invalid stored thresholds fall back to the hub's
+        parsed = spec.ConsumableSpec.from_options("a", {"duration_days": 5, "thresholds": "x"}, {})
+        assert parsed.thresholds is None
+
+
+def test_threshold_and_expired_events(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(
+            title="Consumables",
+            data={"name": "Consumables", "entry_type": "hub"},
+            options={"thresholds": [3, 1]},
+        )
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "duration_days": 4, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "duration_days": 5, "start_date": "2024-01-01"},
+            ]
+        }
+        entry = fake_hass.ConfigEntry(
+            title="Brush",
+            data={"name": "Brush", "duration_days": 2, "start_date": "2024-01-01", "thresholds": [1]},
+        )
+        await hass.config_entries.async_add(hub)
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+
+        fired = []
+        for event_type in ("consumable_expiration_threshold", "consumable_expiration_expired"):
+            hass.bus.async_listen(event_type, lambda event: fired.append((event.event_type, event.data)))
+
+        async def midnight(day):
+            fired.clear()
+            await hass.async_fire_time_changed(dt.datetime(2024, 1, day, tzinfo=fake_hass.UTC))
+            return sorted((kind.rsplit("_", 1)[1], data["id"], data.get("days_remaining")) for kind, data in fired)
+
+        # a is due on the 5th, b on the 6th and the brush on the 3rd
+        assert await midnight(2) == [("threshold", "a", 3), ("threshold", entry.entry_id, 1)]
+        _kind, data = next(item for item in fired if item[1]["id"] == "a")
+        assert data == {
+            "id": "a",
+            "entity_id": "sensor.filter_a_days_remaining",
+            "name": "Filter A",
+            "due_date": "2024-01-05",
+            "days_remaining": 3,
+        }
+        assert await midnight(3) == [("expired", entry.entry_id, None), ("threshold", "b", 3)]
+
+        # An override replaces the hub's thresholds; moving a due date replans it
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_thresholds",
+            {"entity_id": "sensor.filter_b_days_remaining", "thresholds": "2"},
+        )
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": "sensor.filter_a_days_remaining", "start_date": "2024-01-02"},
+        )
+        await hass.async_block_till_done()
+        assert hub_item(hass, "b")["thresholds"] == [2]
+        assert await midnight(4) == [("threshold", "b", 2)]
+        assert await midnight(5) == [("threshold", "a", 1)]
+        assert await midnight(6) == [("expired", "a", None), ("expired", "b", None)]
+        assert await midnight(7) == []
+
+        # Omitting thresholds goes back to the hub's
+        await hass.services.async_call(
+            "consumable_expiration", "set_thresholds", {"entity_id": "sensor.filter_b_days_remaining"}
+        )
+        assert "thresholds" not in hub_item(hass, "b")
+
+        # Changing the hub's thresholds replans consumables without their own
+        await hass.services.async_call(
+            "consumable_expiration",
+            "set_start_date",
+            {"entity_id": ["sensor.filter_a_days_remaining", "sensor.filter_b_days_remaining"],
+             "start_date": "2024-01-07"},
+        )
+        hass.config_entries.async_update_entry(hub, options={**hub.options, "thresholds": [2]})
+        await hass.async_block_till_done()
+        assert await midnight(9) == [("threshold", "a", 2)]
+
+        await hass.config_entries.async_unload(hub.entry_id)
+        await hass.config_entries.async_unload(entry.entry_id)
+        assert hass.pending_timers == 0
+
+    def hub_item(hass, item_id):
+        return hass.data["consumable_expiration"]["hub"].items[item_id]
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,184 @@
+import sys
+import types
+import datetime as dt
+from pathlib import Path
+
+
+def _setup_modules(monkeypatch, subscriptions):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.usage", None)
+
+    ha = types.ModuleType("homeassistant")
+    core = types.ModuleType("homeassistant.core")
+    core.Event = core.State = core.HomeAssistant = object
+    core.callback = lambda func: func
+    helpers = types.ModuleType("homeassistant.helpers")
+    dispatcher = types.ModuleType("homeassistant.helpers.dispatcher")
+    dispatcher.async_dispatcher_send = lambda hass, signal, *args: hass.signals.append(signal)
+    event = types.ModuleType("homeassistant.helpers.event")
+
+    def async_track_state_change_event(hass, entity_ids, action):
+        subscriptions.append((list(entity_ids), action))
+        return lambda: None
+
+    event.async_track_state_change_event = async_track_state_change_event
+    storage = types.ModuleType("homeassistant.helpers.storage")
+
+    class Store:
+        def __init__(self, hass, version, key):
+            self.saved = None
+            hass.stores.append(self)
+
+        async def async_load(self):
+            return None
+
+        def async_delay_save(self, data_func, delay):
+            self.saved = data_func()
+
+    storage.Store = Store
+    util = types.ModuleType("homeassistant.util")
+    dt_util = types.ModuleType("homeassistant.util.dt")
+    dt_util.utcnow = lambda: dt.datetime(2024, 1, 1, 12, tzinfo=dt.timezone.utc)
+    util.dt = dt_util
+
+    for name, module in (
+        ("homeassistant", ha),
+        ("homeassistant.core", core),
+        ("homeassistant.helpers", helpers),
+        ("homeassistant.helpers.dispatcher", dispatcher),
+        ("homeassistant.helpers.event", event),
+        ("homeassistant.helpers.storage", storage),
+        ("homeassistant.util", util),
+        ("homeassistant.util.dt", dt_util),
+    ):
+        monkeypatch.setitem(sys.modules, name, module)
+
+
+def _state(state, hour=0, **attributes):
+    return types.SimpleNamespace(
+        state=state,
+        last_changed=dt.datetime(2024, 1, 1, hour, tzinfo=dt.timezone.utc),
+        attributes=attributes,
+    )
+
+
+class FakeHass:
+    def __init__(self, states):
+        self.states = types.SimpleNamespace(get=states.get)
+        self.signals = []
+        self.stores = []
+        self.soon = []
+        self.loop = types.SimpleNamespace(call_soon=self.soon.append)
+
+
+def test_counter_modes(monkeypatch):
+    _setup_modules(monkeypatch, [])
+    from consumable_expiration.usage import UsageCounter
+
+    runtime = UsageCounter()
+    assert runtime.apply("runtime", _state("off"), _state("on", 1))
+    assert runtime.total("runtime", _state("on", 2).last_changed.timestamp()) == 1.0
+    assert runtime.apply("runtime", _state("on", 1), _state("off", 4))
+    assert runtime.used == 3.0 and runtime.since is None
+    assert not runtime.apply("runtime", _state("off"), _state("unavailable"))
+
+    meter = UsageCounter()
+    for reading in ("100", "110.5", "unknown", "112", "2"):
+        meter.apply("meter", None, _state(reading))
+    # The drop to 2 is a reset, so it adds 2 rather than subtracting
+    assert meter.used == 14.0
+
+    cycles = UsageCounter()
+    for old, new in (("off", "on"), ("on", "on"), ("on", "off"), ("off", "on")):
+        cycles.apply("cycles", _state(old), _state(new))
+    assert cycles.used == 2
+
+
+def test_tracker_shares_one_subscription(monkeypatch):
+    subscriptions = []
+    _setup_modules(monkeypatch, subscriptions)
+    from consumable_expiration.usage import UsageTracker
+
+    hass = FakeHass({"switch.pump": _state("on", 10), "sensor.water": _state("50", unit_of_measurement="L")})
+    tracker = UsageTracker(hass)
+    tracker.async_register("a", {"usage_entity": "switch.pump", "usage_limit": 100})
+    tracker.async_register("b", {"usage_entity": "switch.pump", "usage_mode": "cycles", "usage_limit": 10})
+    unregister = tracker.async_register(
+        "c", {"usage_entity": "sensor.water", "usage_mode": "meter", "usage_limit": 500}
+    )
+    # Registrations in the same loop iteration subscribe once
+    assert len(hass.soon) == 1
+    hass.soon.pop()()
+    [(entity_ids, action)] = subscriptions
+    assert sorted(entity_ids) == ["sensor.water", "switch.pump"]
+
+    # The pump was already running when tracking started
+    assert tracker.usage("a") == 2.0
+    action(types.SimpleNamespace(data={"entity_id": "switch.pump", "old_state": _state("on", 10), "new_state": _state("off", 11)}))
+    action(types.SimpleNamespace(data={"entity_id": "sensor.water", "old_state": None, "new_state": _state("75")}))
+    assert tracker.usage("a") == 1.0
+    assert tracker.usage("c") == 25.0
+    assert hass.signals == [
+        "consumable_expiration_usage_updated_a",
+        "consumable_expiration_usage_updated_c",
+    ]
+    assert hass.stores[0].saved["counters"]["c"] == [25.0, None, 75.0]
+
+    tracker.async_reset("a")
+    assert tracker.usage("a") == 0.0
+    unregister()
+    assert len(hass.soon) == 1
+
+
+def test_running_source_reaches_its_limit_without_a_state_change(tmp_path):
+    import asyncio
+
+    import fake_hass
+
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hass.states.async_set("switch.pump", "on")
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [{"id": "p", "name": "Pump", "usage_entity": "switch.pump", "usage_limit": 1}]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        scheduler = hass.data["consumable_expiration"]["scheduler"]
+
+        def states():
+            return (
+                hass.states.get("sensor.pump_usage_remaining").state,
+                hass.states.get("binary_sensor.pump_expired").state,
+            )
+
+        assert states() == ("1.0", "off")
+        # Refreshed while the pump keeps running
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 1, 12, 30, tzinfo=fake_hass.UTC))
+        assert states() == ("0.5", "off")
+        # Expired the moment the hour of runtime is used up
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 1, 12, 59, 59, tzinfo=fake_hass.UTC))
+        assert states()[1] == "off"
+        await hass.async_fire_time_changed(dt.datetime(2024, 1, 1, 13, tzinfo=fake_hass.UTC))
+        assert states() == ("0.0", "on")
+        assert ("usage", "p") in scheduler._pending
+
+        # Turning the source off stops the refreshes
+        hass.states.async_set("switch.pump", "off")
+        await hass.async_block_till_done()
+        assert ("usage", "p") not in scheduler._pending
+
+        hass.states.async_set("switch.pump", "on")
+        await hass.async_block_till_done()
+        assert ("usage", "p") in scheduler._pending
+        await hass.config_entries.async_unload(hub.entry_id)
+        await hass.async_block_till_done()
+        assert not hass._state_listeners.get("switch.pump")
+        assert len(scheduler) == 0
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,114 @@
+import asyncio
+import datetime as dt
+import importlib
+
+import fake_hass
+
+
+def _ord(value: str) -> int:
+    return dt.date.fromisoformat(value).toordinal()
+
+
+def test_list_filters_and_pages(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        items = [
+            {"id": f"f{i}", "name": f"Filter {i}", "item_type": "ac filter", "duration_days": 10 + i, "start_date": "2024-01-01"}
+            for i in range(5)
+        ]
+        items.append({"id": "pump", "name": "Pump", "usage_entity": "switch.pump", "usage_limit": 10, "start_date": "2024-01-01"})
+        items.append({"id": "brush", "name": "Brush", "item_type": "vacuum brush", "duration_days": 3, "start_date": "2024-01-01"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {"items": items}
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        ws = fake_hass.ActiveConnection(hass)
+
+        msg = await ws.async_send({"type": "consumable_expiration/list", "limit": 3})
+        result = msg["result"]
+        assert list(result["columns"]) == ["id", "name", "item_type", "start", "duration", "due", "remaining"]
+        assert result["rows"][0] == ["brush", "Brush", "vacuum brush", _ord("2024-01-01"), 3, _ord("2024-01-04"), 3]
+        assert [row[0] for row in result["rows"]] == ["brush", "f0", "f1"]
+
+        # Following the cursor visits every consumable once, undated last
+        seen = [row[0] for row in result["rows"]]
+        while result["next_cursor"]:
+            msg = await ws.async_send(
+                {"type": "consumable_expiration/list", "limit": 3, "cursor": result["next_cursor"]}
+            )
+            result = msg["result"]
+            seen += [row[0] for row in result["rows"]]
+        assert seen == ["brush", "f0", "f1", "f2", "f3", "f4", "pump"]
+
+        msg = await ws.async_send(
+            {
+                "type": "consumable_expiration/list",
+                "item_type": "ac filter",
+                "due_from": "2024-01-12",
+                "due_to": "2024-01-14",
+            }
+        )
+        assert [row[0] for row in msg["result"]["rows"]] == ["f1", "f2", "f3"]
+        assert msg["result"]["next_cursor"] is None
+
+        ent_reg = importlib.import_module("homeassistant.helpers.entity_registry").async_get(hass)
+        ent_reg.async_update_entity("sensor.filter_4_days_remaining", area_id="attic")
+        msg = await ws.async_send({"type": "consumable_expiration/list", "area": "attic"})
+        assert [row[0] for row in msg["result"]["rows"]] == ["f4"]
+
+        msg = await ws.async_send({"type": "consumable_expiration/list", "cursor": "nonsense"})
+        assert msg["error"]["code"] == "invalid_format"
+
+    with fake_hass.installed():
+        asyncio.run(run())
+
+
+def test_subscribe_pushes_deltas(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        hub = fake_hass.ConfigEntry(title="Consumables", data={"name": "Consumables", "entry_type": "hub"})
+        hass.storage[f"consumable_expiration.{hub.entry_id}"] = {
+            "items": [
+                {"id": "a", "name": "Filter A", "item_type": "ac filter", "duration_days": 10, "start_date": "2024-01-01"},
+                {"id": "b", "name": "Filter B", "item_type": "ac filter", "duration_days": 20, "start_date": "2024-01-01"},
+                {"id": "c", "name": "Brush", "item_type": "vacuum brush", "duration_days": 5, "start_date": "2024-01-01"},
+            ]
+        }
+        await hass.config_entries.async_add(hub)
+        await hass.async_block_till_done()
+        ws = fake_hass.ActiveConnection(hass)
+
+        msg = await ws.async_send({"type": "consumable_expiration/subscribe", "item_type": "ac filter"})
+        assert msg["success"]
+        sub = msg["id"]
+        first = ws.events(sub)
+        assert [row[0] for row in first[0]["changed"]] == ["a", "b"]
+
+        # Only matching consumables that changed are pushed
+        for entity_id, days in (("sensor.filter_a_days_remaining", 30), ("sensor.brush_days_remaining", 9)):
+            await hass.services.async_call(
+                "consumable_expiration", "set_duration", {"entity_id": entity_id, "duration_days": days}
+            )
+        await hass.services.async_call(
+            "consumable_expiration", "remove_consumable", {"entity_id": "sensor.filter_b_days_remaining"}
+        )
+        await hass.async_block_till_done()
+        deltas = ws.events(sub)[1:]
+        changed = [row for delta in deltas for row in delta["changed"]]
+        removed = [key for delta in deltas for key in delta["removed"]]
+        assert [(row[0], row[4]) for row in changed] == [("a", 30)]
+        assert removed == ["b"]
+
+        ws.async_unsubscribe(sub)
+        specs = hass.data["consumable_expiration"]["specs"]
+        assert len(specs.observers) == 2
+        count = len(ws.messages)
+        await hass.services.async_call(
+            "consumable_expiration", "set_duration",
+            {"entity_id": "sensor.filter_a_days_remaining", "duration_days": 40},
+        )
+        await hass.async_block_till_done()
+        assert len(ws.messages) == count
+
+    with fake_hass.installed():
+        asyncio.run(run())
@@ -0,0 +1,130 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+
+import fake_hass
+
+
+def _setup_modules(monkeypatch):
+    package = types.ModuleType("consumable_expiration")
+    package.__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / "consumable_expiration")
+    ]
+    monkeypatch.setitem(sys.modules, "consumable_expiration", package)
+    sys.modules.pop("consumable_expiration.writer", None)
+
+    scheduled = []
+
+    ha_module = types.ModuleType("homeassistant")
+    config_entries = types.ModuleType("homeassistant.config_entries")
+    class ConfigEntry:
+        pass
+    config_entries.ConfigEntry = ConfigEntry
+    core = types.ModuleType("homeassistant.core")
+    class HomeAssistant:
+        pass
+    core.HomeAssistant = HomeAssistant
+    core.callback = lambda func: func
+    helpers = types.ModuleType("homeassistant.helpers")
+    event = types.ModuleType("homeassistant.helpers.event")
+    def async_call_later(hass, delay, action):
+        scheduled.append(action)
+        return lambda: scheduled.remove(action)
+    event.async_call_later = async_call_later
+    helpers.event = event
+
+    monkeypatch.setitem(sys.modules, "homeassistant", ha_module)
+    monkeypatch.setitem(sys.modules, "homeassistant.config_entries", config_entries)
+    monkeypatch.setitem(sys.modules, "homeassistant.core", core)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers", helpers)
+    monkeypatch.setitem(sys.modules, "homeassistant.helpers.event", event)
+
+    from consumable_expiration.writer import OptionsWriter
+    return OptionsWriter, scheduled
+
+
+def test_updates_are_merged_and_flushed_once(monkeypatch):
+    OptionsWriter, scheduled = _setup_modules(monkeypatch)
+
+    entry = types.SimpleNamespace(
+        entry_id="1", data={}, options={"duration_days": 30, "start_date": "2024-01-01"}
+    )
+    writes = []
+    def async_update_entry(entry, options=None):
+        writes.append(options)
+        entry.options = options
+    hass = types.SimpleNamespace(
+        config_entries=types.SimpleNamespace(
+            async_get_entry=lambda entry_id: entry, async_update_entry=async_update_entry
+        )
+    )
+    writer = OptionsWriter(hass)
+
+    for day in range(1, 11):
+        options = writer.async_set(entry, {"start_date": f"2024-02-{day:02d}"})
+    options = writer.async_set(entry, {"duration_days": 60})
+
+    # Callers see the merged options before anything is written
+    assert options == {"duration_days": 60, "start_date": "2024-02-10"}
+    assert writes == []
+    assert len(scheduled) == 1
+
+    scheduled.pop()(None)
+    assert writes == [{"duration_days": 60, "start_date": "2024-02-10"}]
+    stats = writer.stats
+    assert stats["flushes"] == 1
+    assert stats["entries_written"] == 1
+    assert stats["updates_buffered"] == 11
+    assert stats["pending_entries"] == 0
+    assert stats["last_flush_latency"] is not None
+
+
+def test_flush_entry_writes_immediately(monkeypatch):
+    OptionsWriter, scheduled = _setup_modules(monkeypatch)
+
+    entry = types.SimpleNamespace(entry_id="1", data={}, options={"duration_days": 30})
+    writes = []
+    hass = types.SimpleNamespace(
+        config_entries=types.SimpleNamespace(
+            async_get_entry=lambda entry_id: entry,
+            async_update_entry=lambda entry, options=None: writes.append(options),
+        )
+    )
+    writer = OptionsWriter(hass)
+    writer.async_set(entry, {"duration_days": 45})
+    writer.async_flush_entry("1")
+
+    assert writes == [{"duration_days": 45}]
+    assert scheduled == []
+
+
+def test_removing_an_entry_with_pending_options_does_not_reload_it(tmp_path):
+    async def run():
+        hass, _integration = fake_hass.create_hass(str(tmp_path))
+        entry = fake_hass.ConfigEntry(
+            title="Filter",
+            data={"name": "Filter", "duration_days": 10, "start_date": "2024-01-01"},
+        )
+        await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        reloads = []
+        reload = hass.config_entries.async_reload
+
+        async def tracking_reload(entry_id):
+            reloads.append(entry_id)
+            return await reload(entry_id)
+
+        hass.config_entries.async_reload = tracking_reload
+        await hass.services.async_call(
+            "consumable_expiration", "set_duration",
+            {"entity_id": "sensor.filter_days_remaining", "duration_days": 20},
+        )
+        await hass.config_entries.async_remove(entry.entry_id)
+        await hass.async_block_till_done()
+        # The buffered duration was written on unload without reloading the entry
+        assert entry.options["duration_days"] == 20
+        assert reloads == []
+
+    with fake_hass.installed():
+        asyncio.run(run())